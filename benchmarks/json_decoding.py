@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: market-data messages decoded per second, per decoder backend.
+
+Decodes synthetic Binance and KuCoin REST payloads shaped like the real ones
+with every MarketDataDecoder backend. 'json' is the current path (stdlib
+json.loads into dicts, then float() on the fields we use); ccxt additionally
+builds unified ticker dicts on top of that, so it is slower still.
+
+    python benchmarks/json_decoding.py [--seconds 1.0]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from exchanges.decoders import DECODER_BACKENDS, MarketDataDecoder
+
+
+def _price(base):
+    return f'{base * (1 + random.uniform(-0.001, 0.001)):.2f}'
+
+
+def _levels(base, count):
+    return [[_price(base), f'{random.uniform(0.001, 2):.8f}'] for _ in range(count)]
+
+
+def build_payloads(ticker_count=1200):
+    book_ticker = {'symbol': 'BTCUSDT', 'bidPrice': _price(65000), 'bidQty': '1.20000000',
+                   'askPrice': _price(65001), 'askQty': '0.80000000'}
+    depth = {'lastUpdateId': 123456789, 'bids': _levels(65000, 20), 'asks': _levels(65001, 20)}
+    level1 = {'code': '200000', 'data': {'time': 1700000000000, 'sequence': '1550467636704',
+                                         'price': _price(65000), 'size': '0.017', 'bestBid': _price(65000),
+                                         'bestBidSize': '0.5', 'bestAsk': _price(65001), 'bestAskSize': '0.4'}}
+    kucoin_depth = {'code': '200000', 'data': {'time': 1700000000000, 'sequence': '3262786978',
+                                               'bids': _levels(65000, 20), 'asks': _levels(65001, 20)}}
+    tickers = [{'symbol': f'C{i}-USDT', 'symbolName': f'C{i}-USDT', 'buy': _price(10), 'bestBidSize': '12.5',
+                'sell': _price(10.01), 'bestAskSize': '8.1', 'changeRate': '0.0123', 'changePrice': '0.12',
+                'high': _price(11), 'low': _price(9), 'vol': '125000.5', 'volValue': '1250000.1',
+                'last': _price(10), 'averagePrice': _price(10), 'takerFeeRate': '0.001',
+                'makerFeeRate': '0.001', 'takerCoefficient': '1', 'makerCoefficient': '1'}
+               for i in range(ticker_count)]
+    all_tickers = {'code': '200000', 'data': {'time': 1700000000000, 'ticker': tickers}}
+
+    return {
+        'book_ticker': json.dumps(book_ticker).encode(),
+        'depth': json.dumps(depth).encode(),
+        'kucoin_level1': json.dumps(level1).encode(),
+        'kucoin_depth': json.dumps(kucoin_depth).encode(),
+        'kucoin_tickers': json.dumps(all_tickers).encode(),
+    }
+
+
+def messages_per_second(func, raw, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(10):
+            func(raw)
+        count += 10
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare market-data decoding throughput')
+    parser.add_argument('--seconds', type=float, default=1.0, help='Time spent per message type and backend')
+    args = parser.parse_args()
+
+    random.seed(7)
+    payloads = build_payloads()
+    decoders = {backend: MarketDataDecoder(backend) for backend in DECODER_BACKENDS}
+    # A missing library falls back to another backend; don't report it twice
+    decoders = {backend: decoder for backend, decoder in decoders.items() if decoder.backend == backend}
+
+    print(f"{'message':<16}{'bytes':>9}" + ''.join(f'{backend:>14}' for backend in decoders) + f"{'speedup':>10}")
+    for message, raw in payloads.items():
+        rates = {backend: messages_per_second(getattr(decoder, message), raw, args.seconds)
+                 for backend, decoder in decoders.items()}
+        fastest = max(rates.values())
+        print(f'{message:<16}{len(raw):>9}' + ''.join(f'{rate:>12,.0f}/s' for rate in rates.values())
+              + f"{fastest / rates['json']:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
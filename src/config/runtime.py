@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+from config import settings as defaults
+from config.settings import SETTINGS_FILE, SETTINGS_WATCH_INTERVAL, EXCHANGE_FEE_RATES
+from utils.event_bus import event_bus
+from utils.logger import logger
+
+try:
+    import yaml
+except ImportError:  # optional: without PyYAML only env vars and overrides apply
+    yaml = None
+
+VENUES = tuple(EXCHANGE_FEE_RATES)
+
+
+class SettingsError(ValueError):
+    """Raised with every problem found when settings fail validation."""
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+class Setting:
+    """Type, bounds and scope of one tunable parameter."""
+    __slots__ = ('kind', 'minimum', 'maximum', 'per_symbol')
+
+    def __init__(self, kind, minimum=None, maximum=None, per_symbol=False):
+        self.kind = kind
+        self.minimum = minimum
+        self.maximum = maximum
+        self.per_symbol = per_symbol
+
+    def _number(self, name, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"{name} must be a number, got {value!r}")
+        number = float(value)
+        if self.kind is int:
+            if number != int(number):
+                raise ValueError(f"{name} must be a whole number, got {value!r}")
+            number = int(number)
+        if self.minimum is not None and number < self.minimum:
+            raise ValueError(f"{name} must be at least {self.minimum}, got {number}")
+        if self.maximum is not None and number > self.maximum:
+            raise ValueError(f"{name} must be at most {self.maximum}, got {number}")
+        return number
+
+    def coerce(self, name, value):
+        if self.kind is dict:
+            # Per-venue amounts; env vars carry them as JSON
+            if isinstance(value, str):
+                value = json.loads(value)
+            if not isinstance(value, dict) or set(value) != set(VENUES):
+                raise ValueError(f"{name} needs a value for each of {', '.join(VENUES)}")
+            return {venue: self._number(f'{name}[{venue}]', amount) for venue, amount in value.items()}
+        return self._number(name, value)
+
+
+# Everything here can change at runtime; the rest of config.settings is fixed at startup
+SCHEMA = {
+    'TRADING_INTERVAL': Setting(int, minimum=1),
+    'TRADING_CAPITAL': Setting(float, minimum=0, per_symbol=True),
+    'ALLOCATION_PERCENTAGE': Setting(float, minimum=0, maximum=100, per_symbol=True),
+    'STOP_LOSS_THRESHOLD': Setting(float, maximum=0, per_symbol=True),
+    'ARBITRAGE_THRESHOLD': Setting(float, minimum=0, per_symbol=True),
+    'SPREAD_Z_ENTRY': Setting(float, minimum=0, per_symbol=True),
+    'SPREAD_QUANTILE': Setting(float, minimum=0, maximum=1, per_symbol=True),
+    'SPREAD_MIN_EDGE': Setting(float, minimum=0, per_symbol=True),
+    'MIN_NOTIONAL': Setting(dict, minimum=0, per_symbol=True),
+    'MAX_NOTIONAL': Setting(dict, minimum=0, per_symbol=True),
+    'RISK_DAILY_LOSS_LIMIT': Setting(float, minimum=0),
+    'RISK_MAX_OPEN_NOTIONAL': Setting(dict, minimum=0),
+    'RISK_MAX_ORDERS_PER_MINUTE': Setting(int, minimum=1),
+    'RISK_MAX_CONSECUTIVE_FAILURES': Setting(int, minimum=1),
+    'RISK_MAX_QUOTE_AGE': Setting(float, minimum=0),
+}
+
+
+class RuntimeSettings:
+    """
+    Typed trading parameters that can change while the bot runs.
+
+    Values are layered, later layers winning: the defaults in
+    config.settings, the YAML file at SETTINGS_FILE (top-level keys plus a
+    `symbols:` section of per-symbol overrides), environment variables of
+    the same name, and overrides set at runtime through update() (the
+    admin endpoint or --trading-interval). Every layer is validated against
+    SCHEMA before anything is applied, so a bad edit is rejected as a whole
+    and the previous values stay in force.
+
+    Readers call get() whenever they need a value, which is two dict
+    lookups, instead of importing a constant; components that hold their
+    own copies register with subscribe() and are called with the names
+    that changed. Each change is also published on the event bus as
+    'settings'.
+
+    Methods
+    -------
+    get(name, symbol=None):
+        The value for a symbol, falling back to the global value.
+    reload():
+        Re-reads the file and environment; returns the names that changed.
+    update(changes, symbol=None):
+        Validates and applies runtime overrides.
+    reset():
+        Drops every runtime override.
+    validate(changes, symbol=None):
+        Coerces changes to their types, raising SettingsError.
+    subscribe(callback):
+        Calls callback(settings, changed_names) after every change.
+    start_watcher(interval=SETTINGS_WATCH_INTERVAL):
+        Reloads whenever the settings file's modification time changes.
+    snapshot():
+        Current global values and per-symbol overrides.
+    """
+    def __init__(self, path=SETTINGS_FILE, events=event_bus, environ=os.environ):
+        self.path = path
+        self.events = events
+        self.environ = environ
+        self._overrides = {}
+        self._symbol_overrides = {}
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._file_mtime = None
+        self._watcher = None
+        self._file_data = self._read_file()
+        self._values, self._symbols = self._resolve(self._file_data, {}, {})
+
+    def validate(self, changes, symbol=None):
+        values, errors = {}, []
+        if symbol is not None and symbol not in defaults.TRADING_SYMBOLS:
+            # A mistyped pair would otherwise validate and then never be read
+            errors.append(f"{symbol} is not one of TRADING_SYMBOLS ({', '.join(defaults.TRADING_SYMBOLS)})")
+        for name, value in changes.items():
+            name = name.upper()
+            setting = SCHEMA.get(name)
+            if setting is None:
+                errors.append(f"{name} is not a runtime setting")
+            elif symbol is not None and not setting.per_symbol:
+                errors.append(f"{name} cannot be set per symbol")
+            else:
+                try:
+                    values[name] = setting.coerce(name, value)
+                except (TypeError, ValueError) as e:
+                    errors.append(str(e))
+        if errors:
+            raise SettingsError(errors)
+        return values
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        if yaml is None:
+            logger.warning(f"⚠️ PyYAML is not installed; ignoring {self.path}")
+            return {}
+        self._file_mtime = os.path.getmtime(self.path)
+        with open(self.path) as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise SettingsError([f"{self.path} must contain a mapping"])
+        return data
+
+    def _resolve(self, file_data, overrides, symbol_overrides):
+        """Validates every layer; returns (global values, per-symbol values)"""
+        file_data = dict(file_data)
+        file_symbols = file_data.pop('symbols', None) or {}
+        values = {name: getattr(defaults, name) for name in SCHEMA}
+        values.update(self.validate(file_data))
+        values.update(self.validate({name: self.environ[name] for name in SCHEMA if name in self.environ}))
+        values.update(overrides)
+        symbols = {}
+        for symbol in set(file_symbols) | set(symbol_overrides):
+            symbols[symbol] = dict(self.validate(file_symbols.get(symbol) or {}, symbol=symbol),
+                                   **symbol_overrides.get(symbol, {}))
+        return values, symbols
+
+    def _rebuild(self, overrides, symbol_overrides, source, reread=False):
+        try:
+            # Overrides are applied on top of the last file contents that were accepted
+            file_data = self._read_file() if reread else self._file_data
+            values, symbols = self._resolve(file_data, overrides, symbol_overrides)
+        except SettingsError as e:
+            logger.error(f"❌ Settings from {source} rejected, keeping current values: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Settings from {source} rejected, keeping current values: {e}")
+            raise SettingsError([str(e)])
+        self._file_data, self._overrides, self._symbol_overrides = file_data, overrides, symbol_overrides
+
+        changed = {name for name in SCHEMA if values[name] != self._values[name]}
+        for symbol in set(symbols) | set(self._symbols):
+            old, new = self._symbols.get(symbol, {}), symbols.get(symbol, {})
+            changed.update(name for name in set(old) | set(new) if old.get(name) != new.get(name))
+        # Readers see either the old or the new set of values, never a mix
+        self._values, self._symbols = values, symbols
+        if not changed:
+            return changed
+        logger.info(f"⚙️ Settings updated from {source}: {', '.join(sorted(changed))}")
+        for callback in list(self._listeners):
+            try:
+                callback(self, changed)
+            except Exception as e:
+                logger.error(f"Error applying settings change: {e}")
+        self.events.publish('settings', self.snapshot())
+        return changed
+
+    def get(self, name, symbol=None):
+        if symbol is not None:
+            overrides = self._symbols.get(symbol)
+            if overrides is not None and name in overrides:
+                return overrides[name]
+        return self._values[name]
+
+    @property
+    def symbols(self):
+        """Symbols that have overrides of their own"""
+        return list(self._symbols)
+
+    def __getattr__(self, name):
+        if name in SCHEMA:
+            return self._values[name]
+        raise AttributeError(name)
+
+    def reload(self):
+        with self._lock:
+            return self._rebuild(self._overrides, self._symbol_overrides, self.path, reread=True)
+
+    def update(self, changes, symbol=None, source='runtime override'):
+        with self._lock:
+            changes = self.validate(changes, symbol)
+            overrides = dict(self._overrides)
+            symbol_overrides = {key: dict(values) for key, values in self._symbol_overrides.items()}
+            if symbol is None:
+                overrides.update(changes)
+            else:
+                symbol_overrides.setdefault(symbol, {}).update(changes)
+            return self._rebuild(overrides, symbol_overrides, source)
+
+    def reset(self):
+        with self._lock:
+            return self._rebuild({}, {}, 'reset')
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def start_watcher(self, interval=SETTINGS_WATCH_INTERVAL):
+        if self._watcher is not None or not self.path:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='settings-watcher', daemon=True)
+        self._watcher.start()
+        logger.info(f"👀 Watching {self.path} for settings changes")
+
+    def _watch(self, interval):
+        stop = threading.Event()
+        while not stop.wait(interval):
+            try:
+                mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+            except OSError:
+                continue
+            if mtime != self._file_mtime:
+                self._file_mtime = mtime
+                try:
+                    self.reload()
+                except SettingsError:
+                    pass
+
+    def snapshot(self):
+        return {'settings': dict(self._values), 'symbols': {symbol: dict(values)
+                                                            for symbol, values in self._symbols.items()},
+                'overrides': dict(self._overrides), 'file': self.path}
+
+
+runtime_settings = RuntimeSettings()
@@ -20,6 +20,12 @@ KUCOIN_API_PASSPHRASE = get_env_var('KUCOIN_API_PASSPHRASE')
 
 # Dashboard configuration
 DASHBOARD_SECRET_KEY = get_env_var('DASHBOARD_SECRET_KEY', 'supersecret')
+DASHBOARD_CACHE_SECONDS = 30  # how long dashboard views share one metrics/trades query
+SSE_HEARTBEAT_SECONDS = 15  # keep-alive comment interval on /stream
+ENGINE_SOCKET_PATH = get_env_var('ENGINE_SOCKET_PATH', '/tmp/crypto_arbitrage_engine.sock')
+USER_CACHE_TTL = 300  # seconds a logged-in user is served from memory before re-reading SQLite
+USER_CACHE_SIZE = 1024  # users kept in the LRU
+ANALYTICS_CURVE_POINTS = 500  # equity-curve points kept for /api/analytics, however many trades
 
 # Trading parameters - Increased intervals for testing
 TRADING_CAPITAL = 50
@@ -28,7 +34,127 @@ ARBITRAGE_THRESHOLD = 10
 STOP_LOSS_THRESHOLD = -5
 TRADING_INTERVAL = 10  # 10 seconds instead of 5 seconds for testing
 
+# Adaptive opportunity threshold (replaces ARBITRAGE_THRESHOLD once warmed up)
+SPREAD_EWMA_ALPHA = 0.05  # weight of the newest spread in the rolling mean/variance
+SPREAD_WINDOW = 500  # spreads kept for the rolling quantile
+SPREAD_Z_ENTRY = 2.0  # trade spreads at least this many std devs above the mean
+SPREAD_QUANTILE = 0.95  # ...and above this quantile of recent spreads
+SPREAD_MIN_EDGE = 0.0005  # required edge on top of round-trip fees (0.05%)
+SPREAD_MIN_SAMPLES = 30  # use the fixed threshold until this many spreads were seen
+
+# Multi-venue opportunity engine
+TRADING_SYMBOLS = get_env_var('TRADING_SYMBOLS', 'BTC/USDT').split(',')
+EXCHANGE_FEE_RATES = {
+    'binance': 0.001,  # 0.1% taker fee
+    'kucoin': 0.001,   # 0.1% taker fee
+}
+TOP_ROUTES = 5
+QUOTE_HISTORY_SIZE = 100000  # recent quotes kept in memory (~28 bytes each)
+
+# Single-venue triangular arbitrage
+TRIANGULAR_START_CURRENCY = 'USDT'
+TRIANGULAR_CURRENCIES = get_env_var('TRIANGULAR_CURRENCIES', 'USDT,BTC,ETH,KCS,USDC,SOL,XRP').split(',')
+TRIANGULAR_MIN_EDGE = 0.0005  # 0.05% net of fees
+
+# Inventory tracking and rebalancing
+# Base and quote assets of every traded symbol; these are also the ones rebalanced
+TRADED_ASSETS = list(dict.fromkeys(asset for symbol in TRADING_SYMBOLS for asset in symbol.split('/')))
+INVENTORY_ASSETS = TRADED_ASSETS + [currency for currency in TRIANGULAR_CURRENCIES if currency not in TRADED_ASSETS]
+INVENTORY_RESYNC_INTERVAL = 3600  # re-seed tracked balances from the exchanges hourly
+WITHDRAWAL_FEES = {
+    'binance': {'BTC': 0.0002, 'USDT': 1.0},
+    'kucoin': {'BTC': 0.0005, 'USDT': 1.0},
+}
+TRANSFER_TIMES = {'BTC': 1800, 'USDT': 600}  # typical seconds until a withdrawal is credited
+REBALANCE_TRIGGER_RATIO = 0.25  # rebalance when a venue holds < 25% of its target share
+
+# Depth-based position sizing
+ORDER_BOOK_DEPTH = 20
+MIN_NOTIONAL = {'binance': 5.0, 'kucoin': 1.0}  # exchange minimum order value in USDT
+MAX_NOTIONAL = {'binance': 5000.0, 'kucoin': 5000.0}  # our per-order cap in USDT
+QUANTITY_STEP = {  # lot size per symbol and venue, used until the exchange's own filters are loaded
+    'BTC/USDT': {'binance': 0.00001, 'kucoin': 0.00000001},
+    'ETH/USDT': {'binance': 0.0001, 'kucoin': 0.0000001},
+    'SOL/USDT': {'binance': 0.001, 'kucoin': 0.0001},
+}
+DEFAULT_QUANTITY_STEP = 0.00000001  # for symbols not listed; orders are still rounded by the exchange filters
+
+# Market-data decoding: 'msgspec' (typed structs), 'orjson', 'json', or 'sdk' to
+# let python-binance / ccxt fetch and decode as before
+JSON_DECODER = get_env_var('JSON_DECODER', 'msgspec')
+
+# Multiprocess sharded scanning
+SCANNER_WORKERS = int(get_env_var('SCANNER_WORKERS', os.cpu_count() or 1))
+SCANNER_INTERVAL = 1.0  # seconds between quote sweeps in each worker
+SCANNER_MIN_EDGE = 0.0005  # only candidates above 0.05% net of fees are pushed
+SCANNER_MAX_CANDIDATE_AGE = 2.0  # drop candidates older than this many seconds
+
+# Exchange clock synchronization
+TIME_SYNC_INTERVAL = 300  # seconds between clock offset measurements
+TIME_SYNC_BURST = 4  # server-time samples per measurement; the lowest-RTT one wins
+
+# Exchange call resilience
+EXCHANGE_DEADLINES = {  # seconds before a call is abandoned, per handler endpoint
+    'default': 5.0,
+    'book_ticker': 1.5,
+    'order_book': 2.0,
+    'tickers': 3.0,
+    'place_order': 10.0,  # HTTP timeout only: order writes are never abandoned while in flight
+    'klines': 10.0,
+    'agg_trades': 10.0,
+}
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before an endpoint fails fast
+CIRCUIT_RESET_TIMEOUT = 30  # seconds an open circuit waits before letting one probe through
+HEDGE_QUANTILE = 0.95  # duplicate an idempotent read once it is slower than this latency quantile
+HEDGE_MIN_SAMPLES = 20  # latencies needed before hedging starts
+LATENCY_WINDOW = 200  # recent latencies kept per endpoint
+
+# Risk limits and kill switch (STOP_LOSS_THRESHOLD still applies per trade)
+RISK_DAILY_LOSS_LIMIT = 10.0  # realized loss in USDT since local midnight that halts trading
+RISK_MAX_OPEN_NOTIONAL = {'binance': 1000.0, 'kucoin': 1000.0}  # USDT in orders not yet final, per venue
+RISK_MAX_ORDERS_PER_MINUTE = 60
+RISK_MAX_CONSECUTIVE_FAILURES = 3  # failed executions in a row that halt trading
+RISK_MAX_QUOTE_AGE = 3.0  # seconds between fetching prices and sending orders
+
+# Order tracking
+ORDER_POLL_INTERVAL = 0.5  # seconds between batched open-order polls
+ORDER_FILL_TIMEOUT = 10  # stop waiting for fills after this many seconds
+
+# Write-ahead journal of in-flight trades (utils/journal.py), replayed on startup
+JOURNAL_FSYNC_INTERVAL = 0.05  # seconds between batched fsyncs; records reach the OS immediately
+
+# Paper trading: --dry-run trades against simulated venues fed by live order books
+PAPER_BALANCES = {  # covers TRADING_SYMBOLS' defaults and, on KuCoin, TRIANGULAR_CURRENCIES
+    'binance': {'BTC': 0.1, 'USDT': 10000.0, 'ETH': 2.0, 'SOL': 40.0},
+    'kucoin': {'BTC': 0.1, 'USDT': 10000.0, 'ETH': 2.0, 'SOL': 40.0, 'KCS': 500.0, 'USDC': 10000.0,
+               'XRP': 5000.0},
+}
+PAPER_LATENCY = {'binance': 0.05, 'kucoin': 0.1}  # seconds from order placement to matching
+
+# Parquet archival of closed years and quote history
+PARQUET_COMPRESSION = 'zstd'
+PARQUET_ROW_GROUP_SIZE = 65536  # rows per row group; smaller groups let time filters skip more
+ARCHIVE_KEEP_YEARS = 5  # yearly SQLite files older than this move to db/archive after export
+
+# Historical market data cache (utils/history.py and --fetch-history)
+HISTORY_WORKERS = 4  # chunks downloaded in parallel
+HISTORY_KLINE_CHUNK = 1000  # candles per cached chunk, one request on either venue
+HISTORY_TRADE_CHUNK = 3600  # seconds of aggregate trades per cached chunk (Binance's maximum window)
+
 # Logging configuration
 LOG_LEVEL = get_env_var('LOG_LEVEL', 'INFO')
 LOG_FILE = get_env_var('LOG_FILE', 'crypto_arbitrage_bot.log')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Runtime settings (config/runtime.py): the trading parameters above that config.runtime.SCHEMA
+# lists can be overridden from this YAML file or env vars of the same name, and change while running
+SETTINGS_FILE = get_env_var('SETTINGS_FILE', os.path.join(os.path.dirname(__file__), '../../settings.yaml'))
+SETTINGS_WATCH_INTERVAL = 2  # seconds between checks of the settings file's modification time
+
+# Runtime profiling (--profile, --trace-memory and /admin/profile)
+PROFILE_DIR = get_env_var('PROFILE_DIR', os.path.dirname(LOG_FILE) or 'logs')
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 600
+# Dashboard users allowed to use admin endpoints; empty locks them for everyone
+ADMIN_USERS = [name.strip() for name in get_env_var('ADMIN_USERS', '').split(',') if name.strip()]
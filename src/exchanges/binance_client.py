@@ -1,7 +1,21 @@
+import time
 from binance.client import Client
-from config.settings import BINANCE_API_KEY, BINANCE_API_SECRET
+from binance.exceptions import BinanceAPIException
+from config.settings import BINANCE_API_KEY, BINANCE_API_SECRET, JSON_DECODER, MIN_NOTIONAL
+from exchanges.decoders import create_decoder
+from exchanges.order_templates import OrderTemplate, lot_step
+from exchanges.resilience import ResilientCaller
+from utils.records import Quote, Order
+from utils.time_sync import time_sync
 from utils.logger import logger
 
+
+def _is_rejection(error):
+    """Binance answered and refused the request (a 4xx other than rate limiting)"""
+    return (isinstance(error, BinanceAPIException) and 400 <= error.status_code < 500
+            and error.status_code not in (418, 429))
+
+
 class BinanceHandler:
     """
     A handler class for interacting with the Binance exchange API.
@@ -14,11 +28,50 @@ class BinanceHandler:
     get_btc_price():
         Fetches the current price of BTC in USDT from Binance.
 
+    get_server_time():
+        Fetches Binance's server time in milliseconds.
+
+    apply_clock_offset(offset):
+        Makes signed requests use Binance's clock.
+
+    get_best_bid_ask(symbol='BTC/USDT'):
+        Fetches the best bid and ask for a symbol from Binance as a Quote.
+
+    get_order_book(symbol='BTC/USDT', limit=20):
+        Fetches the top order book levels as ([[price, qty], ...] bids, asks).
+
+    get_klines(symbol, interval, start, end):
+        Fetches candles opening in [start, end) milliseconds as
+        (open_time, open, high, low, close, volume) tuples.
+
+    get_agg_trades(symbol, start, end):
+        Fetches aggregate trades in [start, end) milliseconds as
+        (time, price, quantity, buyer_is_maker) tuples.
+
     check_balance():
         Checks the BTC balance in the Binance account.
 
-    place_sell_order(symbol, quantity):
-        Places a market sell order on Binance for a given symbol and quantity.
+    check_asset_balance(asset):
+        Checks the free balance of any asset in the Binance account.
+
+    get_open_orders():
+        Fetches every open order across all symbols in one request.
+
+    fetch_order(symbol, order_id):
+        Fetches the current state of one order.
+
+    find_order(symbol, client_order_id):
+        Fetches an order by the client order id it was sent with, or None.
+
+    place_sell_order(symbol, quantity, client_order_id=None):
+        Places a market sell order on Binance for a given symbol and quantity
+        and returns it as an Order.
+
+    order_template(symbol, side):
+        Pre-built, pre-validated market order template, cached per symbol and side.
+
+    submit_order(template, quantity, price, client_order_id=None):
+        Fast path: fills in, signs and sends a template; logs only once it is sent.
     """
     def __init__(self):
         try:
@@ -29,6 +82,9 @@ class BinanceHandler:
         except Exception as e:
             logger.error(f"Error initializing Binance client: {e}")
             self.client = None
+        self.decoder = create_decoder(JSON_DECODER)
+        self.api = ResilientCaller('binance', is_rejection=_is_rejection)
+        self._templates = {}
 
     def _check_client(self):
         """Check if client is available"""
@@ -42,18 +98,124 @@ class BinanceHandler:
             return None
             
         try:
-            ticker = self.client.get_symbol_ticker(symbol='BTCUSDT')
+            ticker = self.api.call('ticker', self.client.get_symbol_ticker, symbol='BTCUSDT', hedge=True)
             return float(ticker['price'])
         except Exception as e:
             logger.error(f"Error fetching Binance BTC price: {e}")
             return None
 
+    def get_server_time(self):
+        """Binance server time in milliseconds"""
+        if not self._check_client():
+            return None
+
+        try:
+            return self.api.call('server_time', self.client.get_server_time)['serverTime']
+        except Exception as e:
+            logger.error(f"Error fetching Binance server time: {e}")
+            return None
+
+    def apply_clock_offset(self, offset):
+        """Sign requests with Binance's clock: offset is server minus local time in seconds"""
+        if self.client is not None:
+            self.client.timestamp_offset = int(offset * 1000)
+
+    @staticmethod
+    def to_exchange_symbol(symbol):
+        """Convert a unified 'BASE/QUOTE' symbol to Binance's 'BASEQUOTE' form"""
+        return symbol.replace('/', '')
+
+    def _get_public(self, path, **params):
+        """GET a public REST endpoint on the client's session and return the raw body"""
+        response = self.client.session.get(self.client._create_api_uri(path, signed=False),
+                                           params=params, timeout=10)
+        response.raise_for_status()
+        return response.content
+
+    def get_best_bid_ask(self, symbol='BTC/USDT'):
+        if not self._check_client():
+            return None
+
+        try:
+            if self.decoder is not None:
+                bid, ask = self.decoder.book_ticker(self.api.call(
+                    'book_ticker', self._get_public, 'ticker/bookTicker',
+                    symbol=self.to_exchange_symbol(symbol), hedge=True))
+                return Quote('binance', symbol, bid, ask)
+            ticker = self.api.call('book_ticker', self.client.get_orderbook_ticker,
+                                   symbol=self.to_exchange_symbol(symbol), hedge=True)
+            return Quote('binance', symbol, float(ticker['bidPrice']), float(ticker['askPrice']))
+        except Exception as e:
+            logger.error(f"Error fetching Binance {symbol} bid/ask: {e}")
+            return None
+
+    def get_order_book(self, symbol='BTC/USDT', limit=20):
+        if not self._check_client():
+            return None
+
+        try:
+            if self.decoder is not None:
+                return self.decoder.depth(self.api.call(
+                    'order_book', self._get_public, 'depth',
+                    symbol=self.to_exchange_symbol(symbol), limit=limit, hedge=True))
+            book = self.api.call('order_book', self.client.get_order_book,
+                                 symbol=self.to_exchange_symbol(symbol), limit=limit, hedge=True)
+            bids = [[float(price), float(qty)] for price, qty in book['bids']]
+            asks = [[float(price), float(qty)] for price, qty in book['asks']]
+            return bids, asks
+        except Exception as e:
+            logger.error(f"Error fetching Binance {symbol} order book: {e}")
+            return None
+
+    def get_klines(self, symbol, interval, start, end):
+        if not self._check_client():
+            return None
+
+        try:
+            candles = []
+            while start < end:
+                page = self.api.call('klines', self.client.get_klines, symbol=self.to_exchange_symbol(symbol),
+                                     interval=interval, startTime=start, endTime=end - 1, limit=1000)
+                candles.extend((row[0], float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+                               for row in page)
+                if len(page) < 1000:
+                    break
+                # Continue after the last candle's close time
+                start = page[-1][6] + 1
+            return candles
+        except Exception as e:
+            logger.error(f"Error fetching Binance {symbol} {interval} klines: {e}")
+            return None
+
+    def get_agg_trades(self, symbol, start, end):
+        """Aggregate trades; Binance only accepts time windows of up to an hour"""
+        if not self._check_client():
+            return None
+
+        try:
+            trades = []
+            page = self.api.call('agg_trades', self.client.get_aggregate_trades,
+                                 symbol=self.to_exchange_symbol(symbol), startTime=start,
+                                 endTime=min(end, start + 3600000) - 1, limit=1000)
+            while page:
+                trades.extend((row['T'], float(row['p']), float(row['q']), row['m'])
+                              for row in page if row['T'] < end)
+                if len(page) < 1000 or page[-1]['T'] >= end:
+                    break
+                # Later pages follow trade ids, so trades sharing a millisecond are not skipped
+                page = self.api.call('agg_trades', self.client.get_aggregate_trades,
+                                     symbol=self.to_exchange_symbol(symbol), fromId=page[-1]['a'] + 1, limit=1000)
+            return trades
+        except Exception as e:
+            logger.error(f"Error fetching Binance {symbol} aggregate trades: {e}")
+            return None
+
     def check_balance(self):
         if not self._check_client():
             return 0.0
             
         try:
-            account_info = self.client.get_account()
+            account_info = self.api.call('account', self.client.get_account)
             btc_balance = next((item for item in account_info['balances'] 
                               if item['asset'] == 'BTC'), None)
             return float(btc_balance['free']) if btc_balance else 0.0
@@ -66,7 +228,7 @@ class BinanceHandler:
             return 0.0
             
         try:
-            account_info = self.client.get_account()
+            account_info = self.api.call('account', self.client.get_account)
             usdt_balance = next((item for item in account_info['balances'] 
                               if item['asset'] == 'USDT'), None)
             return float(usdt_balance['free']) if usdt_balance else 0.0
@@ -74,36 +236,161 @@ class BinanceHandler:
             logger.error(f"Error fetching Binance USDT balance: {e}")
             return 0.0
 
-    def place_sell_order(self, symbol, quantity):
+    def check_asset_balance(self, asset):
+        if not self._check_client():
+            return 0.0
+
+        try:
+            account_info = self.api.call('account', self.client.get_account)
+            balance = next((item for item in account_info['balances']
+                            if item['asset'] == asset), None)
+            return float(balance['free']) if balance else 0.0
+        except Exception as e:
+            logger.error(f"Error fetching Binance {asset} balance: {e}")
+            return 0.0
+
+    # Binance order statuses mapped onto the normalized ones in utils.records
+    ORDER_STATUSES = {'NEW': 'open', 'PARTIALLY_FILLED': 'open', 'PENDING_NEW': 'open',
+                      'FILLED': 'closed', 'CANCELED': 'canceled', 'PENDING_CANCEL': 'canceled',
+                      'REJECTED': 'rejected', 'EXPIRED': 'expired', 'EXPIRED_IN_MATCH': 'expired'}
+
+    @classmethod
+    def _to_order(cls, response, symbol=None, side=None, quantity=None):
+        filled = float(response.get('executedQty') or 0)
+        quote_filled = float(response.get('cummulativeQuoteQty') or 0)
+        # Only FULL order responses carry fills; status queries leave the fee unknown
+        fills = response.get('fills') or []
+        fee_asset = fills[0]['commissionAsset'] if fills else None
+        fee = sum(float(fill['commission']) for fill in fills if fill['commissionAsset'] == fee_asset) if fills else None
+        timestamp = response.get('transactTime') or response.get('updateTime')
+        return Order('binance', symbol or response.get('symbol'), side or response.get('side', '').lower(),
+                     quantity if quantity is not None else float(response.get('origQty') or 0),
+                     order_id=response.get('orderId'), status=cls.ORDER_STATUSES.get(response.get('status')),
+                     filled=filled, average_price=quote_filled / filled if filled else None,
+                     fee=fee, fee_asset=fee_asset,
+                     timestamp=time_sync.to_local('binance', timestamp) if timestamp else None)
+
+    def get_open_orders(self):
+        """All open orders on every symbol, in one request"""
+        if not self._check_client():
+            return None
+
+        try:
+            return [self._to_order(order) for order in self.api.call('open_orders', self.client.get_open_orders)]
+        except Exception as e:
+            logger.error(f"Error fetching Binance open orders: {e}")
+            return None
+
+    def fetch_order(self, symbol, order_id):
+        if not self._check_client():
+            return None
+
+        try:
+            order = self.api.call('fetch_order', self.client.get_order, symbol=symbol, orderId=order_id)
+            return self._to_order(order, symbol)
+        except Exception as e:
+            logger.error(f"Error fetching Binance order {order_id}: {e}")
+            return None
+
+    def find_order(self, symbol, client_order_id):
+        if not self._check_client():
+            return None
+
+        try:
+            order = self.api.call('fetch_order', self.client.get_order, symbol=self.to_exchange_symbol(symbol),
+                                  origClientOrderId=client_order_id)
+            return self._to_order(order, self.to_exchange_symbol(symbol))
+        except Exception as e:
+            logger.warning(f"No Binance order found for client order id {client_order_id}: {e}")
+            return None
+
+    def place_sell_order(self, symbol, quantity, client_order_id=None):
         if not self._check_client():
             return None
             
         try:
-            order = self.client.create_order(
+            params = {'newClientOrderId': client_order_id} if client_order_id else {}
+            order = self.api.call(
+                'place_order', self.client.create_order,
                 symbol=symbol,
                 side='SELL',
                 type='MARKET',
-                quantity=quantity
+                quantity=quantity,
+                abandon=False,
+                **params
             )
             logger.info(f"Sell order placed on Binance: {order}")
-            return order
+            return self._to_order(order, symbol, 'sell', quantity)
         except Exception as e:
             logger.error(f"Error placing sell order on Binance: {e}")
             return None
 
-    def place_buy_order(self, symbol, quantity):
+    def place_buy_order(self, symbol, quantity, client_order_id=None):
         if not self._check_client():
             return None
             
         try:
-            order = self.client.create_order(
+            params = {'newClientOrderId': client_order_id} if client_order_id else {}
+            order = self.api.call(
+                'place_order', self.client.create_order,
                 symbol=symbol,
                 side='BUY',
                 type='MARKET',
-                quantity=quantity
+                quantity=quantity,
+                abandon=False,
+                **params
             )
             logger.info(f"Buy order placed on Binance: {order}")
-            return order
+            return self._to_order(order, symbol, 'buy', quantity)
         except Exception as e:
             logger.error(f"Error placing buy order on Binance: {e}")
             return None
+
+    def order_template(self, symbol, side):
+        """Market order template for a unified symbol and side, built on first use"""
+        template = self._templates.get((symbol, side))
+        if template is None and self._check_client():
+            try:
+                template = self._templates[(symbol, side)] = self._build_template(symbol, side)
+            except Exception as e:
+                logger.error(f"Error preparing Binance {side} order template for {symbol}: {e}")
+        return template
+
+    def _build_template(self, symbol, side):
+        exchange_symbol = self.to_exchange_symbol(symbol)
+        info = self.api.call('exchange_info', self.client.get_symbol_info, exchange_symbol)
+        filters = {item['filterType']: item for item in info['filters']}
+        lot = filters.get('LOT_SIZE', {})
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+        prefix = f'symbol={exchange_symbol}&side={side.upper()}&type=MARKET&newOrderRespType=FULL'
+        if self.client.REQUEST_RECVWINDOW:
+            prefix += f'&recvWindow={self.client.REQUEST_RECVWINDOW}'
+        return OrderTemplate('binance', exchange_symbol, side, self.client._create_api_uri('order', signed=True),
+                             BINANCE_API_SECRET, lot.get('stepSize', lot_step(symbol, 'binance')),
+                             min_qty=float(lot.get('minQty', 0)),
+                             min_notional=float(notional.get('minNotional', MIN_NOTIONAL['binance'])),
+                             prefix=prefix, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def submit_order(self, template, quantity, price, client_order_id=None):
+        quantity, wire_quantity = template.quantize(quantity)
+        problem = template.rejects(quantity, price)
+        if problem is not None:
+            logger.error(f"Binance {template.side} order not sent: {problem}")
+            return None
+
+        try:
+            timestamp = int(time.time() * 1000 + self.client.timestamp_offset)
+            query = f'{template.prefix}&quantity={wire_quantity}'
+            if client_order_id:
+                query += f'&newClientOrderId={client_order_id}'
+            query += f'&timestamp={timestamp}'
+            body = f'{query}&signature={template.sign(query).hexdigest()}'
+            response = self.api.call('place_order', self.client.session.post, template.url, data=body,
+                                     headers=template.headers, timeout=self.api.deadline('place_order'),
+                                     abandon=False)
+            order = self.client._handle_response(response)
+        except Exception as e:
+            logger.error(f"Error placing {template.side} order on Binance: {e}")
+            return None
+        logger.info(f"{template.side.capitalize()} order placed on Binance: {order}")
+        return self._to_order(order, template.symbol, template.side, quantity)
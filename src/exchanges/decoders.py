@@ -0,0 +1,151 @@
+import json
+from typing import List, Optional, Tuple
+from utils.logger import logger
+
+try:
+    import msgspec
+except ImportError:  # optional: falls back to orjson / json
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to json
+    orjson = None
+
+DECODER_BACKENDS = ('msgspec', 'orjson', 'json')
+
+
+if msgspec is not None:
+    # Only the fields we read are declared; msgspec skips everything else
+    # without allocating it, and strict=False parses the exchanges' string
+    # prices straight into floats.
+    Level = Tuple[float, float]
+
+    class BinanceBookTicker(msgspec.Struct):
+        bidPrice: float
+        askPrice: float
+
+    class BinanceDepth(msgspec.Struct):
+        bids: List[Level]
+        asks: List[Level]
+
+    class KuCoinLevel1(msgspec.Struct):
+        bestBid: float
+        bestAsk: float
+        time: int = 0
+
+    class KuCoinLevel1Response(msgspec.Struct):
+        data: KuCoinLevel1
+
+    class KuCoinDepth(msgspec.Struct):
+        bids: List[Level]
+        asks: List[Level]
+
+    class KuCoinDepthResponse(msgspec.Struct):
+        data: KuCoinDepth
+
+    class KuCoinTicker(msgspec.Struct):
+        symbol: str
+        buy: Optional[float] = None
+        sell: Optional[float] = None
+
+    class KuCoinTickers(msgspec.Struct):
+        ticker: List[KuCoinTicker]
+
+    class KuCoinTickersResponse(msgspec.Struct):
+        data: KuCoinTickers
+
+
+class MarketDataDecoder:
+    """
+    Decodes raw market-data response bodies into the tuples the handlers return.
+
+    The 'msgspec' backend decodes into typed structs that declare only the
+    fields we use, so the rest of each payload (and the intermediate dict
+    tree) is never built. 'orjson' and 'json' parse to dicts and convert with
+    float() like the SDK path. A missing backend falls back to the next one.
+
+    Methods
+    -------
+    book_ticker(raw):
+        Binance /api/v3/ticker/bookTicker -> (bid, ask).
+    depth(raw):
+        Binance /api/v3/depth -> (bids, asks) as [(price, qty), ...].
+    kucoin_level1(raw):
+        KuCoin /api/v1/market/orderbook/level1 -> (bid, ask, exchange time in ms).
+    kucoin_depth(raw):
+        KuCoin /api/v1/market/orderbook/level2_20 -> (bids, asks).
+    kucoin_tickers(raw):
+        KuCoin /api/v1/market/allTickers -> {'BASE/QUOTE': (bid, ask)}.
+    """
+    def __init__(self, backend='msgspec'):
+        if backend not in DECODER_BACKENDS:
+            raise ValueError(f"Unknown JSON decoder '{backend}', expected one of {DECODER_BACKENDS}")
+        if backend == 'msgspec' and msgspec is None:
+            logger.warning("⚠️ msgspec not installed, falling back to orjson")
+            backend = 'orjson'
+        if backend == 'orjson' and orjson is None:
+            logger.warning("⚠️ orjson not installed, falling back to json")
+            backend = 'json'
+        self.backend = backend
+        self._loads = orjson.loads if backend == 'orjson' else json.loads
+
+        if backend == 'msgspec':
+            self._decoders = {
+                'book_ticker': msgspec.json.Decoder(BinanceBookTicker, strict=False),
+                'depth': msgspec.json.Decoder(BinanceDepth, strict=False),
+                'kucoin_level1': msgspec.json.Decoder(KuCoinLevel1Response, strict=False),
+                'kucoin_depth': msgspec.json.Decoder(KuCoinDepthResponse, strict=False),
+                'kucoin_tickers': msgspec.json.Decoder(KuCoinTickersResponse, strict=False),
+            }
+
+    @staticmethod
+    def _levels(levels):
+        return [(float(price), float(qty)) for price, qty in levels]
+
+    def book_ticker(self, raw):
+        if self.backend == 'msgspec':
+            ticker = self._decoders['book_ticker'].decode(raw)
+            return ticker.bidPrice, ticker.askPrice
+        ticker = self._loads(raw)
+        return float(ticker['bidPrice']), float(ticker['askPrice'])
+
+    def depth(self, raw):
+        if self.backend == 'msgspec':
+            book = self._decoders['depth'].decode(raw)
+            return book.bids, book.asks
+        book = self._loads(raw)
+        return self._levels(book['bids']), self._levels(book['asks'])
+
+    def kucoin_level1(self, raw):
+        if self.backend == 'msgspec':
+            ticker = self._decoders['kucoin_level1'].decode(raw).data
+            return ticker.bestBid, ticker.bestAsk, ticker.time
+        ticker = self._loads(raw)['data']
+        return float(ticker['bestBid']), float(ticker['bestAsk']), ticker.get('time', 0)
+
+    def kucoin_depth(self, raw):
+        if self.backend == 'msgspec':
+            book = self._decoders['kucoin_depth'].decode(raw).data
+            return book.bids, book.asks
+        book = self._loads(raw)['data']
+        return self._levels(book['bids']), self._levels(book['asks'])
+
+    def kucoin_tickers(self, raw):
+        if self.backend == 'msgspec':
+            tickers = self._decoders['kucoin_tickers'].decode(raw).data.ticker
+            return {ticker.symbol.replace('-', '/'): (ticker.buy, ticker.sell)
+                    for ticker in tickers if ticker.buy and ticker.sell}
+        quotes = {}
+        for ticker in self._loads(raw)['data']['ticker']:
+            bid, ask = float(ticker.get('buy') or 0), float(ticker.get('sell') or 0)
+            if bid and ask:
+                quotes[ticker['symbol'].replace('-', '/')] = (bid, ask)
+        return quotes
+
+
+def create_decoder(backend):
+    """Returns a MarketDataDecoder, or None when backend is 'sdk' (decode inside the exchange SDKs)"""
+    if backend == 'sdk':
+        return None
+    return MarketDataDecoder(backend)
@@ -1,7 +1,24 @@
+import base64
+import hashlib
+import hmac
+import json
+import uuid
 import ccxt
-from config.settings import KUCOIN_API_KEY, KUCOIN_API_SECRET, KUCOIN_API_PASSPHRASE
+from config.settings import (KUCOIN_API_KEY, KUCOIN_API_SECRET, KUCOIN_API_PASSPHRASE, JSON_DECODER,
+                             MIN_NOTIONAL)
+from exchanges.decoders import create_decoder
+from exchanges.order_templates import OrderTemplate, lot_step
+from exchanges.resilience import ResilientCaller
+from utils.records import Quote, Order
+from utils.time_sync import time_sync
 from utils.logger import logger
 
+
+def _is_rejection(error):
+    """KuCoin answered and refused the request; ccxt raises NetworkError subclasses for outages"""
+    return isinstance(error, ccxt.ExchangeError)
+
+
 class KuCoinHandler:
     """
     KuCoinHandler class to interact with KuCoin exchange using ccxt library.
@@ -13,21 +30,66 @@ class KuCoinHandler:
             Returns:
                 float: The last traded price of BTC/USDT.
                 None: If an error occurs while fetching the price.
+        get_server_time:
+            Fetches KuCoin's server time in milliseconds.
+        apply_clock_offset:
+            Makes signed requests use KuCoin's clock.
+        get_best_bid_ask:
+            Fetches the best bid and ask for a symbol from KuCoin.
+            Returns:
+                Quote: The venue, symbol, bid and ask.
+                None: If an error occurs while fetching the quote.
+        get_order_book:
+            Fetches the top order book levels for a symbol.
+            Returns:
+                tuple: ([[price, qty], ...] bids, [[price, qty], ...] asks).
+                None: If an error occurs while fetching the book.
+        get_all_bid_ask:
+            Fetches the best bid and ask for every market in one bulk call.
+            Returns:
+                dict: {symbol: (bid, ask)} for markets with a two-sided quote.
+                None: If an error occurs while fetching the tickers.
+        get_klines:
+            Fetches candles opening in [start, end) milliseconds.
+            Returns:
+                list: (open_time, open, high, low, close, volume) tuples.
+                None: If an error occurs while fetching them.
+            KuCoin has no endpoint for historical trades, so there is no get_agg_trades.
         check_balance:
             Fetches the total BTC balance from KuCoin.
             Returns:
                 float: The total BTC balance.
                 0.0: If an error occurs while fetching the balance.
+        get_open_orders:
+            Fetches every open order across all symbols in one request.
+            Returns:
+                list: Open orders as Order records.
+                None: If an error occurs while fetching them.
+        fetch_order:
+            Fetches the current state of one order.
+            Returns:
+                Order: The order, with its status and fills so far.
+                None: If an error occurs while fetching it.
+        find_order:
+            Fetches an order by the clientOid it was sent with.
+            Returns:
+                Order: The order, with its status and fills so far.
+                None: If no such order exists or it cannot be fetched.
         place_sell_order:
             Places a market sell order on KuCoin.
             Parameters:
                 symbol (str): The trading pair symbol (e.g., 'BTC/USDT').
                 quantity (float): The amount of the asset to sell.
+                client_order_id (str): Optional clientOid to find the order by later.
             Returns:
-                dict: The order details if the order is successfully placed.
+                Order: The acknowledged order if it is successfully placed.
                 None: If an error occurs while placing the order.
         place_buy_order:
             Placeholder method for placing a buy order.
+        order_template:
+            Pre-built, pre-validated market order template, cached per symbol and side.
+        submit_order:
+            Fast path: fills in, signs and sends a template; logs only once it is sent.
     """
     def __init__(self):
         try:
@@ -40,6 +102,9 @@ class KuCoinHandler:
         except Exception as e:
             logger.error(f"Error initializing KuCoin client: {e}")
             self.client = None
+        self.decoder = create_decoder(JSON_DECODER)
+        self.api = ResilientCaller('kucoin', is_rejection=_is_rejection)
+        self._templates = {}
 
     def _check_client(self):
         """Check if client is available"""
@@ -53,19 +118,118 @@ class KuCoinHandler:
             return None
             
         try:
-            ticker = self.client.fetch_ticker('BTC/USDT')
+            ticker = self.api.call('ticker', self.client.fetch_ticker, 'BTC/USDT', hedge=True)
             return float(ticker['last'])
         except Exception as e:
             logger.error(f"Error fetching KuCoin BTC price: {e}")
             return None
 
+    def get_server_time(self):
+        """KuCoin server time in milliseconds"""
+        if not self._check_client():
+            return None
+
+        try:
+            return self.api.call('server_time', self.client.fetch_time)
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin server time: {e}")
+            return None
+
+    def apply_clock_offset(self, offset):
+        """Sign requests with KuCoin's clock: offset is server minus local time in seconds"""
+        if self.client is not None:
+            # ccxt's nonce() is milliseconds() - timeDifference
+            self.client.options['timeDifference'] = int(-offset * 1000)
+
+    @staticmethod
+    def to_exchange_symbol(symbol):
+        """ccxt already uses unified 'BASE/QUOTE' symbols"""
+        return symbol
+
+    def _get_public(self, path, **params):
+        """GET a public REST endpoint on ccxt's session and return the raw body"""
+        response = self.client.session.get(self.client.urls['api']['public'] + path,
+                                           params=params, timeout=self.client.timeout / 1000)
+        response.raise_for_status()
+        return response.content
+
+    def get_best_bid_ask(self, symbol='BTC/USDT'):
+        if not self._check_client():
+            return None
+
+        try:
+            if self.decoder is not None:
+                bid, ask, quoted_at = self.decoder.kucoin_level1(self.api.call(
+                    'book_ticker', self._get_public, '/api/v1/market/orderbook/level1',
+                    symbol=symbol.replace('/', '-'), hedge=True))
+                return Quote('kucoin', symbol, bid, ask,
+                             time_sync.to_local('kucoin', quoted_at) if quoted_at else None)
+            ticker = self.api.call('book_ticker', self.client.fetch_ticker, symbol, hedge=True)
+            return Quote('kucoin', symbol, float(ticker['bid']), float(ticker['ask']),
+                         time_sync.to_local('kucoin', ticker['timestamp']) if ticker.get('timestamp') else None)
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin {symbol} bid/ask: {e}")
+            return None
+
+    def get_order_book(self, symbol='BTC/USDT', limit=20):
+        if not self._check_client():
+            return None
+
+        try:
+            if self.decoder is not None and limit <= 20:
+                bids, asks = self.decoder.kucoin_depth(
+                    self.api.call('order_book', self._get_public, '/api/v1/market/orderbook/level2_20',
+                                  symbol=symbol.replace('/', '-'), hedge=True))
+                return bids[:limit], asks[:limit]
+            book = self.api.call('order_book', self.client.fetch_order_book, symbol, limit, hedge=True)
+            bids = [[float(level[0]), float(level[1])] for level in book['bids']]
+            asks = [[float(level[0]), float(level[1])] for level in book['asks']]
+            return bids, asks
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin {symbol} order book: {e}")
+            return None
+
+    def get_all_bid_ask(self):
+        if not self._check_client():
+            return None
+
+        try:
+            if self.decoder is not None:
+                return self.decoder.kucoin_tickers(
+                    self.api.call('tickers', self._get_public, '/api/v1/market/allTickers', hedge=True))
+            tickers = self.api.call('tickers', self.client.fetch_tickers, hedge=True)
+            return {symbol: (float(ticker['bid']), float(ticker['ask']))
+                    for symbol, ticker in tickers.items()
+                    if ticker.get('bid') and ticker.get('ask')}
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin tickers: {e}")
+            return None
+
+    def get_klines(self, symbol, interval, start, end):
+        if not self._check_client():
+            return None
+
+        try:
+            candles = []
+            while start < end:
+                page = self.api.call('klines', self.client.fetch_ohlcv, symbol, interval, since=start, limit=1500)
+                candles.extend((row[0], float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+                               for row in page if start <= row[0] < end)
+                if not page or page[-1][0] + 1 <= start:
+                    break
+                start = page[-1][0] + 1
+            return candles
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin {symbol} {interval} klines: {e}")
+            return None
+
     def check_balance(self):
         if not self._check_client():
             return 0.0
             
         try:
-            balance = self.client.fetch_balance()
-            return balance['total'].get('BTC', 0.0)
+            balance = self.api.call('account', self.client.fetch_balance)
+            return balance['free'].get('BTC', 0.0)
         except Exception as e:
             logger.error(f"Error fetching KuCoin balance: {e}")
             return 0.0
@@ -75,44 +239,155 @@ class KuCoinHandler:
             return 0.0
             
         try:
-            balance = self.client.fetch_balance()
-            return balance['total'].get('USDT', 0.0)
+            balance = self.api.call('account', self.client.fetch_balance)
+            return balance['free'].get('USDT', 0.0)
         except Exception as e:
             logger.error(f"Error fetching KuCoin USDT balance: {e}")
             return 0.0
 
-    def place_sell_order(self, symbol, quantity):
+    def check_asset_balance(self, asset):
+        if not self._check_client():
+            return 0.0
+
+        try:
+            balance = self.api.call('account', self.client.fetch_balance)
+            return balance['free'].get(asset, 0.0)
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin {asset} balance: {e}")
+            return 0.0
+
+    @staticmethod
+    def _to_order(response, symbol=None, side=None, quantity=None):
+        fee = response.get('fee') or {}
+        return Order('kucoin', symbol or response.get('symbol'), side or response.get('side'),
+                     quantity if quantity is not None else response.get('amount'),
+                     order_id=response.get('id'), status=response.get('status'),
+                     filled=response.get('filled') or 0.0, average_price=response.get('average'),
+                     fee=fee.get('cost'), fee_asset=fee.get('currency'),
+                     timestamp=time_sync.to_local('kucoin', response['timestamp']) if response.get('timestamp') else None)
+
+    def get_open_orders(self):
+        """All open orders on every symbol, in one request"""
+        if not self._check_client():
+            return None
+
+        try:
+            return [self._to_order(order) for order in self.api.call('open_orders', self.client.fetch_open_orders)]
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin open orders: {e}")
+            return None
+
+    def fetch_order(self, symbol, order_id):
+        if not self._check_client():
+            return None
+
+        try:
+            return self._to_order(self.api.call('fetch_order', self.client.fetch_order, order_id, symbol), symbol)
+        except Exception as e:
+            logger.error(f"Error fetching KuCoin order {order_id}: {e}")
+            return None
+
+    def find_order(self, symbol, client_order_id):
+        if not self._check_client():
+            return None
+
+        try:
+            return self._to_order(self.api.call('fetch_order', self.client.fetch_order, None, symbol,
+                                                {'clientOid': client_order_id}), symbol)
+        except Exception as e:
+            logger.warning(f"No KuCoin order found for clientOid {client_order_id}: {e}")
+            return None
+
+    def place_sell_order(self, symbol, quantity, client_order_id=None):
         if not self._check_client():
             return None
             
         try:
-            order = self.client.create_order(
+            order = self.api.call(
+                'place_order', self.client.create_order,
                 symbol=symbol,
                 type='market',
                 side='sell',
-                amount=quantity
+                amount=quantity,
+                params={'clientOid': client_order_id} if client_order_id else {},
+                abandon=False
             )
             logger.info(f"Sell order placed on KuCoin: {order}")
-            return order
+            return self._to_order(order, symbol, 'sell', quantity)
         except Exception as e:
             logger.error(f"Error placing sell order on KuCoin: {e}")
             return None
 
-    def place_buy_order(self, symbol, quantity):
+    def place_buy_order(self, symbol, quantity, client_order_id=None):
         if not self._check_client():
             return None
             
         try:
-            order = self.client.create_order(
+            order = self.api.call(
+                'place_order', self.client.create_order,
                 symbol=symbol,
                 type='market',
                 side='buy',
-                amount=quantity
+                amount=quantity,
+                params={'clientOid': client_order_id} if client_order_id else {},
+                abandon=False
             )
             logger.info(f"Buy order placed on KuCoin: {order}")
-            return order
+            return self._to_order(order, symbol, 'buy', quantity)
         except Exception as e:
             logger.error(f"Error placing buy order on KuCoin: {e}")
             return None
 
-    
\ No newline at end of file
+    
+
+    def order_template(self, symbol, side):
+        """Market order template for a unified symbol and side, built on first use"""
+        template = self._templates.get((symbol, side))
+        if template is None and self._check_client():
+            try:
+                template = self._templates[(symbol, side)] = self._build_template(symbol, side)
+            except Exception as e:
+                logger.error(f"Error preparing KuCoin {side} order template for {symbol}: {e}")
+        return template
+
+    def _build_template(self, symbol, side):
+        self.api.call('markets', self.client.load_markets)
+        market = self.client.market(symbol)
+        signed_passphrase = base64.b64encode(hmac.new(KUCOIN_API_SECRET.encode(), KUCOIN_API_PASSPHRASE.encode(),
+                                                      hashlib.sha256).digest()).decode()
+        # The JSON body up to the size value; submit_order appends the rest
+        prefix = '{"side":%s,"symbol":%s,"type":"market","size":"' % (json.dumps(side), json.dumps(market['id']))
+        return OrderTemplate('kucoin', symbol, side, self.client.urls['api']['private'] + '/api/v1/orders',
+                             KUCOIN_API_SECRET, market['precision']['amount'] or lot_step(symbol, 'kucoin'),
+                             min_qty=market['limits']['amount']['min'] or 0.0,
+                             min_notional=market['limits']['cost']['min'] or MIN_NOTIONAL['kucoin'],
+                             path='/api/v1/orders', prefix=prefix,
+                             headers={'KC-API-KEY': KUCOIN_API_KEY, 'KC-API-PASSPHRASE': signed_passphrase,
+                                      'KC-API-KEY-VERSION': '2', 'Content-Type': 'application/json'})
+
+    def submit_order(self, template, quantity, price, client_order_id=None):
+        quantity, wire_quantity = template.quantize(quantity)
+        problem = template.rejects(quantity, price)
+        if problem is not None:
+            logger.error(f"KuCoin {template.side} order not sent: {problem}")
+            return None
+
+        try:
+            body = f'{template.prefix}{wire_quantity}","clientOid":"{client_order_id or uuid.uuid4().hex}"}}'
+            # nonce() includes the clock offset applied by TimeSync
+            timestamp = str(self.client.nonce())
+            signature = template.sign(timestamp + 'POST' + template.path + body).digest()
+            headers = dict(template.headers, **{'KC-API-TIMESTAMP': timestamp,
+                                                'KC-API-SIGN': base64.b64encode(signature).decode()})
+            response = self.api.call('place_order', self.client.session.post, template.url, data=body,
+                                     headers=headers, timeout=self.api.deadline('place_order'), abandon=False)
+            payload = response.json()
+            if payload.get('code') != '200000':
+                raise ccxt.ExchangeError(f"{payload.get('code')}: {payload.get('msg')}")
+        except Exception as e:
+            logger.error(f"Error placing {template.side} order on KuCoin: {e}")
+            return None
+        logger.info(f"{template.side.capitalize()} order placed on KuCoin: {payload}")
+        # The acknowledgement only carries the id; OrderManager polls for the fills
+        return Order('kucoin', template.symbol, template.side, quantity, order_id=payload['data']['orderId'],
+                     status='open')
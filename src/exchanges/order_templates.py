@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+from decimal import Decimal
+from config.settings import QUANTITY_STEP, DEFAULT_QUANTITY_STEP
+
+
+def lot_step(symbol, venue):
+    """Configured lot size of a unified symbol on a venue"""
+    return QUANTITY_STEP.get(symbol, {}).get(venue, DEFAULT_QUANTITY_STEP)
+
+
+def step_decimals(step):
+    """Decimal places of a lot-size step such as 0.00001 or '0.00100000'"""
+    exponent = Decimal(str(step)).normalize().as_tuple().exponent
+    return max(-exponent, 0)
+
+
+class OrderTemplate:
+    """
+    A market order for one venue, symbol and side, built ahead of time.
+
+    Everything that does not depend on the quantity or the clock is done
+    once: the URL, the static part of the request, the lot-size rounding
+    and the exchange's minimums. The HMAC key schedule is precomputed too,
+    so signing a submission is a copy() and one update(). At submit time
+    only the quantity, timestamp and signature are filled in.
+
+    Methods
+    -------
+    quantize(quantity):
+        Rounds down to the lot size; returns (quantity, wire string).
+    rejects(quantity, price):
+        Why the exchange would reject this quantity, or None.
+    sign(payload):
+        HMAC-SHA256 of payload with the venue secret, ready for
+        hexdigest() or digest().
+    """
+    __slots__ = ('venue', 'symbol', 'side', 'url', 'path', 'prefix', 'headers', 'min_qty', 'min_notional', 'step',
+                 '_scale', '_step_units', '_decimals', '_signer')
+
+    def __init__(self, venue, symbol, side, url, secret, step, min_qty=0.0, min_notional=0.0, path=None,
+                 prefix='', headers=None):
+        self.venue = venue
+        self.symbol = symbol
+        self.side = side
+        self.url = url
+        self.path = path
+        self.prefix = prefix
+        self.headers = headers or {}
+        self.min_qty = min_qty
+        self.min_notional = min_notional
+        self.step = float(step)
+        self._decimals = step_decimals(step)
+        self._scale = 10 ** self._decimals
+        self._step_units = max(round(float(step) * self._scale), 1)
+        self._signer = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+    def quantize(self, quantity):
+        units = int(quantity * self._scale + 1e-9) // self._step_units * self._step_units
+        quantity = units / self._scale
+        return quantity, f'{quantity:.{self._decimals}f}'
+
+    def rejects(self, quantity, price):
+        if quantity < self.min_qty or quantity <= 0:
+            return f'quantity {quantity} below minimum {self.min_qty}'
+        if quantity * price < self.min_notional:
+            return f'notional {quantity * price:.2f} below minimum {self.min_notional}'
+        return None
+
+    def sign(self, payload):
+        signer = self._signer.copy()
+        signer.update(payload.encode())
+        return signer
+
+    def __repr__(self):
+        return f'OrderTemplate({self.venue} {self.side} {self.symbol})'
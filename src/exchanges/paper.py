@@ -0,0 +1,242 @@
+from bisect import bisect_right
+from itertools import count
+from utils.logger import logger
+from utils.records import Quote, Order
+from utils.time_sync import timeline
+
+
+class LiveBooks:
+    """Order books from a real handler's public market-data calls."""
+    def __init__(self, handler):
+        self.handler = handler
+
+    def book(self, symbol, depth, at):
+        return self.handler.get_order_book(symbol, depth)
+
+    def tickers(self, at):
+        get_all_bid_ask = getattr(self.handler, 'get_all_bid_ask', None)
+        return get_all_bid_ask() if get_all_bid_ask is not None else None
+
+
+class RecordedBooks:
+    """
+    Replays recorded order-book snapshots for offline dry runs and backtests.
+
+    Snapshots are (timestamp, symbol, bids, asks) with levels as
+    (price, quantity); the book at time t is the latest snapshot taken at
+    or before t, found by bisection.
+    """
+    def __init__(self, snapshots):
+        self._times = {}
+        self._books = {}
+        for timestamp, symbol, bids, asks in sorted(snapshots, key=lambda snapshot: snapshot[0]):
+            self._times.setdefault(symbol, []).append(timestamp)
+            self._books.setdefault(symbol, []).append((bids, asks))
+
+    @classmethod
+    def from_quotes(cls, table, venue, size):
+        """Top-of-book snapshots of `size` from a TradeArchive.read_quotes() table"""
+        rows = table.select(['time', 'venue', 'symbol', 'bid', 'ask']).to_pylist()
+        return cls((row['time'].timestamp(), row['symbol'], [(row['bid'], size)], [(row['ask'], size)])
+                   for row in rows if row['venue'] == venue)
+
+    def book(self, symbol, depth, at):
+        times = self._times.get(symbol)
+        if not times:
+            return None
+        i = bisect_right(times, at) - 1
+        if i < 0:
+            return None
+        bids, asks = self._books[symbol][i]
+        return bids[:depth], asks[:depth]
+
+    def tickers(self, at):
+        tickers = {}
+        for symbol in self._times:
+            book = self.book(symbol, 1, at)
+            if book and book[0] and book[1]:
+                tickers[symbol] = (book[0][0][0], book[1][0][0])
+        return tickers
+
+
+class PaperExchange:
+    """
+    In-process simulated exchange implementing the handler interface.
+
+    Keeps virtual balances and fills market orders by walking an order
+    book from `books` (LiveBooks for dry runs on live data, RecordedBooks
+    for offline replays). An order is matched `latency` seconds after it is
+    placed, against the book at that time: until then it is reported
+    'open', so OrderManager polls it like a real one. An order bigger than
+    the available depth (times `participation`, the share of each level we
+    expect to get) fills partially and ends 'expired', like an exhausted
+    market order on Binance. Fees are charged in the quote asset at
+    `fee_rate`. With latency=0 orders come back final from placement and
+    no network call is made, so backtests can push thousands of orders a
+    second.
+
+    Methods
+    -------
+    get_best_bid_ask(symbol) / get_order_book(symbol, limit) / get_all_bid_ask():
+        Market data from the book source.
+    check_asset_balance(asset):
+        Free virtual balance of an asset.
+    place_buy_order(symbol, quantity, client_order_id=None) / place_sell_order(...):
+        Places a simulated market order and returns it as an Order.
+    get_open_orders() / fetch_order(symbol, order_id) / find_order(symbol, client_order_id):
+        Matches orders whose latency has passed and reports their state.
+    """
+    simulated = True
+
+    def __init__(self, venue, books, balances, fee_rate=0.001, latency=0.0, participation=1.0,
+                 depth=100, clock=timeline.now):
+        self.venue = venue
+        self.books = books
+        self.balances = dict(balances)
+        self.fee_rate = fee_rate
+        self.latency = latency
+        self.participation = participation
+        self.depth = depth
+        self.clock = clock
+        self._orders = {}
+        self._pending = {}
+        self._client_ids = {}
+        self._ids = count(1)
+
+    @staticmethod
+    def to_exchange_symbol(symbol):
+        """Simulated venues use unified 'BASE/QUOTE' symbols"""
+        return symbol
+
+    def get_server_time(self):
+        return self.clock() * 1000
+
+    def apply_clock_offset(self, offset):
+        pass
+
+    def get_order_book(self, symbol='BTC/USDT', limit=20):
+        book = self.books.book(symbol, limit, self.clock())
+        if book is None:
+            logger.error(f"No {self.venue} paper order book for {symbol}")
+        return book
+
+    def get_best_bid_ask(self, symbol='BTC/USDT'):
+        book = self.get_order_book(symbol, 1)
+        if not book or not book[0] or not book[1]:
+            return None
+        return Quote(self.venue, symbol, book[0][0][0], book[1][0][0], self.clock())
+
+    def get_btc_price(self):
+        quote = self.get_best_bid_ask('BTC/USDT')
+        return quote.mid if quote else None
+
+    def get_all_bid_ask(self):
+        return self.books.tickers(self.clock())
+
+    def check_asset_balance(self, asset):
+        return self.balances.get(asset, 0.0)
+
+    def check_balance(self):
+        return self.check_asset_balance('BTC')
+
+    def check_usdt_balance(self):
+        return self.check_asset_balance('USDT')
+
+    def _walk(self, levels, quantity):
+        filled = cost = 0.0
+        for price, size in levels:
+            take = min(size * self.participation, quantity - filled)
+            filled += take
+            cost += take * price
+            if filled >= quantity:
+                break
+        return filled, cost
+
+    def _place(self, side, symbol, quantity, client_order_id=None):
+        base, quote = symbol.split('/', 1)
+        now = self.clock()
+        # Reject up front what the venue would reject, judged on the current book
+        book = self.books.book(symbol, self.depth, now)
+        if book is None:
+            logger.error(f"Error placing {side} order on {self.venue} (paper): no order book for {symbol}")
+            return None
+        cost = self._walk(book[1], quantity)[1] if side == 'buy' else 0.0
+        if side == 'buy' and self.balances.get(quote, 0.0) < cost * (1 + self.fee_rate):
+            logger.error(f"Error placing buy order on {self.venue} (paper): insufficient {quote}")
+            return None
+        if side == 'sell' and self.balances.get(base, 0.0) < quantity:
+            logger.error(f"Error placing sell order on {self.venue} (paper): insufficient {base}")
+            return None
+
+        order = Order(self.venue, symbol, side, quantity, order_id=f'paper-{next(self._ids)}', status='open',
+                      timestamp=now)
+        self._orders[order.order_id] = order
+        if client_order_id:
+            self._client_ids[client_order_id] = order.order_id
+        if self.latency > 0:
+            self._pending[order.order_id] = now + self.latency
+        else:
+            self._fill(order, book)
+        return self._report(order)
+
+    def _fill(self, order, book):
+        base, quote = order.symbol.split('/', 1)
+        if book is None:
+            order.status = 'expired'
+            return
+        if order.side == 'buy':
+            filled, cost = self._walk(book[1], order.quantity)
+            fee = cost * self.fee_rate
+            if self.balances.get(quote, 0.0) < cost + fee:
+                order.status = 'rejected'
+                return
+            self.balances[base] = self.balances.get(base, 0.0) + filled
+            self.balances[quote] = self.balances.get(quote, 0.0) - cost - fee
+        else:
+            # Never sell more than is held, even if the balance moved since placement
+            filled, cost = self._walk(book[0], min(order.quantity, self.balances.get(base, 0.0)))
+            fee = cost * self.fee_rate
+            self.balances[base] = self.balances.get(base, 0.0) - filled
+            self.balances[quote] = self.balances.get(quote, 0.0) + cost - fee
+        order.filled = filled
+        order.average_price = cost / filled if filled else None
+        order.fee = fee
+        order.fee_asset = quote
+        order.status = 'closed' if filled >= order.quantity * (1 - 1e-9) else 'expired'
+
+    def _match_due(self):
+        if not self._pending:
+            return
+        now = self.clock()
+        for order_id, due in list(self._pending.items()):
+            if due <= now:
+                del self._pending[order_id]
+                order = self._orders[order_id]
+                # Matched against the book as it was when the order reached the venue
+                self._fill(order, self.books.book(order.symbol, self.depth, due))
+
+    @staticmethod
+    def _report(order):
+        return Order(**order.to_dict())
+
+    def place_buy_order(self, symbol, quantity, client_order_id=None):
+        return self._place('buy', symbol, quantity, client_order_id)
+
+    def place_sell_order(self, symbol, quantity, client_order_id=None):
+        return self._place('sell', symbol, quantity, client_order_id)
+
+    def get_open_orders(self):
+        self._match_due()
+        return [self._report(self._orders[order_id]) for order_id in self._pending]
+
+    def fetch_order(self, symbol, order_id):
+        self._match_due()
+        order = self._orders.get(order_id)
+        if order is None:
+            logger.error(f"Error fetching {self.venue} paper order {order_id}: unknown order")
+            return None
+        return self._report(order)
+
+    def find_order(self, symbol, client_order_id):
+        order_id = self._client_ids.get(client_order_id)
+        return self.fetch_order(symbol, order_id) if order_id is not None else None
@@ -0,0 +1,249 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+import threading
+import time
+from config.settings import (EXCHANGE_DEADLINES, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+                             HEDGE_QUANTILE, HEDGE_MIN_SAMPLES, LATENCY_WINDOW)
+from utils.quantiles import RollingQuantile
+from utils.event_bus import event_bus
+from utils.logger import logger
+
+
+# Every venue's caller, for health_snapshot()
+_callers = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an exchange call does not answer within its deadline."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one exchange endpoint.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail immediately for `reset_timeout` seconds. The first call after
+    that is let through as a probe (half-open): success closes the circuit,
+    failure opens it again for another `reset_timeout`.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, on_transition=None, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_transition = on_transition
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.transitions = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        previous, self.state = self.state, state
+        key = f'{previous}->{state}'
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        if self.on_transition is not None:
+            self.on_transition(self, previous, state)
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+                return True
+            # Open, or half-open with its single probe already in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED
+                                                and self.failures >= self.failure_threshold):
+                self.opened_at = self._clock()
+                self._set_state(self.OPEN)
+
+
+class _EndpointStats:
+    __slots__ = ('calls', 'failures', 'timeouts', 'rejected', 'refused', 'hedged', 'hedge_wins', 'latency')
+
+    def __init__(self, window):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.refused = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.latency = RollingQuantile(window)
+
+
+class ResilientCaller:
+    """
+    Deadlines, circuit breakers and hedged reads around one venue's API calls.
+
+    Every call runs on a small thread pool so the caller waits at most the
+    endpoint's deadline (EXCHANGE_DEADLINES, falling back to 'default')
+    however long the SDK would block. Each endpoint has its own
+    CircuitBreaker, so a degraded venue fails fast with CircuitOpenError
+    instead of tying up the next scheduled run. Idempotent reads can be
+    hedged: once an endpoint has HEDGE_MIN_SAMPLES latencies, a call that
+    has not answered by the HEDGE_QUANTILE latency sends one duplicate and
+    takes whichever answers first.
+
+    Writes such as order placement pass abandon=False: they run in the
+    caller's thread until the SDK returns or its own request timeout fires,
+    because an order sent after we stopped waiting would be live but
+    untracked. An exchange refusing a request (is_rejection(error) is true,
+    e.g. insufficient balance or a bad quantity) shows the venue is up, so
+    it is re-raised without counting against the breaker.
+
+    Failures surface as exceptions, so the handlers' existing try/except
+    blocks keep logging them and returning None. Breaker transitions are
+    logged and published on the event bus as 'exchange_health' with
+    health_snapshot() of every venue.
+
+    Methods
+    -------
+    call(endpoint, func, *args, hedge=False, abandon=True, **kwargs):
+        Calls func(*args, **kwargs) under the endpoint's breaker, and under
+        its deadline unless abandon is False.
+    deadline(endpoint):
+        The deadline in seconds for an endpoint.
+    snapshot():
+        Breaker states, counters and latency percentiles per endpoint.
+    """
+    def __init__(self, venue, deadlines=EXCHANGE_DEADLINES, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_RESET_TIMEOUT, hedge_quantile=HEDGE_QUANTILE,
+                 hedge_min_samples=HEDGE_MIN_SAMPLES, latency_window=LATENCY_WINDOW, max_workers=8,
+                 is_rejection=None, events=event_bus, clock=time.monotonic):
+        self.venue = venue
+        self.is_rejection = is_rejection or (lambda error: False)
+        self.deadlines = deadlines
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        self.events = events
+        self._clock = clock
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{venue}-api')
+        _callers[venue] = self
+
+    def deadline(self, endpoint):
+        return self.deadlines.get(endpoint, self.deadlines['default'])
+
+    def _endpoint(self, endpoint):
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(
+                    f'{self.venue}.{endpoint}', self.failure_threshold, self.reset_timeout,
+                    on_transition=self._on_transition, clock=self._clock)
+                self._stats[endpoint] = _EndpointStats(self.latency_window)
+            return breaker, self._stats[endpoint]
+
+    def _on_transition(self, breaker, previous, state):
+        if state == CircuitBreaker.OPEN:
+            logger.warning(f"🔌 Circuit {breaker.name} opened after {breaker.failures} failures; "
+                           f"failing fast for {breaker.reset_timeout}s")
+        else:
+            logger.info(f"🔌 Circuit {breaker.name} {previous} -> {state}")
+        self.events.publish('exchange_health', health_snapshot())
+
+    def _timed(self, func, args, kwargs):
+        started = self._clock()
+        result = func(*args, **kwargs)
+        return result, self._clock() - started
+
+    def _failed(self, breaker, stats, error):
+        if self.is_rejection(error):
+            # The venue answered; it just said no
+            stats.refused += 1
+            breaker.record_success()
+        else:
+            stats.failures += 1
+            breaker.record_failure()
+
+    def _call_through(self, breaker, stats, func, args, kwargs):
+        try:
+            result, latency = self._timed(func, args, kwargs)
+        except Exception as e:
+            self._failed(breaker, stats, e)
+            raise
+        stats.latency.update(latency)
+        breaker.record_success()
+        return result
+
+    def call(self, endpoint, func, *args, hedge=False, abandon=True, **kwargs):
+        breaker, stats = self._endpoint(endpoint)
+        stats.calls += 1
+        if not breaker.allow():
+            stats.rejected += 1
+            raise CircuitOpenError(f"{self.venue} {endpoint} circuit is open")
+        if not abandon:
+            return self._call_through(breaker, stats, func, args, kwargs)
+
+        deadline = self.deadline(endpoint)
+        started = self._clock()
+        futures = [self._executor.submit(self._timed, func, args, kwargs)]
+        try:
+            hedge_after = stats.latency.quantile(self.hedge_quantile) if hedge else None
+            if hedge_after is not None and len(stats.latency) >= self.hedge_min_samples and hedge_after < deadline:
+                done, _ = wait(futures, timeout=hedge_after)
+                if not done:
+                    stats.hedged += 1
+                    futures.append(self._executor.submit(self._timed, func, args, kwargs))
+            pending = set(futures)
+            while True:
+                remaining = max(deadline - (self._clock() - started), 0)
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise FutureTimeout()
+                succeeded = [f for f in done if f.exception() is None]
+                # A failed hedge copy still leaves the other one a chance
+                if succeeded or not pending:
+                    break
+            future = succeeded[0] if succeeded else next(iter(done))
+            result, latency = future.result()
+        except FutureTimeout:
+            stats.timeouts += 1
+            stats.failures += 1
+            breaker.record_failure()
+            raise DeadlineExceeded(f"{self.venue} {endpoint} did not answer within {deadline}s")
+        except Exception as e:
+            self._failed(breaker, stats, e)
+            raise
+
+        if len(futures) > 1 and future is futures[1]:
+            stats.hedge_wins += 1
+        stats.latency.update(latency)
+        breaker.record_success()
+        return result
+
+    def snapshot(self):
+        return {endpoint: {'state': breaker.state, 'transitions': dict(breaker.transitions),
+                           'calls': stats.calls, 'failures': stats.failures, 'timeouts': stats.timeouts,
+                           'rejected': stats.rejected, 'refused': stats.refused, 'hedged': stats.hedged, 'hedge_wins': stats.hedge_wins,
+                           'p50': stats.latency.quantile(0.5), 'p95': stats.latency.quantile(0.95)}
+                for endpoint, breaker in list(self._breakers.items())
+                for stats in [self._stats[endpoint]]}
+
+
+def health_snapshot():
+    """Breaker states and call metrics of every venue, keyed by venue then endpoint"""
+    return {venue: caller.snapshot() for venue, caller in list(_callers.items())}
@@ -1,22 +1,34 @@
 import schedule
 import time
-from trading.arbitrage import ArbitrageTrader
 from utils.file_handler import FileHandler
-from config.settings import TRADING_INTERVAL, DASHBOARD_SECRET_KEY, BINANCE_API_KEY, KUCOIN_API_KEY, KUCOIN_API_PASSPHRASE
+from config.settings import (DASHBOARD_SECRET_KEY, BINANCE_API_KEY, KUCOIN_API_KEY,
+                             KUCOIN_API_PASSPHRASE, SSE_HEARTBEAT_SECONDS, ENGINE_SOCKET_PATH,
+                             TRADING_SYMBOLS, EXCHANGE_FEE_RATES, SCANNER_WORKERS, SCANNER_INTERVAL,
+                             SCANNER_MIN_EDGE, SCANNER_MAX_CANDIDATE_AGE, PROFILE_DEFAULT_SECONDS, ADMIN_USERS,
+                             USER_CACHE_TTL, USER_CACHE_SIZE)
 import argparse
+from collections import OrderedDict
+import functools
+import json
 import sys
 
 # Web dashboard import
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template_string, request, jsonify, redirect, url_for, flash
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import threading
 import os
-from utils.db import TradeDB
+from utils.db import TradeDB, PARQUET_DIR
 import sqlite3
 import requests
 from utils.logger import logger
-from urllib.parse import unquote
+from utils.event_bus import event_bus
+from utils.time_sync import time_sync
+from exchanges.resilience import health_snapshot
+from utils.jobs import JobQueue
+from utils.ipc import StatePublisher
+from utils.profiler import profiler as runtime_profiler, PROFILE_ACTIONS
+from config.runtime import runtime_settings, SettingsError
 
 def check_network_connectivity():
     """Check if we can reach the exchange APIs"""
@@ -58,6 +70,66 @@ class User(UserMixin):
             return User(user[0], user[1], user[2])
         return None
 
+
+class UserStore:
+    """
+    Dashboard users cached in memory for Flask-Login.
+
+    Flask-Login loads the user on every authenticated request, and reading
+    it from SQLite costs a TradeDB() (a CREATE TABLE on a fresh connection)
+    plus another connection for the query. Users that were found are kept
+    in an LRU of `max_users` entries for `ttl` seconds, so session
+    validation does no database I/O while an entry is fresh; unknown users
+    are never cached. create_user() invalidates this process's store.
+    Other processes, such as web workers when a user is created from the
+    CLI, see the change once their entries expire.
+
+    Methods
+    -------
+    get_by_id(user_id) / get_by_username(username):
+        The User, from memory when cached, else from the database.
+    invalidate():
+        Drops every cached user.
+    """
+    def __init__(self, ttl=USER_CACHE_TTL, max_users=USER_CACHE_SIZE, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._clock = clock
+        # ('id', '1') and ('username', 'alice') both map to (expires, User)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, load):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        user = load()
+        if user is not None:
+            entry = (now + self.ttl, user)
+            with self._lock:
+                for cache_key in (('id', str(user.id)), ('username', user.username)):
+                    self._entries[cache_key] = entry
+                    self._entries.move_to_end(cache_key)
+                while len(self._entries) > 2 * self.max_users:
+                    self._entries.popitem(last=False)
+        return user
+
+    def get_by_id(self, user_id):
+        return self._lookup(('id', str(user_id)), lambda: User.get_by_id(user_id))
+
+    def get_by_username(self, username):
+        return self._lookup(('username', username), lambda: User.get_by_username(username))
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_store = UserStore()
+
 # Extend TradeDB for user management
 setattr(TradeDB, 'init_user_table', lambda self: self._init_user_table())
 def _init_user_table(self):
@@ -82,6 +154,7 @@ def create_user(username, password):
             c.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', (username, password_hash))
             conn.commit()
             logger.info(f"✅ User '{username}' created successfully.")
+            user_store.invalidate()
         except sqlite3.IntegrityError:
             logger.warning(f"⚠️ User '{username}' already exists.")
 
@@ -99,39 +172,112 @@ def get_user_by_id(self, user_id):
         return c.fetchone()
 setattr(TradeDB, 'get_user_by_id', get_user_by_id)
 
-def run_scheduler(trader, dry_run):
-    logger.info(f"⏰ Starting scheduler with {TRADING_INTERVAL}s interval (DRY RUN: {dry_run})")
+def run_scheduler(trader, dry_run, triangular=False):
+    interval = runtime_settings.TRADING_INTERVAL
+    logger.info(f"⏰ Starting scheduler with {interval}s interval (DRY RUN: {dry_run})")
     
     def job():
+        if trader.risk.halted:
+            logger.warning(f"🛑 Trading halted ({trader.risk.halt_reason}); skipping scheduled run")
+            return
         logger.info("🕐 Scheduled trade execution triggered")
         trader.execute_trade(dry_run=dry_run)
+        if triangular:
+            trader.execute_triangular_trade(dry_run=dry_run)
     
-    schedule.every(TRADING_INTERVAL).seconds.do(job)
-    logger.info(f"✅ Scheduler configured to run every {TRADING_INTERVAL} seconds")
+    # Closed years and the day's quotes go to the Parquet archive (skipped without pyarrow)
+    from utils.archive import create_archive
+    archive = create_archive(PARQUET_DIR)
+
+    def archive_job():
+        logger.info("🗄️ Archiving closed years and quote history...")
+        trader.trade_logger.db.archive_old_dbs()
+        if archive is not None:
+            archive.archive_quotes(trader.quote_history)
+
+    trade_job = schedule.every(interval).seconds.do(job)
+    schedule.every().day.do(archive_job)
+    logger.info(f"✅ Scheduler configured to run every {interval} seconds")
     
     while True:
+        # TRADING_INTERVAL is a runtime setting; re-arm the job when it changes
+        if runtime_settings.TRADING_INTERVAL != interval:
+            interval = runtime_settings.TRADING_INTERVAL
+            schedule.cancel_job(trade_job)
+            trade_job = schedule.every(interval).seconds.do(job)
+            logger.info(f"⏰ Scheduler now runs every {interval} seconds")
         schedule.run_pending()
         time.sleep(1)
 
-def run_web_dashboard(trader, dry_run):
+def run_sharded_scanner(trader, dry_run):
+    """Scan TRADING_SYMBOLS in worker processes and execute the best fresh route"""
+    from trading.scanner import ShardedScanner
+    scanner = ShardedScanner(TRADING_SYMBOLS, list(trader.venues), workers=SCANNER_WORKERS,
+                             fee_rates=EXCHANGE_FEE_RATES, min_edge=SCANNER_MIN_EDGE,
+                             interval=SCANNER_INTERVAL).start()
+    logger.info(f"⏰ Draining scanner candidates every {SCANNER_INTERVAL}s (DRY RUN: {dry_run})")
+
+    try:
+        while True:
+            routes = scanner.candidates(max_age=SCANNER_MAX_CANDIDATE_AGE)
+            if routes and trader.risk.halted:
+                logger.warning(f"🛑 Trading halted ({trader.risk.halt_reason}); dropping {len(routes)} candidates")
+            elif routes:
+                logger.info(f"🧩 {len(routes)} candidate routes, best {routes[0].symbol} "
+                            f"{routes[0].buy_venue}→{routes[0].sell_venue} ({routes[0].net_edge * 100:.3f}%)")
+                trader.execute_route(routes[0], dry_run=dry_run)
+            time.sleep(SCANNER_INTERVAL)
+    finally:
+        scanner.stop()
+
+def run_web_dashboard(trader, dry_run, with_scheduler=False, triangular=False, jobs=None):
     logger.info("🌐 Starting web dashboard...")
+
+    if with_scheduler:
+        # Same process, so the trading loop feeds the dashboard's event bus directly
+        threading.Thread(target=run_scheduler, args=(trader, dry_run, triangular),
+                         name='scheduler', daemon=True).start()
     
-    app = create_flask_app(trader, dry_run)
+    app = create_flask_app(trader, dry_run, jobs=jobs)
     logger.info("✅ Web dashboard started successfully")
-    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5000)
+    app.run(debug=True, use_reloader=False, threaded=True, host='0.0.0.0', port=5000)
+
+def format_sse(topic, data):
+    """Serialize one event in text/event-stream framing"""
+    return f"event: {topic}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def create_engine_jobs(trader, dry_run, events=None):
+    """Job queue that runs manual trades on the given trader"""
+    jobs = JobQueue(events=events)
+    jobs.register('manual-trade', functools.partial(trader.execute_trade, dry_run=dry_run, return_data=True))
+    return jobs
 
-def create_flask_app(trader, dry_run):
-    """Create and configure Flask app for both development and production"""
+def create_flask_app(trader, dry_run, events=event_bus, jobs=None, trade_logger=None, risk=None, settings=None,
+                     profiler=None):
+    """Create and configure Flask app for both development and production.
+
+    With trader=None (web workers in production) the app never touches the
+    exchanges: balances and live data come from the event bus, which a
+    StateSubscriber fills from the engine process, and manual trades, the
+    kill switch, settings changes and profiling are forwarded to the engine
+    through a RemoteJobQueue, a RemoteRiskControl, a RemoteSettings and a
+    RemoteProfiler.
+    """
+    if jobs is None:
+        jobs = create_engine_jobs(trader, dry_run)
     app = Flask(__name__)
     app.secret_key = DASHBOARD_SECRET_KEY
     login_manager = LoginManager()
     login_manager.init_app(app)
     login_manager.login_view = 'login'
-    trade_logger = trader.trade_logger
+    trade_logger = trade_logger or trader.trade_logger
+    risk = risk or (trader.risk if trader else None)
+    settings = settings or (runtime_settings if trader else None)
+    profiler = profiler or runtime_profiler
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.get_by_id(user_id)
+        return user_store.get_by_id(user_id)
 
     @app.route('/login', methods=['GET', 'POST'])
     def login():
@@ -140,7 +286,7 @@ def create_flask_app(trader, dry_run):
             password = request.form['password']
             logger.info(f"🔐 Login attempt for user: {username}")
             
-            user = User.get_by_username(username)
+            user = user_store.get_by_username(username)
             if user and check_password_hash(user.password_hash, password):
                 login_user(user)
                 logger.info(f"✅ Successful login for user: {username}")
@@ -219,28 +365,22 @@ def create_flask_app(trader, dry_run):
     def dashboard():
         logger.info(f"📊 Dashboard accessed by user: {current_user.username}")
         
-        # Get metrics and trades with error handling
+        # Get metrics and trades with error handling (cached across views)
         try:
-            metrics = trade_logger.get_metrics()
-            trades = trade_logger.get_trades(since_days=30)
+            metrics, trades = trade_logger.get_dashboard_data(since_days=30)
         except Exception as e:
             logger.error(f"Error fetching dashboard data: {e}")
             metrics = {'trade_count': 0, 'total_profit': 0.0, 'avg_profit': 0.0}
             trades = []
         
-        manual_trade_log = request.args.get('manual_trade_log', None)
-        if manual_trade_log:
-            manual_trade_log = unquote(manual_trade_log)
+        manual_job_id = request.args.get('job_id', None)
         
-        # Fetch current account balances
-        try:
-            binance_btc_balance = trader.binance.check_balance()
-            binance_usdt_balance = trader.binance.check_usdt_balance()
-            kucoin_btc_balance = trader.kucoin.check_balance()
-            kucoin_usdt_balance = trader.kucoin.check_usdt_balance()
-        except Exception as e:
-            logger.error(f"Error fetching balances: {e}")
-            binance_btc_balance = binance_usdt_balance = kucoin_btc_balance = kucoin_usdt_balance = "Error"
+        # Tracked balances only; live updates arrive over /stream
+        balances = events.latest('balances') or (trader.inventory.snapshot() if trader else {})
+        binance_btc_balance = balances.get('binance', {}).get('BTC', '—')
+        binance_usdt_balance = balances.get('binance', {}).get('USDT', '—')
+        kucoin_btc_balance = balances.get('kucoin', {}).get('BTC', '—')
+        kucoin_usdt_balance = balances.get('kucoin', {}).get('USDT', '—')
         
         # Pass API keys to the template (WARNING: this is sensitive info)
         return render_template_string('''
@@ -280,38 +420,62 @@ def create_flask_app(trader, dry_run):
                     <div class="card white z-depth-3">
                         <div class="card-content">
                             <span class="card-title cyan-text text-accent-4 center-align">Dashboard</span>
-                            {% if manual_trade_log %}
-                            <div class="log-box">
-                                <b>Manual Trade Output:</b><br>
-                                {{ manual_trade_log|safe }}
+                            <div class="log-box" id="manual-trade-box" {% if not manual_job_id %}style="display: none;"{% endif %}
+                                 data-job-id="{{ manual_job_id or '' }}">
+                                <b>Manual Trade Output <span id="manual-trade-status"></span>:</b><br>
+                                <span id="manual-trade-log"></span>
                             </div>
-                            {% endif %}
                             <div class="balance-box">
                                 <h6 class="green-text text-darken-2"><i class="material-icons left">account_balance_wallet</i>Account Balances</h6>
                                 <div class="balance-grid">
                                     <div class="balance-item">
                                         <h6 class="blue-text">Binance</h6>
-                                        <p><b>BTC:</b> {{ binance_btc_balance }}</p>
-                                        <p><b>USDT:</b> ${{ binance_usdt_balance }}</p>
+                                        <p><b>BTC:</b> <span id="balance-binance-BTC">{{ binance_btc_balance }}</span></p>
+                                        <p><b>USDT:</b> $<span id="balance-binance-USDT">{{ binance_usdt_balance }}</span></p>
                                     </div>
                                     <div class="balance-item">
                                         <h6 class="orange-text">KuCoin</h6>
-                                        <p><b>BTC:</b> {{ kucoin_btc_balance }}</p>
-                                        <p><b>USDT:</b> ${{ kucoin_usdt_balance }}</p>
+                                        <p><b>BTC:</b> <span id="balance-kucoin-BTC">{{ kucoin_btc_balance }}</span></p>
+                                        <p><b>USDT:</b> $<span id="balance-kucoin-USDT">{{ kucoin_usdt_balance }}</span></p>
+                                    </div>
+                                </div>
+                            </div>
+                            <div class="balance-box">
+                                <h6 class="green-text text-darken-2"><i class="material-icons left">show_chart</i>Live Market <span id="live-status" class="grey-text">(connecting…)</span></h6>
+                                <div class="balance-grid">
+                                    <div class="balance-item">
+                                        <p><b>Binance BTC:</b> $<span id="quote-binance">—</span></p>
+                                        <p><b>KuCoin BTC:</b> $<span id="quote-kucoin">—</span></p>
+                                    </div>
+                                    <div class="balance-item">
+                                        <p><b>Difference:</b> $<span id="spread-difference">—</span></p>
+                                        <p><b>Threshold:</b> $<span id="spread-threshold">—</span></p>
+                                        <p><b>Z-score:</b> <span id="spread-zscore">—</span></p>
                                     </div>
                                 </div>
                             </div>
-                            <form method="post" action="/run-trade" class="center-align" style="margin-bottom: 2em;">
+                            <form method="post" action="/run-trade" id="run-trade-form" class="center-align" style="margin-bottom: 2em;">
                                 <button class="btn-large waves-effect waves-light pink accent-3" type="submit">
                                     <i class="material-icons left">autorenew</i>Run Arbitrage Check
                                 </button>
                             </form>
                             <h5 class="cyan-text text-accent-4">Metrics (last 30 days)</h5>
                             <ul class="metrics-list">
-                                <li><b>Total Trades:</b> {{ metrics.trade_count }}</li>
-                                <li><b>Total Profit:</b> <span class="green-text">${{ '%.2f' % metrics.total_profit }}</span></li>
-                                <li><b>Average Profit:</b> <span class="blue-text">${{ '%.2f' % metrics.avg_profit }}</span></li>
+                                <li><b>Total Trades:</b> <span id="metric-trade_count">{{ metrics.trade_count }}</span></li>
+                                <li><b>Total Profit:</b> <span class="green-text">$<span id="metric-total_profit">{{ '%.2f' % metrics.total_profit }}</span></span></li>
+                                <li><b>Average Profit:</b> <span class="blue-text">$<span id="metric-avg_profit">{{ '%.2f' % metrics.avg_profit }}</span></span></li>
+                            </ul>
+                            <h5 class="cyan-text text-accent-4">Performance (all time)</h5>
+                            <ul class="metrics-list">
+                                <li><b>Win Rate:</b> <span id="analytics-win_rate">—</span></li>
+                                <li><b>Max Drawdown:</b> $<span id="analytics-max_drawdown">—</span> (current $<span id="analytics-drawdown">—</span>)</li>
+                                <li><b>Sharpe / Sortino per trade:</b> <span id="analytics-sharpe_per_trade">—</span> / <span id="analytics-sortino_per_trade">—</span></li>
+                                <li><b>Fee Drag:</b> <span id="analytics-fee_drag">—</span> of the edge before fees</li>
                             </ul>
+                            <svg id="equity-chart" viewBox="0 0 600 150" preserveAspectRatio="none" style="width: 100%; height: 150px; background: #fafafa;">
+                                <line id="equity-zero" x1="0" x2="600" stroke="#bdbdbd" stroke-dasharray="4"></line>
+                                <polyline id="equity-line" fill="none" stroke="#00b8d4" stroke-width="2"></polyline>
+                            </svg>
                             <h5 class="cyan-text text-accent-4">Trade History (last 30 days)</h5>
                             <div class="table-container">
                                 <table class="striped responsive-table">
@@ -324,13 +488,17 @@ def create_flask_app(trader, dry_run):
                                             <th>Profit</th>
                                             <th>Result</th>
                                             <th>Recommendation</th>
+                                            <th>Route</th>
+                                            <th>Quantity</th>
+                                            <th>Fees</th>
+                                            <th>Est. Profit</th>
                                         </tr>
                                     </thead>
-                                    <tbody>
+                                    <tbody id="trade-rows">
                                         {% for trade in trades %}
                                         <tr>
-                                            {% for item in trade[1:] %}
-                                            <td>{{ item }}</td>
+                                            {% for item in trade.values() %}
+                                            <td>{{ item if item is not none else "" }}</td>
                                             {% endfor %}
                                         </tr>
                                         {% endfor %}
@@ -343,34 +511,279 @@ def create_flask_app(trader, dry_run):
             </div>
         </div>
         <script src="https://cdnjs.cloudflare.com/ajax/libs/materialize/1.0.0/js/materialize.min.js"></script>
+        {% raw %}
+        <script>
+        (function () {
+            var TRADE_FIELDS = ['time', 'binance_price', 'kucoin_price', 'difference', 'profit', 'result', 'recommendation', 'route', 'quantity', 'fees', 'estimated_profit'];
+            function setText(id, value) {
+                var el = document.getElementById(id);
+                if (el && value !== undefined && value !== null) { el.textContent = value; }
+            }
+            function fixed(value) { return (typeof value === 'number') ? value.toFixed(2) : value; }
+            var source = new EventSource('/stream');
+            source.onopen = function () { setText('live-status', '(live)'); };
+            source.onerror = function () { setText('live-status', '(reconnecting…)'); };
+            source.addEventListener('engine', function (e) {
+                setText('live-status', JSON.parse(e.data).connected ? '(live)' : '(engine offline)');
+            });
+            source.addEventListener('quote', function (e) {
+                var q = JSON.parse(e.data);
+                setText('quote-' + q.venue, fixed(q.price !== undefined ? q.price : (q.bid + q.ask) / 2));
+            });
+            source.addEventListener('spread', function (e) {
+                var s = JSON.parse(e.data);
+                setText('spread-difference', fixed(s.difference));
+                setText('spread-threshold', s.threshold);
+                setText('spread-zscore', s.zscore);
+            });
+            source.addEventListener('balances', function (e) {
+                var b = JSON.parse(e.data);
+                Object.keys(b).forEach(function (venue) {
+                    Object.keys(b[venue]).forEach(function (asset) {
+                        setText('balance-' + venue + '-' + asset, b[venue][asset]);
+                    });
+                });
+            });
+            source.addEventListener('metrics', function (e) {
+                var m = JSON.parse(e.data);
+                setText('metric-trade_count', m.trade_count);
+                setText('metric-total_profit', fixed(m.total_profit));
+                setText('metric-avg_profit', fixed(m.avg_profit));
+            });
+            function percent(value) { return (typeof value === 'number') ? (value * 100).toFixed(1) + '%' : '—'; }
+            function renderAnalytics(a) {
+                if (a.error) { return; }
+                setText('analytics-win_rate', percent(a.win_rate));
+                setText('analytics-max_drawdown', fixed(a.max_drawdown));
+                setText('analytics-drawdown', fixed(a.drawdown));
+                setText('analytics-sharpe_per_trade', a.sharpe_per_trade === null ? '—' : a.sharpe_per_trade.toFixed(2));
+                setText('analytics-sortino_per_trade', a.sortino_per_trade === null ? '—' : a.sortino_per_trade.toFixed(2));
+                setText('analytics-fee_drag', percent(a.fee_drag));
+                var curve = a.equity_curve;
+                if (!curve.length) { return; }
+                var values = curve.map(function (p) { return p.equity; }).concat([0]);
+                var low = Math.min.apply(null, values), high = Math.max.apply(null, values);
+                var span = (high - low) || 1;
+                function y(value) { return (145 - (value - low) / span * 140).toFixed(1); }
+                document.getElementById('equity-line').setAttribute('points', curve.map(function (p, i) {
+                    return (curve.length > 1 ? i * 600 / (curve.length - 1) : 0).toFixed(1) + ',' + y(p.equity);
+                }).join(' '));
+                var zero = document.getElementById('equity-zero');
+                zero.setAttribute('y1', y(0));
+                zero.setAttribute('y2', y(0));
+            }
+            fetch('/api/analytics').then(function (response) { return response.json(); }).then(renderAnalytics);
+            source.addEventListener('analytics', function (e) { renderAnalytics(JSON.parse(e.data)); });
+            source.addEventListener('trade', function (e) {
+                var t = JSON.parse(e.data);
+                var row = document.createElement('tr');
+                TRADE_FIELDS.forEach(function (field) {
+                    var cell = document.createElement('td');
+                    cell.textContent = (t[field] === null || t[field] === undefined) ? '' : t[field];
+                    row.appendChild(cell);
+                });
+                var body = document.getElementById('trade-rows');
+                body.insertBefore(row, body.firstChild);
+            });
+
+            // Manual trades run as background jobs; follow the job's own log stream
+            var jobBox = document.getElementById('manual-trade-box');
+            function followJob(jobId) {
+                var logEl = document.getElementById('manual-trade-log');
+                logEl.textContent = '';
+                jobBox.style.display = '';
+                setText('manual-trade-status', '(queued)');
+                var jobSource = new EventSource('/jobs/' + jobId + '/stream');
+                jobSource.addEventListener('log', function (e) {
+                    logEl.textContent += JSON.parse(e.data) + '\n';
+                });
+                jobSource.addEventListener('status', function (e) {
+                    var job = JSON.parse(e.data);
+                    setText('manual-trade-status', '(' + job.status + ')');
+                    if (job.status === 'succeeded' || job.status === 'failed') { jobSource.close(); }
+                });
+            }
+            document.getElementById('run-trade-form').addEventListener('submit', function (e) {
+                e.preventDefault();
+                fetch('/run-trade', {method: 'POST', headers: {'Accept': 'application/json'}})
+                    .then(function (response) { return response.json(); })
+                    .then(function (job) { followJob(job.job_id); });
+            });
+            if (jobBox.dataset.jobId) { followJob(jobBox.dataset.jobId); }
+        })();
+        </script>
+        {% endraw %}
         </body>
         </html>
-        ''', metrics=metrics, trades=trades, manual_trade_log=manual_trade_log,
+        ''', metrics=metrics, trades=trades, manual_job_id=manual_job_id,
         binance_api_key=BINANCE_API_KEY, kucoin_api_key=KUCOIN_API_KEY, kucoin_passphrase=KUCOIN_API_PASSPHRASE,
         binance_btc_balance=binance_btc_balance, binance_usdt_balance=binance_usdt_balance,
         kucoin_btc_balance=kucoin_btc_balance, kucoin_usdt_balance=kucoin_usdt_balance)
 
+    @app.route('/stream')
+    @login_required
+    def stream():
+        subscription = events.subscribe()
+
+        def generate():
+            try:
+                # Current state first, then deltas; no exchange or database calls per client
+                for topic, data in events.latest().items():
+                    yield format_sse(topic, data)
+                while True:
+                    event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                    if event is None:
+                        yield ': keep-alive\n\n'
+                        continue
+                    yield format_sse(event[0], event[1])
+            finally:
+                subscription.close()
+
+        return Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/api/analytics')
+    @login_required
+    def analytics():
+        # The engine publishes a fresh snapshot with every trade; until then, compute it from the database
+        try:
+            return jsonify(events.latest('analytics') or trade_logger.get_analytics())
+        except Exception as e:
+            logger.error(f"Error computing trade analytics: {e}")
+            return jsonify({'error': 'Analytics unavailable'}), 500
+
+    @app.route('/exchange-health')
+    @login_required
+    def exchange_health():
+        # Web workers have no handlers of their own; use what the engine last published
+        if trader is None:
+            return jsonify(events.latest('exchange_health') or {})
+        return jsonify(health_snapshot())
+
+    @app.route('/admin/profile', methods=['GET', 'POST'])
+    @login_required
+    def admin_profile():
+        if current_user.username not in ADMIN_USERS:
+            return jsonify({'error': 'Forbidden'}), 403
+        if request.method == 'GET':
+            return jsonify(profiler.status())
+
+        action = request.values.get('action', '')
+        if action not in PROFILE_ACTIONS:
+            return jsonify({'error': f'Unknown action: {action}'}), 400
+        seconds = None
+        if action == 'start':
+            seconds = request.values.get('seconds', PROFILE_DEFAULT_SECONDS, type=float)
+            # start_cpu caps the top end; zero or less would sample until someone stops it
+            if not seconds > 0:
+                return jsonify({'error': 'seconds must be greater than 0'}), 400
+        logger.info(f"🔬 Profiling '{action}' requested by user: {current_user.username}")
+        # Web workers forward the action to the engine, which is where the trades run
+        result = profiler.run(action, seconds)
+        if result is False:
+            return jsonify({'error': 'Trading engine is not connected'}), 503
+        if result is True:
+            # The engine's status, with the file it wrote, arrives a moment later as a 'profile' event
+            return jsonify(profiler.status())
+        output, error = result
+        if error:
+            return jsonify({'error': error}), 409
+        return jsonify(dict(profiler.status(), output=output))
+
+    @app.route('/admin/risk', methods=['GET', 'POST'])
+    @login_required
+    def admin_risk():
+        if current_user.username not in ADMIN_USERS:
+            return jsonify({'error': 'Forbidden'}), 403
+        if request.method == 'POST':
+            action = request.values.get('action', '')
+            if action not in ('halt', 'resume'):
+                return jsonify({'error': f'Unknown action: {action}'}), 400
+            if risk is None:
+                return jsonify({'error': 'No risk engine to control'}), 503
+            logger.warning(f"🛡️ Trading {action} requested by user: {current_user.username}")
+            sent = (risk.halt(f'halted by {current_user.username}') if action == 'halt' else risk.resume())
+            if sent is False:
+                return jsonify({'error': 'Trading engine is not connected'}), 503
+        # In web workers the state arrives a moment later as a 'risk' event
+        return jsonify(trader.risk.snapshot() if trader else events.latest('risk') or {})
+
+    @app.route('/admin/settings', methods=['GET', 'POST'])
+    @login_required
+    def admin_settings():
+        if current_user.username not in ADMIN_USERS:
+            return jsonify({'error': 'Forbidden'}), 403
+        if request.method == 'POST':
+            body = request.get_json(silent=True) or {}
+            action = body.get('action') or request.values.get('action', 'update')
+            if action not in ('update', 'reload', 'reset'):
+                return jsonify({'error': f'Unknown action: {action}'}), 400
+            if settings is None:
+                return jsonify({'error': 'No settings to change'}), 503
+            source = f'{current_user.username} via dashboard'
+            try:
+                if action == 'update':
+                    changes, symbol = body.get('changes'), body.get('symbol')
+                    if not isinstance(changes, dict) or not changes:
+                        return jsonify({'error': 'Expected {"changes": {NAME: value}, "symbol": optional}'}), 400
+                    # Checked here too so web workers can report errors the engine would only log
+                    runtime_settings.validate(changes, symbol)
+                    sent = settings.update(changes, symbol, source=source)
+                else:
+                    sent = settings.reload() if action == 'reload' else settings.reset()
+            except SettingsError as e:
+                return jsonify({'error': 'Invalid settings', 'errors': e.errors}), 400
+            if sent is False:
+                return jsonify({'error': 'Trading engine is not connected'}), 503
+            logger.info(f"⚙️ Settings {action} requested by user: {current_user.username}")
+        # In web workers the new values arrive a moment later as a 'settings' event
+        return jsonify(runtime_settings.snapshot() if trader else events.latest('settings') or {})
+
     @app.route('/run-trade', methods=['POST'])
     @login_required
     def run_trade():
         logger.info(f"🚀 Manual trade execution triggered by user: {current_user.username}")
-        import io
-        import logging
-        log_stream = io.StringIO()
-        stream_handler = logging.StreamHandler(log_stream)
-        stream_handler.setLevel(logging.INFO)
-        logging.getLogger().addHandler(stream_handler)
-        try:
-            result = trader.execute_trade(dry_run=dry_run, return_data=True)
-        except Exception as e:
-            logger.error(f"Manual trade error: {e}")
-        finally:
-            logging.getLogger().removeHandler(stream_handler)
-        log_contents = log_stream.getvalue()
-        log_stream.close()
-        # Show logs/errors on dashboard
-        from urllib.parse import quote
-        return redirect(url_for('dashboard', manual_trade_log=quote(log_contents)))
+        job = jobs.submit_named('manual-trade')
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'job_id': job.id,
+                            'status_url': url_for('job_status', job_id=job.id),
+                            'stream_url': url_for('job_stream', job_id=job.id)}), 202
+        # Plain form posts land on the dashboard, which follows the job's stream
+        return redirect(url_for('dashboard', job_id=job.id))
+
+    @app.route('/jobs/<job_id>')
+    @login_required
+    def job_status(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        return jsonify(job.to_dict(since=request.args.get('since', 0, type=int)))
+
+    @app.route('/jobs/<job_id>/stream')
+    @login_required
+    def job_stream(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+
+        def generate():
+            offset = 0
+            status = None
+            while True:
+                lines, finished = job.wait_for_lines(offset, timeout=SSE_HEARTBEAT_SECONDS)
+                for line in lines:
+                    yield format_sse('log', line)
+                offset += len(lines)
+                if job.status != status:
+                    status = job.status
+                    yield format_sse('status', job.to_dict(since=offset))
+                if finished:
+                    return
+                if not lines:
+                    yield ': keep-alive\n\n'
+
+        return Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
     return app
 
@@ -381,19 +794,57 @@ def main():
     parser.add_argument('--create-user', nargs=2, metavar=('username', 'password'), help='Create a dashboard user')
     parser.add_argument('--skip-network-check', action='store_true', help='Skip network connectivity check')
     parser.add_argument('--trading-interval', type=int, help='Override trading interval in seconds')
+    parser.add_argument('--triangular', action='store_true', help='Also scan KuCoin for triangular arbitrage cycles')
+    parser.add_argument('--with-scheduler', action='store_true', help='With --web, also run the trading scheduler in-process')
+    parser.add_argument('--sharded', action='store_true',
+                        help='Scan TRADING_SYMBOLS across worker processes instead of the interval scheduler')
+    parser.add_argument('--archive', action='store_true',
+                        help='Export closed yearly trade databases to Parquet and exit')
+    parser.add_argument('--fetch-history', nargs=2, metavar=('START', 'END'),
+                        help='Download TRADING_SYMBOLS klines from START to END (ISO dates, UTC) into the '
+                             'history cache and exit')
+    parser.add_argument('--history-interval', default='1m', help='Kline interval for --fetch-history (default: 1m)')
+    parser.add_argument('--publish-state', action='store_true',
+                        help=f'Publish engine state and accept manual trades on a Unix socket ({ENGINE_SOCKET_PATH})')
+    parser.add_argument('--profile', type=float, metavar='SECONDS',
+                        help='Sample CPU stacks for the first SECONDS and write a flamegraph profile to PROFILE_DIR')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Trace allocations with tracemalloc from startup (snapshots via /admin/profile)')
     args = parser.parse_args()
 
-    # Override trading interval if specified
-    global TRADING_INTERVAL
+    if args.profile is not None and args.profile <= 0:
+        parser.error('--profile SECONDS must be greater than 0')
+    if args.profile:
+        runtime_profiler.start_cpu(args.profile)
+    if args.trace_memory:
+        runtime_profiler.start_memory()
+
+    # Override trading interval if specified, as a runtime setting the scheduler follows
     if args.trading_interval:
-        TRADING_INTERVAL = args.trading_interval
-        logger.info(f"⏰ Trading interval overridden to {TRADING_INTERVAL} seconds")
+        try:
+            runtime_settings.update({'TRADING_INTERVAL': args.trading_interval}, source='--trading-interval')
+        except SettingsError:
+            sys.exit(1)
+        logger.info(f"⏰ Trading interval overridden to {args.trading_interval} seconds")
 
     if args.create_user:
         username, password = args.create_user
         create_user(username, password)
         sys.exit(0)
 
+    if args.archive:
+        TradeDB().archive_old_dbs()
+        sys.exit(0)
+
+    if args.fetch_history:
+        from exchanges.binance_client import BinanceHandler
+        from exchanges.kucoin_client import KuCoinHandler
+        from utils.history import HistoryLoader
+        loader = HistoryLoader({'binance': BinanceHandler(), 'kucoin': KuCoinHandler()})
+        start, end = args.fetch_history
+        # Failed chunks are retried on the next run; finished ones are never downloaded again
+        sys.exit(1 if loader.prefetch(TRADING_SYMBOLS, args.history_interval, start, end) else 0)
+
     # Check network connectivity unless skipped
     if not args.skip_network_check:
         if not check_network_connectivity():
@@ -407,14 +858,36 @@ def main():
     FileHandler.clear_files()
     
     logger.info("🤖 Initializing ArbitrageTrader...")
-    trader = ArbitrageTrader()
+    # Imported here so processes that only serve the dashboard never load the exchange SDKs
+    from trading.arbitrage import ArbitrageTrader
+    trader = ArbitrageTrader(paper=args.dry_run)
+
+    logger.info("🕒 Synchronizing exchange clocks...")
+    time_sync.start()
+    logger.info("📒 Replaying the trade journal...")
+    trader.recover_trades()
+    runtime_settings.start_watcher()
+    event_bus.publish('settings', runtime_settings.snapshot())
+
+    if not args.dry_run:
+        trader.prepare_order_templates()
+
+    # One queue for manual trades, whether they come from this dashboard or a web worker
+    jobs = create_engine_jobs(trader, args.dry_run, events=event_bus)
+    if args.publish_state:
+        StatePublisher(event_bus, ENGINE_SOCKET_PATH, jobs, risk=trader.risk,
+                       settings=runtime_settings, profiler=runtime_profiler).start()
 
     if args.web:
         logger.info("🌐 Starting in web dashboard mode...")
-        run_web_dashboard(trader, args.dry_run)
+        run_web_dashboard(trader, args.dry_run, with_scheduler=args.with_scheduler, triangular=args.triangular,
+                          jobs=jobs)
+    elif args.sharded:
+        logger.info("🧩 Starting in sharded scanner mode...")
+        run_sharded_scanner(trader, args.dry_run)
     else:
         logger.info("⏰ Starting in scheduler mode...")
-        run_scheduler(trader, args.dry_run)
+        run_scheduler(trader, args.dry_run, triangular=args.triangular)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,211 @@
+import math
+from config.settings import ANALYTICS_CURVE_POINTS
+
+
+def trade_direction(trade):
+    """
+    Which way a stored trade went: 'binance→kucoin' for pair trades (buy
+    venue first), 'triangular' for single-venue cycles.
+    """
+    route = trade.route
+    if route:
+        # Pair routes are 'SYMBOL: buy→sell', cycles 'A→B→C→A'
+        return route.split(': ', 1)[1] if ': ' in route else 'triangular'
+    # Rows from the original two-venue trade only carry 'Buy on X and sell on Y'
+    words = (trade.recommendation or '').lower().split()
+    if len(words) == 7 and words[0] == 'buy' and words[4] == 'sell':
+        return f'{words[2]}→{words[6]}'
+    return 'unknown'
+
+
+class _WinStats:
+    __slots__ = ('count', 'wins', 'profit')
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.profit = 0.0
+
+    def update(self, profit):
+        self.count += 1
+        self.wins += profit > 0
+        self.profit += profit
+
+    def to_dict(self):
+        return {'count': self.count, 'wins': self.wins, 'profit': self.profit,
+                'win_rate': self.wins / self.count if self.count else None}
+
+
+class EquityCurve:
+    """
+    Cumulative P&L downsampled to at most `max_points` points.
+
+    Every `stride`-th trade is kept; when the buffer fills, every other
+    point is dropped and the stride doubles, so memory stays constant and
+    the points stay evenly spread over the whole history. The latest point
+    is always reported as well.
+    """
+    __slots__ = ('max_points', 'stride', 'points', 'last', '_seen')
+
+    def __init__(self, max_points):
+        self.max_points = max_points
+        self.stride = 1
+        self.points = []
+        self.last = None
+        self._seen = 0
+
+    def update(self, time, equity):
+        self.last = (time, equity)
+        if self._seen % self.stride == 0:
+            if len(self.points) >= self.max_points:
+                self.points = self.points[::2]
+                self.stride *= 2
+            if self._seen % self.stride == 0:
+                self.points.append(self.last)
+        self._seen += 1
+
+    def to_list(self):
+        points = self.points if not self.points or self.points[-1] is self.last else self.points + [self.last]
+        return [{'time': time, 'equity': equity} for time, equity in points]
+
+
+class TradeAnalytics:
+    """
+    Realized P&L and risk statistics, updated one trade at a time.
+
+    Each update is O(1) and the state has a fixed size whatever the number
+    of trades: running sums for the profit mean and variance (Welford) and
+    the downside deviation, the equity peak for drawdown, 24 hourly
+    buckets, one bucket per trade direction and a downsampled equity
+    curve. A trade wins when its profit is positive; trades without a
+    recorded profit are only counted. DRY RUN trades are counted and their
+    profit summed on its own, outside equity, drawdown and every ratio.
+    Profits are summed as recorded, so triangular cycles add their profit
+    in the cycle's start asset.
+
+    Methods
+    -------
+    update(trade):
+        Adds one TradeRecord; trades must arrive oldest first.
+    from_trades(trades):
+        Builds the statistics from any iterable of TradeRecords, such as
+        TradeDB.iter_trades(), without holding them in memory.
+    snapshot():
+        All statistics, and the equity curve, as a JSON-ready dict.
+    """
+    def __init__(self, curve_points=ANALYTICS_CURVE_POINTS):
+        self.trade_count = 0
+        self.unpriced = 0
+        self.dry_run = 0
+        self.dry_run_priced = 0
+        self.dry_run_profit = 0.0
+        self.wins = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._downside_sq = 0.0
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.max_drawdown_at = None
+        self.fees = 0.0
+        self.fee_trades = 0
+        self.fee_trade_profit = 0.0
+        self.first_time = None
+        self.last_time = None
+        self.by_direction = {}
+        self.by_hour = [_WinStats() for _ in range(24)]
+        self.curve = EquityCurve(curve_points)
+
+    @classmethod
+    def from_trades(cls, trades, **kwargs):
+        analytics = cls(**kwargs)
+        for trade in trades:
+            analytics.update(trade)
+        return analytics
+
+    @property
+    def priced(self):
+        return self.trade_count - self.unpriced - self.dry_run
+
+    def update(self, trade):
+        self.trade_count += 1
+        profit = trade.profit
+        if trade.result == 'DRY RUN':
+            # Simulated fills never moved money, so they stay out of the P&L statistics
+            self.dry_run += 1
+            if profit is not None:
+                self.dry_run_priced += 1
+                self.dry_run_profit += profit
+            return
+        if profit is None:
+            self.unpriced += 1
+            return
+
+        n = self.priced
+        delta = profit - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (profit - self.mean)
+        if profit > 0:
+            self.wins += 1
+            self.gross_profit += profit
+        else:
+            self.gross_loss -= profit
+            self._downside_sq += profit * profit
+
+        self.equity += profit
+        if self.equity > self.peak:
+            self.peak = self.equity
+        elif self.peak - self.equity > self.max_drawdown:
+            self.max_drawdown = self.peak - self.equity
+            self.max_drawdown_at = trade.time
+
+        if trade.fees is not None:
+            self.fees += trade.fees
+            self.fee_trades += 1
+            self.fee_trade_profit += profit
+
+        self.first_time = self.first_time or trade.time
+        self.last_time = trade.time
+        direction = trade_direction(trade)
+        stats = self.by_direction.get(direction)
+        if stats is None:
+            stats = self.by_direction[direction] = _WinStats()
+        stats.update(profit)
+        # Stored times are 'YYYY-MM-DD HH:MM:SS'
+        self.by_hour[int(trade.time[11:13])].update(profit)
+        self.curve.update(trade.time, self.equity)
+
+    def snapshot(self):
+        n = self.priced
+        std = math.sqrt(self._m2 / (n - 1)) if n > 1 else None
+        downside = math.sqrt(self._downside_sq / n) if n else None
+        # Share of the edge before fees that the fees took, over trades that recorded them
+        gross_edge = self.fee_trade_profit + self.fees
+        return {
+            'trade_count': self.trade_count,
+            'priced_trades': n,
+            'unpriced_trades': self.unpriced,
+            'dry_run_trades': self.dry_run,
+            'dry_run_priced_trades': self.dry_run_priced,
+            'dry_run_profit': self.dry_run_profit,
+            'first_trade': self.first_time,
+            'last_trade': self.last_time,
+            'total_profit': self.equity,
+            'avg_profit': self.mean if n else 0.0,
+            'profit_std': std,
+            'win_rate': self.wins / n if n else None,
+            'profit_factor': self.gross_profit / self.gross_loss if self.gross_loss else None,
+            'sharpe_per_trade': self.mean / std if std else None,
+            'sortino_per_trade': self.mean / downside if downside else None,
+            'peak_equity': self.peak,
+            'drawdown': self.peak - self.equity,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_at': self.max_drawdown_at,
+            'total_fees': self.fees,
+            'fee_drag': self.fees / gross_edge if gross_edge > 0 else None,
+            'by_direction': {direction: stats.to_dict() for direction, stats in self.by_direction.items()},
+            'by_hour': [stats.to_dict() for stats in self.by_hour],
+            'equity_curve': self.curve.to_list(),
+        }
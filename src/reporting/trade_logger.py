@@ -1,6 +1,11 @@
 from datetime import datetime
+import time
 from utils.db import TradeDB
-from tabulate import tabulate
+from reporting.analytics import TradeAnalytics
+from utils.event_bus import event_bus
+from utils.records import TradeRecord
+from config.settings import DASHBOARD_CACHE_SECONDS
+from utils.logger import logger
 
 class TradeLogger:
     """
@@ -11,47 +16,129 @@ class TradeLogger:
         An instance of TradeDB to manage database operations.
     headers : list
         A list of headers for the trade data.
+    events : EventBus
+        Bus that receives a 'trade', a 'metrics' and an 'analytics' event for every logged trade.
     Methods
     -------
     __init__()
         Initializes the TradeLogger with a TradeDB and headers.
     log_trade(time, binance_price, kucoin_price, difference, profit)
-        Logs trade information, prints it in a table format, and saves it to the database.
+        Logs trade information as one line and saves it to the database.
+        quantity, fees and estimated_profit record the reconciled fills when known;
+        trade_id is the journal id the row is stored under.
+    log_cycle_trade(time, cycle, venue, start_amount, end_amount, profit)
+        Logs a single-venue triangular trade together with its currency path.
+    log_route_trade(time, route, quantity, profit)
+        Logs a cross-venue trade on any symbol and venue pair, under its journal trade_id.
+    get_trades(since_days=None)
+        Returns stored trades as TradeRecords, newest first.
+    get_dashboard_data(since_days=30)
+        Returns (metrics, trades) from a short-lived cache shared by all dashboard views.
+    get_analytics()
+        Returns the all-time P&L and risk statistics (TradeAnalytics.snapshot()).
     """
-    def __init__(self):
+    def __init__(self, events=event_bus):
         self.db = TradeDB()
+        self.events = events
         self.headers = ["Time", "Binance Price", "KuCoin Price", 
                        "Difference", "Profit", "Result", "Recommendation"]
+        self._dashboard_cache = None
+        self._analytics = None
 
-    def log_trade(self, time, binance_price, kucoin_price, difference, profit, dry_run=False, return_data=False):
-        result = "DRY RUN" if dry_run else ("Successful" if profit >= 0.01 else "Failed")
+    @staticmethod
+    def _result(profit, dry_run):
+        return "DRY RUN" if dry_run else ("Successful" if profit > 0 else "Failed")
+
+    def _record(self, trade, trade_id=None):
+        # Built from the database before the first insert, then kept current one trade at a time
+        analytics = self._load_analytics()
+        trade.id = self.db.insert_trade(*trade.values(), trade_id=trade_id)
+        self._dashboard_cache = None
+        self.events.publish('trade', trade.to_dict())
+        analytics.update(trade)
+        snapshot = analytics.snapshot()
+        # The dashboard's headline figures come from the running statistics, not a database scan. Like
+        # get_metrics() they cover every stored trade, dry runs included
+        total_profit = snapshot['total_profit'] + snapshot['dry_run_profit']
+        priced = snapshot['priced_trades'] + snapshot['dry_run_priced_trades']
+        self.events.publish('metrics', {'trade_count': snapshot['trade_count'], 'total_profit': total_profit,
+                                        'avg_profit': total_profit / priced if priced else 0.0})
+        self.events.publish('analytics', snapshot)
+
+    def log_trade(self, time, binance_price, kucoin_price, difference, profit, dry_run=False, return_data=False,
+                  quantity=None, fees=None, estimated_profit=None, trade_id=None):
+        result = self._result(profit, dry_run)
         recommendation = ('Buy on KuCoin and sell on Binance' 
                          if binance_price > kucoin_price 
                          else 'Buy on Binance and sell on KuCoin')
 
-        data = [
-            time.strftime('%Y-%m-%d %H:%M:%S'),
-            float(binance_price),
-            float(kucoin_price),
-            float(difference),
-            float(profit),
-            result,
-            recommendation
-        ]
-
-        # Print results in table format
-        table_data = [self.headers, [
-            data[0], f'${data[1]}', f'${data[2]}', f'${data[3]:.2f}', f'${data[4]:.2f}', data[5], data[6]
-        ]]
-        print(tabulate(table_data, headers="firstrow", tablefmt="grid"))
+        trade = TradeRecord(time.strftime('%Y-%m-%d %H:%M:%S'), float(binance_price), float(kucoin_price),
+                            float(difference), float(profit), result, recommendation,
+                            quantity=quantity, fees=fees, estimated_profit=estimated_profit)
+
+        # One formatted line per trade; building a table here cost more than the insert
+        logger.info(f"📝 {trade.time} Binance ${trade.binance_price} KuCoin ${trade.kucoin_price} "
+                    f"diff ${trade.difference:.2f} profit ${trade.profit:.2f} {result}: {recommendation}")
 
         # Log ALL trades to database (both dry run and real)
-        self.db.insert_trade(*data)
+        self._record(trade, trade_id)
+        if return_data:
+            return [trade.time, f'${trade.binance_price}', f'${trade.kucoin_price}', f'${trade.difference:.2f}',
+                    f'${trade.profit:.2f}', result, recommendation]
+
+    def log_cycle_trade(self, time, cycle, venue, start_amount, end_amount, profit, dry_run=False, return_data=False):
+        result = self._result(profit, dry_run)
+        route = '→'.join(cycle.path)
+        recommendation = f'Triangular cycle on {venue}'
+
+        trade = TradeRecord(time.strftime('%Y-%m-%d %H:%M:%S'), None, None, float(end_amount - start_amount),
+                            float(profit), result, recommendation, route)
+
+        logger.info(f"📝 {trade.time} {venue} {route} {start_amount:.8f} → {end_amount:.8f} "
+                    f"profit {trade.profit:.8f} {result}")
+
+        self._record(trade)
         if return_data:
-            return table_data[1]
+            return [trade.time, venue, route, f'{start_amount:.8f}', f'{end_amount:.8f}', f'{trade.profit:.8f}',
+                    result]
+
+    def log_route_trade(self, time, route, quantity, profit, dry_run=False, return_data=False,
+                        buy_price=None, sell_price=None, fees=None, estimated_profit=None, trade_id=None):
+        result = self._result(profit, dry_run)
+        # Filled prices when known, otherwise the quotes the route was found at
+        buy_price = route.buy_price if buy_price is None else buy_price
+        sell_price = route.sell_price if sell_price is None else sell_price
+        prices = {route.buy_venue: buy_price, route.sell_venue: sell_price}
+
+        trade = TradeRecord(time.strftime('%Y-%m-%d %H:%M:%S'), prices.get('binance'), prices.get('kucoin'),
+                            float(sell_price - buy_price), float(profit), result,
+                            f'Buy on {route.buy_venue} and sell on {route.sell_venue}',
+                            f'{route.symbol}: {route.buy_venue}→{route.sell_venue}',
+                            quantity=quantity, fees=fees, estimated_profit=estimated_profit)
+
+        logger.info(f"📝 {trade.time} {trade.route} {quantity:.8f} @ {buy_price} → {sell_price} "
+                    f"profit ${trade.profit:.2f} {result}")
+
+        self._record(trade, trade_id)
+        if return_data:
+            return [trade.time, trade.route, f'{quantity:.8f}', buy_price, sell_price, f'{trade.profit:.2f}', result]
 
     def get_trades(self, since_days=None):
         return self.db.get_trades(since_days=since_days)
 
     def get_metrics(self, since_days=None):
         return self.db.get_metrics(since_days=since_days)
+
+    def _load_analytics(self):
+        if self._analytics is None:
+            self._analytics = TradeAnalytics.from_trades(self.db.iter_trades())
+        return self._analytics
+
+    def get_analytics(self):
+        return self._load_analytics().snapshot()
+
+    def get_dashboard_data(self, since_days=30):
+        now = time.monotonic()
+        if self._dashboard_cache is None or now - self._dashboard_cache[0] > DASHBOARD_CACHE_SECONDS:
+            self._dashboard_cache = (now, self.get_metrics(), self.get_trades(since_days=since_days))
+        return self._dashboard_cache[1], self._dashboard_cache[2]
@@ -1,10 +1,34 @@
 from datetime import datetime
+import uuid
 from exchanges.binance_client import BinanceHandler
 from exchanges.kucoin_client import KuCoinHandler
+from exchanges.paper import LiveBooks, PaperExchange
+from exchanges.order_templates import lot_step
 from trading.position import PositionManager
+from trading.spread_matrix import SpreadMatrix, Route
+from trading.consolidated_book import ConsolidatedBook, BIDS, ASKS
+from trading.spread_stats import SpreadStats
+from trading.triangular import TriangularArbitrage
+from trading.inventory import InventoryTracker, RebalancePlanner
+from trading.sizing import SizingEngine
+from trading.order_manager import OrderManager
+from trading.risk import RiskEngine
 from reporting.trade_logger import TradeLogger
-from config.settings import ARBITRAGE_THRESHOLD
+from utils.records import Opportunity, Order, Quote, QuoteHistory
+from utils.journal import TradeJournal, OPENED, SUBMITTED, FILLED, LOGGED, ABORTED, INTERRUPTED
+from utils.db import JOURNAL_FILE
+from config.runtime import runtime_settings, SCHEMA
+from config.settings import (EXCHANGE_FEE_RATES, TRADING_SYMBOLS, TOP_ROUTES,
+                             TRIANGULAR_START_CURRENCY, TRIANGULAR_CURRENCIES, TRIANGULAR_MIN_EDGE,
+                             INVENTORY_ASSETS, INVENTORY_RESYNC_INTERVAL, WITHDRAWAL_FEES, TRANSFER_TIMES,
+                             REBALANCE_TRIGGER_RATIO, ORDER_BOOK_DEPTH, TRADED_ASSETS,
+                             QUOTE_HISTORY_SIZE, SPREAD_EWMA_ALPHA, SPREAD_WINDOW, SPREAD_MIN_SAMPLES,
+                             ORDER_POLL_INTERVAL, ORDER_FILL_TIMEOUT, PAPER_BALANCES, PAPER_LATENCY)
 from utils.logger import logger
+from utils.event_bus import event_bus
+from utils.time_sync import time_sync, timeline
+
+VENUE_NAMES = {'binance': 'Binance', 'kucoin': 'KuCoin'}
 
 class ArbitrageTrader:
     """
@@ -16,28 +40,141 @@ class ArbitrageTrader:
         An instance of BinanceHandler to interact with Binance exchange.
     kucoin : KuCoinHandler
         An instance of KuCoinHandler to interact with KuCoin exchange.
+    venues : dict
+        Exchange handlers keyed by venue name; PaperExchanges in paper mode.
+    paper : bool
+        True when every venue is simulated, so dry runs place (simulated) orders.
+    spread_matrix : SpreadMatrix
+        Fee-adjusted N x N spread matrix across all venues and symbols.
+    books : ConsolidatedBook
+        Every venue's order book levels merged into one fee-adjusted book per symbol.
+    quote_history : QuoteHistory
+        Array-backed ring of the most recent quotes: the top of every book
+        refresh_books() fetches, and everything update_quotes() polls.
+    spread_stats : SpreadStats
+        Rolling spread statistics behind the adaptive opportunity threshold.
+    triangular : TriangularArbitrage
+        Currency graph of KuCoin markets used for triangular arbitrage.
+    inventory : InventoryTracker
+        Per-venue balances kept up to date from fills.
+    rebalance_planner : RebalancePlanner
+        Plans transfers that keep both trade directions funded.
+    sizing_engine : SizingEngine
+        Picks the largest profitable quantity from order book depth and balances.
+    order_manager : OrderManager
+        Tracks placed orders to completion and reconciles their actual fills.
+    events : EventBus
+        Bus receiving 'quote', 'spread' and 'balances' events for the live dashboard.
+    risk : RiskEngine
+        Daily loss, exposure, order-rate, failure and quote-age limits with a kill switch.
     position_manager : PositionManager
         An instance of PositionManager to manage trading positions.
     trade_logger : TradeLogger
         An instance of TradeLogger to log trade details.
+    journal : TradeJournal
+        Write-ahead journal of each cross-venue trade's steps; a no-op in paper mode.
     Methods
     -------
-    check_arbitrage_opportunity(binance_price, kucoin_price, threshold=ARBITRAGE_THRESHOLD):
+    check_arbitrage_opportunity(binance_price, kucoin_price, threshold=None):
         Checks if there is an arbitrage opportunity based on the price difference
-        between Binance and KuCoin exchanges.
+        between Binance and KuCoin exchanges; returns an Opportunity or False.
+        The threshold defaults to the current ARBITRAGE_THRESHOLD.
+        Once enough spreads have been seen, the fixed threshold is replaced by
+        SpreadStats' adaptive, fee-aware one. When refresh_books() has loaded
+        books from two or more venues, both are replaced by the consolidated
+        book: an opportunity is its best bid above its best ask after fees,
+        by at least SPREAD_MIN_EDGE, at those executable prices.
+    refresh_books(symbol='BTC/USDT'):
+        Fetches every venue's order book into the consolidated book; returns
+        the books fetched, keyed by venue.
     execute_trade():
         Executes a trade if an arbitrage opportunity is detected, logs the trade,
         and handles stop-loss conditions.
+    update_quotes(symbols=TRADING_SYMBOLS):
+        Fetches the best bid/ask for each symbol on every venue into the spread matrix.
+    scan_routes(symbols=TRADING_SYMBOLS, top_k=TOP_ROUTES):
+        Refreshes quotes and returns the top-k most profitable routes after fees.
+    scan_triangular():
+        Refreshes KuCoin bulk tickers and returns profitable cycles through the start currency.
+    execute_triangular_trade():
+        Executes the best triangular cycle on KuCoin and logs it with its currency path.
+    refresh_inventory(force=False):
+        Re-seeds tracked balances from the exchanges when they are missing or stale.
+    log_rebalance_plan():
+        Logs the transfers needed to keep both directions funded.
+    size_position(buy_venue, sell_venue, buy_price, sell_price, symbol='BTC/USDT', books=None):
+        Returns (quantity, profit) sized from both order books (those in books
+        when given, as returned by refresh_books()), falling back to the fixed
+        allocation when a book is unavailable.
+    execute_route(route):
+        Sizes and executes a Route between any two venues (e.g. from the sharded scanner).
+    prepare_order_templates(symbols=TRADING_SYMBOLS):
+        Pre-builds each venue's signed-order templates so submission skips request building.
+    recover_trades():
+        Resolves the trades the journal shows in flight when the process
+        last stopped: fetches their orders (by client order id when the
+        acknowledgement never made it to the journal), logs trades whose
+        legs both filled unless their row is already stored, and halts
+        trading if one was left with a single leg.
+    apply_settings(settings, changed):
+        Pushes changed runtime settings into the spread statistics and the risk engine.
     """
-    def __init__(self):
+    def __init__(self, events=event_bus, paper=False, venues=None):
         logger.info("🔧 Initializing ArbitrageTrader...")
-        self.binance = BinanceHandler()
-        self.kucoin = KuCoinHandler()
+        self.events = events
+        if venues is None:
+            venues = {'binance': BinanceHandler(), 'kucoin': KuCoinHandler()}
+            for venue, handler in venues.items():
+                time_sync.add_venue(venue, handler)
+            if paper:
+                # Live public market data, simulated balances and fills
+                logger.info("🧪 Paper trading against live order books")
+                venues = {venue: PaperExchange(venue, LiveBooks(handler), PAPER_BALANCES[venue],
+                                               fee_rate=EXCHANGE_FEE_RATES[venue], latency=PAPER_LATENCY[venue])
+                          for venue, handler in venues.items()}
+        self.venues = venues
+        self.binance = venues.get('binance')
+        self.kucoin = venues.get('kucoin')
+        self.paper = all(getattr(handler, 'simulated', False) for handler in venues.values())
+        self.spread_matrix = SpreadMatrix(self.venues, EXCHANGE_FEE_RATES)
+        self.books = ConsolidatedBook(self.venues, EXCHANGE_FEE_RATES)
+        self.quote_history = QuoteHistory(QUOTE_HISTORY_SIZE)
+        self.spread_stats = SpreadStats(
+            EXCHANGE_FEE_RATES, alpha=SPREAD_EWMA_ALPHA, window=SPREAD_WINDOW,
+            z_entry=runtime_settings.SPREAD_Z_ENTRY, quantile=runtime_settings.SPREAD_QUANTILE,
+            min_edge=runtime_settings.SPREAD_MIN_EDGE, min_samples=SPREAD_MIN_SAMPLES)
+        self.triangular = TriangularArbitrage(
+            fee_rate=EXCHANGE_FEE_RATES['kucoin'], min_edge=TRIANGULAR_MIN_EDGE,
+            currencies=TRIANGULAR_CURRENCIES)
+        self._triangular_searched = False
+        self.inventory = InventoryTracker()
+        self.rebalance_planner = RebalancePlanner(
+            self.inventory, WITHDRAWAL_FEES, TRANSFER_TIMES, trigger_ratio=REBALANCE_TRIGGER_RATIO)
+        self.sizing_engine = SizingEngine()
+        self.order_manager = OrderManager(self.venues, events, poll_interval=ORDER_POLL_INTERVAL)
+        self.risk = RiskEngine(events=events)
         self.position_manager = PositionManager()
-        self.trade_logger = TradeLogger()
+        self.trade_logger = TradeLogger(events)
+        self.journal = TradeJournal(None if self.paper else JOURNAL_FILE)
+        self.apply_settings(runtime_settings, set(SCHEMA))
+        runtime_settings.subscribe(self.apply_settings)
         logger.info("✅ ArbitrageTrader initialized successfully")
 
-    def check_arbitrage_opportunity(self, binance_price, kucoin_price, threshold=ARBITRAGE_THRESHOLD):
+    def apply_settings(self, settings, changed):
+        # Everything else is read from the settings on each use
+        if changed & {'SPREAD_Z_ENTRY', 'SPREAD_QUANTILE', 'SPREAD_MIN_EDGE'}:
+            self.spread_stats.configure(
+                settings.SPREAD_Z_ENTRY, settings.SPREAD_QUANTILE, settings.SPREAD_MIN_EDGE,
+                {symbol: (settings.get('SPREAD_Z_ENTRY', symbol), settings.get('SPREAD_QUANTILE', symbol),
+                          settings.get('SPREAD_MIN_EDGE', symbol)) for symbol in settings.symbols})
+        if any(name.startswith('RISK_') for name in changed):
+            self.risk.configure(settings.RISK_DAILY_LOSS_LIMIT, settings.RISK_MAX_OPEN_NOTIONAL,
+                                settings.RISK_MAX_ORDERS_PER_MINUTE, settings.RISK_MAX_CONSECUTIVE_FAILURES,
+                                settings.RISK_MAX_QUOTE_AGE)
+
+    def check_arbitrage_opportunity(self, binance_price, kucoin_price, threshold=None):
+        if threshold is None:
+            threshold = runtime_settings.get('ARBITRAGE_THRESHOLD', 'BTC/USDT')
         logger.info(f"🔍 Checking arbitrage opportunity...")
         logger.info(f"   Binance BTC Price: ${binance_price}")
         logger.info(f"   KuCoin BTC Price: ${kucoin_price}")
@@ -48,17 +185,542 @@ class ArbitrageTrader:
         
         difference = abs(binance_price - kucoin_price)
         logger.info(f"   Price Difference: ${difference:.2f}")
-        logger.info(f"   Threshold: ${threshold}")
-        
-        if difference >= threshold:
+
+        signal = self.spread_stats.update_pair('BTC/USDT', 'binance', binance_price, 'kucoin', kucoin_price)
+        buy_price = min(binance_price, kucoin_price)
+        route = None
+        if len(self.books.venues('BTC/USDT')) >= 2:
+            # Executable prices across every venue instead of a last-price compare
+            route = self.books.crossing('BTC/USDT')
+            min_edge = runtime_settings.get('SPREAD_MIN_EDGE', 'BTC/USDT')
+            opportunity = route is not None and route.net_edge >= min_edge
+            threshold = min_edge * buy_price
+            bid, ask = self.books.best('BTC/USDT', BIDS), self.books.best('BTC/USDT', ASKS)
+            logger.info(f"   Consolidated book: best bid {bid.price} on {bid.venue}, "
+                        f"best ask {ask.price} on {ask.venue}")
+            logger.info(f"   Net edge after fees: "
+                        f"{(bid.effective_price - ask.effective_price) / ask.effective_price * 100:.4f}% "
+                        f"(min {min_edge * 100:.4f}%)")
+        elif signal.ready:
+            # Adaptive, fee-aware threshold relative to the recent spread between the venues
+            opportunity = self.spread_stats.is_dislocated(signal)
+            threshold = signal.threshold * buy_price
+            logger.info(f"   Spread: {signal.spread * 100:.4f}% (mean {signal.mean * 100:.4f}%, "
+                        f"std {signal.std * 100:.4f}%, z {signal.zscore:.2f})")
+            logger.info(f"   Adaptive Threshold: {signal.threshold * 100:.4f}% (${threshold:.2f})")
+        else:
+            opportunity = difference >= threshold
+            logger.info(f"   Threshold: ${threshold} (spread statistics warming up)")
+        self.events.publish('spread', {'symbol': 'BTC/USDT', 'difference': difference,
+                                       'threshold': round(threshold, 2), 'zscore': round(signal.zscore, 2),
+                                       'opportunity': opportunity})
+
+        if opportunity and route is not None:
+            logger.info(f"🎯 ARBITRAGE OPPORTUNITY DETECTED!")
+            logger.info(f"   Buy on {route.buy_venue} @ ${route.buy_price}, sell on {route.sell_venue} "
+                        f"@ ${route.sell_price} (net edge {route.net_edge * 100:.4f}%)")
+            return Opportunity('BTC/USDT', route.buy_venue, route.sell_venue, route.buy_price, route.sell_price,
+                               threshold)
+        if opportunity:
             logger.info(f"🎯 ARBITRAGE OPPORTUNITY DETECTED!")
             logger.info(f"   Binance: ${binance_price}, KuCoin: ${kucoin_price}")
-            logger.info(f"   Difference: ${difference:.2f} (>= ${threshold})")
-            return True
-        
-        logger.info(f"⏳ No arbitrage opportunity (difference ${difference:.2f} < threshold ${threshold})")
+            logger.info(f"   Difference: ${difference:.2f} (>= ${threshold:.2f})")
+            # Buy where BTC is cheaper
+            if binance_price > kucoin_price:
+                return Opportunity('BTC/USDT', 'kucoin', 'binance', kucoin_price, binance_price, threshold)
+            return Opportunity('BTC/USDT', 'binance', 'kucoin', binance_price, kucoin_price, threshold)
+
+        logger.info(f"⏳ No arbitrage opportunity (difference ${difference:.2f} < threshold ${threshold:.2f})")
         return False
 
+    def refresh_books(self, symbol='BTC/USDT'):
+        books = {}
+        for venue, handler in self.venues.items():
+            book = handler.get_order_book(symbol, ORDER_BOOK_DEPTH)
+            if book is None:
+                self.books.remove_venue(symbol, venue)
+            else:
+                self.books.set_book(symbol, venue, *book)
+                books[venue] = book
+                bids, asks = book
+                if bids and asks:
+                    # The top of every book the trading loop fetches is the quote stream we archive
+                    self._record_quote(Quote(venue, symbol, bids[0][0], asks[0][0]))
+        return books
+
+    def _record_quote(self, quote):
+        self.spread_matrix.update_quote(quote.symbol, quote.venue, quote.bid, quote.ask)
+        self.quote_history.append(quote)
+
+    def update_quotes(self, symbols=TRADING_SYMBOLS):
+        for venue, handler in self.venues.items():
+            for symbol in symbols:
+                quote = handler.get_best_bid_ask(symbol)
+                if quote is None:
+                    self.spread_matrix.remove_quote(symbol, venue)
+                else:
+                    self._record_quote(quote)
+                    self.events.publish('quote', quote.to_dict())
+
+    def scan_routes(self, symbols=TRADING_SYMBOLS, top_k=TOP_ROUTES):
+        self.update_quotes(symbols)
+        routes = self.spread_matrix.top_routes(top_k, symbols=symbols)
+        if not routes:
+            logger.info("⏳ No profitable route across venues after fees")
+        for route in routes:
+            logger.info(f"🎯 {route.symbol}: buy on {route.buy_venue} @ {route.buy_price}, "
+                        f"sell on {route.sell_venue} @ {route.sell_price} "
+                        f"(net edge {route.net_edge * 100:.3f}%)")
+        return routes
+
+    def refresh_inventory(self, force=False):
+        last_sync = self.inventory.last_sync
+        if force or last_sync is None or self.inventory.clock() - last_sync >= INVENTORY_RESYNC_INTERVAL:
+            logger.info("🔄 Syncing balances from exchanges...")
+            self.inventory.sync(self.venues, INVENTORY_ASSETS)
+            self.events.publish('balances', self.inventory.snapshot())
+
+    def log_rebalance_plan(self):
+        transfers = self.rebalance_planner.plan(TRADED_ASSETS)
+        for transfer in transfers:
+            logger.warning(
+                f"🔁 Rebalance: move {transfer.amount:.8f} {transfer.asset} from "
+                f"{VENUE_NAMES.get(transfer.from_venue, transfer.from_venue)} to "
+                f"{VENUE_NAMES.get(transfer.to_venue, transfer.to_venue)} "
+                f"(fee {transfer.fee} {transfer.asset}, send at "
+                f"{datetime.fromtimestamp(transfer.send_at):%Y-%m-%d %H:%M:%S}, {transfer.reason})")
+        return transfers
+
+    def size_position(self, buy_venue, sell_venue, buy_price, sell_price, symbol='BTC/USDT', books=None):
+        base, quote = symbol.split('/', 1)
+        books = books or {}
+        buy_book = books.get(buy_venue) or self.venues[buy_venue].get_order_book(symbol, ORDER_BOOK_DEPTH)
+        sell_book = books.get(sell_venue) or self.venues[sell_venue].get_order_book(symbol, ORDER_BOOK_DEPTH)
+
+        if buy_book is None or sell_book is None:
+            logger.warning("⚠️ Order book unavailable, falling back to fixed allocation")
+            usd_amount = self.position_manager.calculate_position_size(symbol=symbol)
+            quantity = usd_amount / ((buy_price + sell_price) / 2)
+            profit = quantity * (sell_price * (1 - EXCHANGE_FEE_RATES[sell_venue])
+                                 - buy_price * (1 + EXCHANGE_FEE_RATES[buy_venue]))
+            return quantity, profit
+
+        min_notional = runtime_settings.get('MIN_NOTIONAL', symbol)
+        max_notional = runtime_settings.get('MAX_NOTIONAL', symbol)
+        buy_step, buy_minimum = self._lot_rules(buy_venue, symbol)
+        sell_step, sell_minimum = self._lot_rules(sell_venue, symbol)
+        result = self.sizing_engine.size(
+            asks=buy_book[1], bids=sell_book[0],
+            buy_fee_rate=EXCHANGE_FEE_RATES[buy_venue], sell_fee_rate=EXCHANGE_FEE_RATES[sell_venue],
+            quote_balance=self.inventory.free(buy_venue, quote),
+            base_balance=self.inventory.free(sell_venue, base),
+            min_notional=max(min_notional[buy_venue], min_notional[sell_venue], buy_minimum, sell_minimum),
+            max_notional=min(max_notional[buy_venue], max_notional[sell_venue]),
+            step_size=max(buy_step, sell_step))
+        logger.info(f"   Depth sizing: {result.quantity:.8f} {base} limited by {result.limited_by}")
+        return result.quantity, result.profit
+
+    def _lot_rules(self, venue, symbol):
+        """(lot size, minimum notional) of a symbol on a venue, from its order template once loaded"""
+        handler = self.venues[venue]
+        template = handler.order_template(symbol, 'buy') if hasattr(handler, 'order_template') else None
+        if template is not None:
+            return template.step, template.min_notional
+        return lot_step(symbol, venue), 0.0
+
+    def _execute_legs(self, symbol, buy_venue, sell_venue, quantity, buy_price, sell_price, dry_run,
+                      quote_time=None, trade_id=None):
+        """
+        Check tracked balances and risk limits, place both market legs and wait for their fills.
+
+        Every step is journaled under trade_id; the caller records 'logged'.
+        An error once orders may be live halts trading and leaves the trade
+        to recover_trades().
+        Returns the final (buy_order, sell_order), (None, None) for a dry run,
+        or None when the trade could not be placed.
+        """
+        base, quote = symbol.split('/', 1)
+        buy_name = VENUE_NAMES.get(buy_venue, buy_venue)
+        sell_name = VENUE_NAMES.get(sell_venue, sell_venue)
+        buy_fee_rate = EXCHANGE_FEE_RATES[buy_venue]
+        sell_fee_rate = EXCHANGE_FEE_RATES[sell_venue]
+
+        # Pre-trade checks use the tracked balances; nothing is logged until both legs are sent
+        quote_balance = self.inventory.free(buy_venue, quote)
+        base_balance = self.inventory.free(sell_venue, base)
+        if quote_balance < buy_price * quantity:
+            logger.error(f"❌ Insufficient {quote} on {buy_name} ({quote_balance:.2f} < {buy_price * quantity:.2f})")
+            self.log_rebalance_plan()
+            return None
+        if base_balance < quantity:
+            logger.error(f"❌ Insufficient {base} on {sell_name} ({base_balance:.8f} < {quantity:.8f})")
+            self.log_rebalance_plan()
+            return None
+
+        exposures = ((buy_venue, buy_price * quantity), (sell_venue, sell_price * quantity))
+        if self.risk.check(exposures, quote_time=quote_time) is not None:
+            return None
+
+        if dry_run and not self.paper:
+            self.risk.release(exposures)
+            self._log_balance_check(symbol, buy_venue, sell_venue, quantity, buy_price, quote_balance, base_balance)
+            logger.info(f"🧪 [DRY RUN] Simulated buy on {buy_name} and sell on {sell_name}")
+            return None, None
+
+        # Written before anything is sent, with the ids the venues will know each leg by, so a crash
+        # mid-send can still find its orders
+        client_ids = {'buy': uuid.uuid4().hex, 'sell': uuid.uuid4().hex}
+        self.journal.append(trade_id, OPENED, symbol=symbol, buy_venue=buy_venue, sell_venue=sell_venue,
+                            quantity=quantity, buy_price=buy_price, sell_price=sell_price,
+                            buy_client_order_id=client_ids['buy'], sell_client_order_id=client_ids['sell'])
+        try:
+            buy_order = self._submit(buy_venue, 'buy', symbol, quantity, buy_price, client_ids['buy'])
+            if buy_order:
+                self.journal.order(trade_id, SUBMITTED, buy_order)
+            sell_order = (self._submit(sell_venue, 'sell', symbol, quantity, sell_price, client_ids['sell'])
+                          if buy_order else None)
+            if sell_order:
+                self.journal.order(trade_id, SUBMITTED, sell_order)
+
+            self._log_balance_check(symbol, buy_venue, sell_venue, quantity, buy_price, quote_balance, base_balance)
+            logger.info("🚀 Trades executed")
+            if buy_order is None:
+                logger.error(f"❌ Failed to place buy order on {buy_name}")
+                self.risk.record_failure(f"buy order on {buy_name}")
+                self.journal.append(trade_id, ABORTED, reason='buy order failed')
+                return None
+            self.order_manager.track(buy_order, buy_price, buy_fee_rate)
+            if sell_order is None:
+                logger.error(f"❌ Failed to place sell order on {sell_name}")
+                self.risk.record_failure(f"sell order on {sell_name}")
+                buy_order, = self.order_manager.wait([buy_order], ORDER_FILL_TIMEOUT)
+                self._apply_order_fills([buy_order], symbol)
+                self.journal.order(trade_id, FILLED, buy_order)
+                self.journal.append(trade_id, ABORTED, reason='sell order failed', unhedged=bool(buy_order.filled))
+                return None
+            self.order_manager.track(sell_order, sell_price, sell_fee_rate)
+
+            buy_order, sell_order = self.order_manager.wait([buy_order, sell_order], ORDER_FILL_TIMEOUT)
+            self.journal.order(trade_id, FILLED, buy_order)
+            self.journal.order(trade_id, FILLED, sell_order)
+            self._apply_order_fills([buy_order, sell_order], symbol)
+            logger.info(f"   Buy on {buy_name}: {buy_order}")
+            logger.info(f"   Sell on {sell_name}: {sell_order}")
+        except Exception as e:
+            logger.error(f"❌ Error executing trades: {e}")
+            self.risk.record_failure(str(e))
+            # Orders may be live with no final state on record; stop until recovery has reconciled them
+            self.risk.halt(f"trade {trade_id} interrupted by an error: {e}")
+            self.journal.append(trade_id, INTERRUPTED, reason=str(e))
+            return None
+        finally:
+            self.risk.release(exposures)
+        self.events.publish('balances', self.inventory.snapshot())
+        self.log_rebalance_plan()
+        return buy_order, sell_order
+
+    def recover_trades(self):
+        pending = self.journal.unresolved()
+        if not pending:
+            self.journal.compact()
+            return 0
+        logger.warning(f"🩹 Recovering {len(pending)} trades left in flight by the last run")
+
+        for trade_id, trade in pending.items():
+            opened = trade['opened']
+            if opened is None:
+                # Only later steps survived; nothing to reconcile against
+                self.journal.append(trade_id, ABORTED, reason='no opening record')
+                continue
+            stored = self.trade_logger.db.find_trade(trade_id)
+            if stored is not None:
+                # The row was written but the process died before 'logged' reached the journal
+                self.risk.record_trade(stored.profit)
+                self.journal.append(trade_id, LOGGED, recovered=True)
+                logger.info(f"🩹 Trade {trade_id} was already stored with profit ${stored.profit:.2f}")
+                continue
+            symbol = opened['symbol']
+            fee_rates = {'buy': EXCHANGE_FEE_RATES[opened['buy_venue']],
+                         'sell': EXCHANGE_FEE_RATES[opened['sell_venue']]}
+            expected = {'buy': opened['buy_price'], 'sell': opened['sell_price']}
+            legs, unconfirmed = {}, []
+            for side in ('buy', 'sell'):
+                leg = trade['legs'].get(side)
+                handler = self.venues[opened[f'{side}_venue']]
+                current = None
+                if leg is not None:
+                    # Venue symbol as the order was placed, which is what its endpoints take
+                    order = Order(leg['venue'], leg['symbol'], side, leg['quantity'], order_id=leg['order_id'],
+                                  status=leg['status'], filled=leg['filled'] or 0.0,
+                                  average_price=leg['average_price'], fee=leg['fee'], fee_asset=leg['fee_asset'])
+                    if not order.is_final:
+                        # The journal only knows the state at the crash; ask the venue once
+                        current = handler.fetch_order(order.symbol, order.order_id)
+                else:
+                    # Never sent, or the process died before the acknowledgement was journaled
+                    client_order_id = opened.get(f'{side}_client_order_id')
+                    if not client_order_id or not hasattr(handler, 'find_order'):
+                        continue
+                    order = handler.find_order(symbol, client_order_id)
+                    if order is None:
+                        unconfirmed.append(side)
+                        continue
+                    logger.warning(f"🩹 Trade {trade_id} had an unacknowledged {side} order {order.order_id} "
+                                   f"on {VENUE_NAMES.get(order.venue, order.venue)}")
+                self.order_manager.track(order, expected[side], fee_rates[side])
+                if current is not None:
+                    self.order_manager.update(current)
+                legs[side] = self.order_manager.wait([order], 0)[0]
+            open_orders = [order for order in legs.values() if not order.is_final]
+            if open_orders:
+                for order in self.order_manager.wait(open_orders, ORDER_FILL_TIMEOUT):
+                    legs[order.side] = order
+            for order in legs.values():
+                self.journal.order(trade_id, FILLED, order)
+
+            buy_order, sell_order = legs.get('buy'), legs.get('sell')
+            filled = [order for order in legs.values() if order.filled]
+            if buy_order is not None and sell_order is not None and buy_order.filled and sell_order.filled:
+                estimated_profit = (opened['quantity'] * (opened['sell_price'] * (1 - fee_rates['sell'])
+                                                          - opened['buy_price'] * (1 + fee_rates['buy'])))
+                quantity, buy_price, sell_price, fees, profit = self._reconcile_legs(
+                    (buy_order, sell_order), symbol, opened['quantity'], opened['buy_price'],
+                    opened['sell_price'], estimated_profit)
+                route = Route(symbol, opened['buy_venue'], opened['sell_venue'], opened['buy_price'],
+                              opened['sell_price'], None, None)
+                self.trade_logger.log_route_trade(datetime.fromtimestamp(opened['time']), route, quantity, profit,
+                                                  buy_price=buy_price, sell_price=sell_price, fees=fees,
+                                                  estimated_profit=estimated_profit, trade_id=trade_id)
+                self.risk.record_trade(profit)
+                self.journal.append(trade_id, LOGGED, recovered=True)
+                logger.info(f"🩹 Trade {trade_id} had filled on both venues; logged with profit ${profit:.2f}")
+            elif filled:
+                order = filled[0]
+                logger.error(f"🚨 Trade {trade_id} left a single {order.side} leg of {order.filled:.8f} "
+                             f"{symbol} on {order.venue} (order {order.order_id})")
+                self.journal.append(trade_id, ABORTED, reason='single leg filled', unhedged=True, recovered=True)
+                self.risk.halt(f"unhedged {order.side} leg on {order.venue} found by journal recovery")
+            else:
+                # Legs without an acknowledgement were looked up by client order id above
+                self.journal.append(trade_id, ABORTED, reason='no leg filled', recovered=True)
+                logger.warning(f"⚠️ Trade {trade_id} has no filled legs on either venue")
+                if unconfirmed:
+                    # A failed lookup reads the same as an order that was never sent
+                    logger.warning(f"⚠️ No {' or '.join(unconfirmed)} order of trade {trade_id} was found by "
+                                   f"client order id; check balances if the lookup failed")
+
+        self.journal.compact()
+        self.refresh_inventory(force=True)
+        return len(pending)
+
+    def _submit(self, venue, side, symbol, quantity, price, client_order_id=None):
+        """
+        Send a market order through the venue's pre-signed template, or the SDK when there is none.
+
+        An error does not prove the order was not placed (the response may
+        have been lost), so a failed send is looked up by its client order id.
+        """
+        handler = self.venues[venue]
+        client_order_id = client_order_id or uuid.uuid4().hex
+        template = handler.order_template(symbol, side) if hasattr(handler, 'order_template') else None
+        if template is not None:
+            order = handler.submit_order(template, quantity, price, client_order_id)
+        else:
+            place = handler.place_buy_order if side == 'buy' else handler.place_sell_order
+            order = place(handler.to_exchange_symbol(symbol), quantity, client_order_id)
+        if order is None and hasattr(handler, 'find_order'):
+            order = handler.find_order(symbol, client_order_id)
+            if order is not None:
+                logger.warning(f"⚠️ {VENUE_NAMES.get(venue, venue)} {side} order {order.order_id} was placed "
+                               f"despite the error; tracking it")
+        return order
+
+    def prepare_order_templates(self, symbols=TRADING_SYMBOLS):
+        """Build every venue's order templates ahead of the first opportunity"""
+        for venue, handler in self.venues.items():
+            if hasattr(handler, 'order_template'):
+                ready = sum(handler.order_template(symbol, side) is not None
+                            for symbol in symbols for side in ('buy', 'sell'))
+                logger.info(f"⚡ {ready} order templates ready on {VENUE_NAMES.get(venue, venue)}")
+
+    def _log_balance_check(self, symbol, buy_venue, sell_venue, quantity, buy_price, quote_balance, base_balance):
+        base, quote = symbol.split('/', 1)
+        logger.info("🔍 Checked balances:")
+        logger.info(f"   {VENUE_NAMES.get(buy_venue, buy_venue)} {quote} Balance: {quote_balance:.2f}")
+        logger.info(f"   {VENUE_NAMES.get(sell_venue, sell_venue)} {base} Balance: {base_balance:.8f}")
+        logger.info(f"   Required {quote}: {buy_price * quantity:.2f}")
+        logger.info(f"   Required {base}: {quantity:.8f}")
+
+    def _apply_order_fills(self, orders, symbol):
+        for order in orders:
+            if order.filled:
+                self.inventory.apply_fill(order.venue, symbol, order.side, order.filled, order.average_price,
+                                          fee=self.order_manager.fee_in_quote(order, symbol))
+
+    def _reconcile_legs(self, legs, symbol, quantity, buy_price, sell_price, estimated_profit):
+        """Returns (quantity, buy_price, sell_price, fees, profit) as filled, or as estimated for dry runs"""
+        buy_order, sell_order = legs
+        if buy_order is None:
+            return quantity, buy_price, sell_price, None, estimated_profit
+
+        fill = self.order_manager.reconcile(buy_order, sell_order, estimated_profit, symbol)
+        logger.info(f"🧾 Reconciled fills: {fill.quantity:.8f} @ {fill.buy_price} → {fill.sell_price}, "
+                    f"fees ${fill.fees:.2f}")
+        logger.info(f"   Realized profit ${fill.profit:.2f} vs estimated ${estimated_profit:.2f} "
+                    f"(slippage buy {fill.buy_slippage:+.2f} bps, sell {fill.sell_slippage:+.2f} bps)")
+        return fill.quantity, fill.buy_price, fill.sell_price, fill.fees, fill.profit
+
+    def execute_route(self, route, dry_run=False, return_data=False, quote_time=None):
+        quote_time = timeline.now() if quote_time is None else quote_time
+        buy_name = VENUE_NAMES.get(route.buy_venue, route.buy_venue)
+        sell_name = VENUE_NAMES.get(route.sell_venue, route.sell_venue)
+        logger.info(f"🎯 ROUTE {route.symbol}: buy on {buy_name} @ {route.buy_price}, "
+                    f"sell on {sell_name} @ {route.sell_price} (net edge {route.net_edge * 100:.3f}%)")
+        try:
+            self.refresh_inventory()
+            books = self.refresh_books(route.symbol)
+            quantity, profit = self.size_position(route.buy_venue, route.sell_venue,
+                                                  route.buy_price, route.sell_price, route.symbol, books=books)
+            if not quantity:
+                logger.info("⏳ No profitable size after walking the order books")
+                return None
+            if self.position_manager.check_stop_loss(profit, symbol=route.symbol):
+                logger.warning(f"🛑 Stop-loss triggered! Profit: ${profit:.2f}")
+                return None
+
+            trade_id = self.journal.new_id()
+            legs = self._execute_legs(route.symbol, route.buy_venue, route.sell_venue, quantity,
+                                      route.buy_price, route.sell_price, dry_run, quote_time, trade_id)
+            logger.info(f"   Position Size: {quantity:.8f}, Potential Profit: {profit:.2f}")
+            if not legs:
+                return None
+            estimated_profit = profit
+            quantity, buy_price, sell_price, fees, profit = self._reconcile_legs(
+                legs, route.symbol, quantity, route.buy_price, route.sell_price, estimated_profit)
+            if fees is None:
+                fees = (quantity * buy_price * EXCHANGE_FEE_RATES[route.buy_venue]
+                        + quantity * sell_price * EXCHANGE_FEE_RATES[route.sell_venue])
+
+            logger.info("📝 Logging trade details...")
+            trade_data = self.trade_logger.log_route_trade(
+                datetime.fromtimestamp(timeline.now()), route, quantity, profit,
+                dry_run=dry_run, return_data=return_data, buy_price=buy_price, sell_price=sell_price,
+                fees=fees, estimated_profit=estimated_profit, trade_id=trade_id)
+            # Only orders that were placed move the daily P&L and the failure streak
+            if legs[0] is not None:
+                self.journal.append(trade_id, LOGGED)
+                self.risk.record_trade(profit)
+            if return_data:
+                return trade_data
+        except Exception as e:
+            logger.error(f"💥 Error in execute_route: {e}")
+            self.risk.record_failure(str(e))
+            logger.exception("Full traceback:")
+            return None
+
+    def scan_triangular(self):
+        tickers = self.kucoin.get_all_bid_ask()
+        if not tickers:
+            logger.error("❌ Failed to fetch KuCoin tickers")
+            return []
+
+        changed = self.triangular.update_tickers(tickers)
+        if not self._triangular_searched:
+            # The first pass runs the full Bellman-Ford search; afterwards only
+            # cycles containing an updated edge are re-priced
+            self.triangular.find_negative_cycles()
+            self._triangular_searched = True
+            cycles = self.triangular.evaluate()
+        else:
+            cycles = self.triangular.evaluate(changed)
+
+        rotated = []
+        for cycle in cycles:
+            cycle = self.triangular.rotate(cycle, TRIANGULAR_START_CURRENCY)
+            if cycle is not None:
+                rotated.append(cycle)
+        logger.info(f"🔺 {len(changed)} edges updated, {len(rotated)} profitable cycles through {TRIANGULAR_START_CURRENCY}")
+        return rotated
+
+    def _leg_proceeds(self, order, leg):
+        """Amount of leg.target a filled triangular leg delivered, net of fees taken from it"""
+        received = order.filled if leg.side == 'buy' else order.filled * (order.average_price or leg.price)
+        if order.fee is None:
+            return received * (1 - self.triangular.fee_rate)
+        return received - order.fee if order.fee_asset == leg.target else received
+
+    def execute_triangular_trade(self, dry_run=False, return_data=False):
+        logger.info("🔺 Checking triangular arbitrage on KuCoin...")
+        try:
+            quote_time = timeline.now()
+            cycles = self.scan_triangular()
+            if not cycles:
+                logger.info("⏳ No triangular opportunity found")
+                return None
+
+            cycle = cycles[0]
+            route = '→'.join(cycle.path)
+            logger.info(f"🎯 TRIANGULAR OPPORTUNITY: {route} (net edge {cycle.net_edge * 100:.3f}%)")
+
+            self.refresh_inventory()
+            start_amount = min(self.position_manager.calculate_position_size(),
+                               self.inventory.free('kucoin', TRIANGULAR_START_CURRENCY))
+            if start_amount <= 0:
+                logger.error(f"❌ Insufficient {TRIANGULAR_START_CURRENCY} on KuCoin")
+                return None
+
+            # The legs run one after another, so the cycle never has more than its start amount out
+            exposures = (('kucoin', start_amount),)
+            if self.risk.check(exposures, orders=len(cycle.legs), quote_time=quote_time) is not None:
+                return None
+            amount = start_amount
+            quoted_amount = start_amount
+            try:
+                for step, leg in enumerate(cycle.legs, 1):
+                    logger.info(f"   Leg {step}: {leg.side} {leg.symbol} @ {leg.price} "
+                                f"({leg.source}→{leg.target})")
+                    quoted_amount *= leg.rate
+                    if dry_run and not self.paper:
+                        amount *= leg.rate
+                        continue
+                    # Leave room for a fee charged in the quote asset on top of the cost
+                    quantity = amount / (leg.price * (1 + self.triangular.fee_rate)) if leg.side == 'buy' else amount
+                    order = self._submit('kucoin', leg.side, leg.symbol, quantity, leg.price)
+                    if order is not None:
+                        self.order_manager.track(order, leg.price, self.triangular.fee_rate)
+                        order, = self.order_manager.wait([order], ORDER_FILL_TIMEOUT)
+                        self._apply_order_fills([order], leg.symbol)
+                    if order is None or not order.filled:
+                        logger.error(f"❌ Leg {step} failed, holding {amount:.8f} {leg.source} on KuCoin")
+                        self.risk.record_failure(f"triangular leg {step} on KuCoin")
+                        return None
+                    # The next leg trades what this one actually delivered
+                    amount = self._leg_proceeds(order, leg)
+            finally:
+                self.risk.release(exposures)
+
+            if dry_run and not self.paper:
+                logger.info("🧪 [DRY RUN] Simulated triangular cycle on KuCoin")
+            else:
+                self.events.publish('balances', self.inventory.snapshot())
+                logger.info(f"🧾 Cycle returned {amount:.8f} {TRIANGULAR_START_CURRENCY} "
+                            f"vs {quoted_amount:.8f} quoted")
+
+            profit = amount - start_amount
+            logger.info("📝 Logging trade details...")
+            trade_data = self.trade_logger.log_cycle_trade(
+                datetime.fromtimestamp(timeline.now()), cycle, 'KuCoin', start_amount, amount, profit,
+                dry_run=dry_run, return_data=return_data)
+            if not (dry_run and not self.paper):
+                self.risk.record_trade(profit)
+            if return_data:
+                return trade_data
+        except Exception as e:
+            logger.error(f"💥 Error in execute_triangular_trade: {e}")
+            self.risk.record_failure(str(e))
+            logger.exception("Full traceback:")
+            return None
+
     def execute_trade(self, dry_run=False, return_data=False):
         logger.info("=" * 50)
         logger.info(f"🔄 Starting trade execution (DRY RUN: {dry_run})")
@@ -67,6 +729,7 @@ class ArbitrageTrader:
         try:
             # Fetch current prices
             logger.info("📊 Fetching current BTC prices...")
+            quote_time = timeline.now()
             binance_price = self.binance.get_btc_price()
             kucoin_price = self.kucoin.get_btc_price()
 
@@ -76,133 +739,71 @@ class ArbitrageTrader:
                 logger.error(f"   KuCoin: {kucoin_price}")
                 return None if return_data else None
 
+            for venue, price in (('binance', binance_price), ('kucoin', kucoin_price)):
+                self.events.publish('quote', {'symbol': 'BTC/USDT', 'venue': venue, 'price': price})
+            books = self.refresh_books('BTC/USDT')
+
             # Check for arbitrage opportunity
-            if self.check_arbitrage_opportunity(binance_price, kucoin_price):
+            opportunity = self.check_arbitrage_opportunity(binance_price, kucoin_price)
+            if opportunity:
+                buy_venue, sell_venue = opportunity.buy_venue, opportunity.sell_venue
+                buy_price, sell_price = opportunity.buy_price, opportunity.sell_price
+                arrow = '📈' if sell_venue == 'binance' else '📉'
+                buy_name = VENUE_NAMES.get(buy_venue, buy_venue)
+                sell_name = VENUE_NAMES.get(sell_venue, sell_venue)
+                buy_fee_rate = EXCHANGE_FEE_RATES[buy_venue]
+                sell_fee_rate = EXCHANGE_FEE_RATES[sell_venue]
+
                 logger.info("💰 Calculating position size and potential profit...")
-                usd_amount = self.position_manager.calculate_position_size()
-                # Convert USD amount to BTC quantity using average price
-                avg_price = (binance_price + kucoin_price) / 2
-                quantity = usd_amount / avg_price
-                profit = self.position_manager.calculate_profit(
-                    binance_price, kucoin_price, quantity)
-                
-                logger.info(f"   USD Amount: ${usd_amount}")
-                logger.info(f"   Average BTC Price: ${avg_price:.2f}")
-                logger.info(f"   Position Size: {quantity:.8f} BTC")
-                logger.info(f"   Potential Profit: ${profit:.2f}")
+                self.refresh_inventory()
+                quantity, profit = self.size_position(buy_venue, sell_venue, buy_price, sell_price, books=books)
+                if not quantity:
+                    logger.info("⏳ No profitable size after walking the order books")
+                    return None if return_data else None
 
-                # Calculate and display fee information
-                binance_fee_rate = 0.001  # 0.1%
-                kucoin_fee_rate = 0.001   # 0.1%
-                
-                if binance_price > kucoin_price:
-                    logger.info("📈 Strategy: Buy on KuCoin, Sell on Binance")
-                    logger.info("💸 Fee Breakdown:")
-                    logger.info(f"   Buy on KuCoin: {quantity} BTC × ${kucoin_price} = ${quantity * kucoin_price:.2f}")
-                    logger.info(f"   KuCoin Buy Fee: ${quantity * kucoin_price * kucoin_fee_rate:.2f} ({kucoin_fee_rate*100}%)")
-                    logger.info(f"   Sell on Binance: {quantity} BTC × ${binance_price} = ${quantity * binance_price:.2f}")
-                    logger.info(f"   Binance Sell Fee: ${quantity * binance_price * binance_fee_rate:.2f} ({binance_fee_rate*100}%)")
-                    logger.info(f"   Total Fees: ${quantity * kucoin_price * kucoin_fee_rate + quantity * binance_price * binance_fee_rate:.2f}")
-                    logger.info(f"   Net Profit After Fees: ${profit:.2f}")
-                else:
-                    logger.info("📉 Strategy: Buy on Binance, Sell on KuCoin")
-                    logger.info("💸 Fee Breakdown:")
-                    logger.info(f"   Buy on Binance: {quantity} BTC × ${binance_price} = ${quantity * binance_price:.2f}")
-                    logger.info(f"   Binance Buy Fee: ${quantity * binance_price * binance_fee_rate:.2f} ({binance_fee_rate*100}%)")
-                    logger.info(f"   Sell on KuCoin: {quantity} BTC × ${kucoin_price} = ${quantity * kucoin_price:.2f}")
-                    logger.info(f"   KuCoin Sell Fee: ${quantity * kucoin_price * kucoin_fee_rate:.2f} ({kucoin_fee_rate*100}%)")
-                    logger.info(f"   Total Fees: ${quantity * binance_price * binance_fee_rate + quantity * kucoin_price * kucoin_fee_rate:.2f}")
-                    logger.info(f"   Net Profit After Fees: ${profit:.2f}")
-
-                if self.position_manager.check_stop_loss(profit):
+                if self.position_manager.check_stop_loss(profit, symbol='BTC/USDT'):
                     logger.warning(f"🛑 Stop-loss triggered! Profit: ${profit:.2f}")
                     return None if return_data else None
 
-                # Determine trading direction
-                if binance_price > kucoin_price:
-                    logger.info("📈 Strategy: Buy on KuCoin, Sell on Binance")
-                    logger.info("🔍 Checking balances...")
-                    
-                    kucoin_usdt_balance = self.kucoin.check_usdt_balance()
-                    binance_btc_balance = self.binance.check_balance()
-                    
-                    logger.info(f"   KuCoin USDT Balance: ${kucoin_usdt_balance:.2f}")
-                    logger.info(f"   Binance BTC Balance: {binance_btc_balance:.8f}")
-                    logger.info(f"   Required USDT: ${kucoin_price * quantity:.2f}")
-                    logger.info(f"   Required BTC: {quantity:.8f}")
-                    
-                    if kucoin_usdt_balance < kucoin_price * quantity:
-                        logger.error(f"❌ Insufficient USDT on KuCoin (${kucoin_usdt_balance:.2f} < ${kucoin_price * quantity:.2f})")
-                        return None if return_data else None
-                    if binance_btc_balance < quantity:
-                        logger.error(f"❌ Insufficient BTC on Binance ({binance_btc_balance:.8f} < {quantity:.8f})")
-                        return None if return_data else None
-                    
-                    if not dry_run:
-                        logger.info("🚀 Executing trades...")
-                        try:
-                            buy_result = self.kucoin.place_buy_order('BTC/USDT', quantity)
-                            if buy_result is None:
-                                logger.error("❌ Failed to place buy order on KuCoin")
-                                return None if return_data else None
-                            
-                            sell_result = self.binance.place_sell_order('BTCUSDT', quantity)
-                            if sell_result is None:
-                                logger.error("❌ Failed to place sell order on Binance")
-                                return None if return_data else None
-                            
-                            logger.info(f"   Buy on KuCoin: {buy_result}")
-                            logger.info(f"   Sell on Binance: {sell_result}")
-                        except Exception as e:
-                            logger.error(f"❌ Error executing trades: {e}")
-                            return None if return_data else None
-                    else:
-                        logger.info("🧪 [DRY RUN] Simulated buy on KuCoin and sell on Binance")
-                else:
-                    logger.info("📉 Strategy: Buy on Binance, Sell on KuCoin")
-                    logger.info("🔍 Checking balances...")
-                    
-                    binance_usdt_balance = self.binance.check_usdt_balance()
-                    kucoin_btc_balance = self.kucoin.check_balance()
-                    
-                    logger.info(f"   Binance USDT Balance: ${binance_usdt_balance:.2f}")
-                    logger.info(f"   KuCoin BTC Balance: {kucoin_btc_balance:.8f}")
-                    logger.info(f"   Required USDT: ${binance_price * quantity:.2f}")
-                    logger.info(f"   Required BTC: {quantity:.8f}")
-                    
-                    if binance_usdt_balance < binance_price * quantity:
-                        logger.error(f"❌ Insufficient USDT on Binance (${binance_usdt_balance:.2f} < ${binance_price * quantity:.2f})")
-                        return None if return_data else None
-                    if kucoin_btc_balance < quantity:
-                        logger.error(f"❌ Insufficient BTC on KuCoin ({kucoin_btc_balance:.8f} < {quantity:.8f})")
-                        return None if return_data else None
-                    
-                    if not dry_run:
-                        logger.info("🚀 Executing trades...")
-                        try:
-                            buy_result = self.binance.place_buy_order('BTCUSDT', quantity)
-                            if buy_result is None:
-                                logger.error("❌ Failed to place buy order on Binance")
-                                return None if return_data else None
-                            
-                            sell_result = self.kucoin.place_sell_order('BTC/USDT', quantity)
-                            if sell_result is None:
-                                logger.error("❌ Failed to place sell order on KuCoin")
-                                return None if return_data else None
-                            
-                            logger.info(f"   Buy on Binance: {buy_result}")
-                            logger.info(f"   Sell on KuCoin: {sell_result}")
-                        except Exception as e:
-                            logger.error(f"❌ Error executing trades: {e}")
-                            return None if return_data else None
-                    else:
-                        logger.info("🧪 [DRY RUN] Simulated buy on Binance and sell on KuCoin")
+                trade_id = self.journal.new_id()
+                legs = self._execute_legs('BTC/USDT', buy_venue, sell_venue, quantity,
+                                          buy_price, sell_price, dry_run, quote_time, trade_id)
+                # Logged after the orders are on the wire
+                usd_amount = quantity * buy_price
+
+                logger.info(f"   USD Amount: ${usd_amount:.2f}")
+                logger.info(f"   Position Size: {quantity:.8f} BTC")
+                logger.info(f"   Potential Profit: ${profit:.2f}")
+
+                logger.info(f"{arrow} Strategy: Buy on {buy_name}, Sell on {sell_name}")
+                logger.info("💸 Fee Breakdown:")
+                logger.info(f"   Buy on {buy_name}: {quantity} BTC × ${buy_price} = ${quantity * buy_price:.2f}")
+                logger.info(f"   {buy_name} Buy Fee: ${quantity * buy_price * buy_fee_rate:.2f} ({buy_fee_rate*100}%)")
+                logger.info(f"   Sell on {sell_name}: {quantity} BTC × ${sell_price} = ${quantity * sell_price:.2f}")
+                logger.info(f"   {sell_name} Sell Fee: ${quantity * sell_price * sell_fee_rate:.2f} ({sell_fee_rate*100}%)")
+                logger.info(f"   Total Fees: ${quantity * buy_price * buy_fee_rate + quantity * sell_price * sell_fee_rate:.2f}")
+                logger.info(f"   Net Profit After Fees: ${profit:.2f}")
+
+                if not legs:
+                    return None if return_data else None
+                estimated_profit = profit
+                quantity, buy_price, sell_price, fees, profit = self._reconcile_legs(
+                    legs, 'BTC/USDT', quantity, buy_price, sell_price, estimated_profit)
+                if fees is None:
+                    fees = quantity * buy_price * buy_fee_rate + quantity * sell_price * sell_fee_rate
+                prices = {'binance': binance_price, 'kucoin': kucoin_price, buy_venue: buy_price,
+                          sell_venue: sell_price}
 
                 # Log the trade
                 logger.info("📝 Logging trade details...")
                 trade_data = self.trade_logger.log_trade(
-                    datetime.now(), binance_price, kucoin_price, 
-                    abs(binance_price - kucoin_price), profit, dry_run=dry_run, return_data=return_data)
+                    datetime.fromtimestamp(timeline.now()), prices['binance'], prices['kucoin'],
+                    abs(prices['binance'] - prices['kucoin']), profit, dry_run=dry_run, return_data=return_data,
+                    quantity=quantity, fees=fees, estimated_profit=estimated_profit, trade_id=trade_id)
+                # Only orders that were placed move the daily P&L and the failure streak
+                if legs[0] is not None:
+                    self.journal.append(trade_id, LOGGED)
+                    self.risk.record_trade(profit)
                 
                 logger.info("✅ Trade execution completed successfully")
                 if return_data:
@@ -213,10 +814,10 @@ class ArbitrageTrader:
                 
         except Exception as e:
             logger.error(f"💥 Error in execute_trade: {e}")
+            self.risk.record_failure(str(e))
             logger.exception("Full traceback:")
             return None if return_data else None
         
         logger.info("=" * 50)
         logger.info("🔄 Trade execution cycle completed")
         logger.info("=" * 50)
-
@@ -0,0 +1,165 @@
+from collections import namedtuple
+import heapq
+from trading.spread_matrix import Route
+
+BookLevel = namedtuple('BookLevel', ['venue', 'price', 'quantity', 'effective_price'])
+
+BIDS, ASKS = 'bids', 'asks'
+
+
+class _SymbolBook:
+    """Per-symbol levels by side and venue, and one heap per side over all venues."""
+    __slots__ = ('levels', 'heaps', 'queued', 'live')
+
+    def __init__(self):
+        # {side: {venue: {price: quantity}}}, the source of truth
+        self.levels = {BIDS: {}, ASKS: {}}
+        # Heap entries are (sort key, price, venue); bids use the negated effective price
+        self.heaps = {BIDS: [], ASKS: []}
+        # (venue, price) pairs that have an entry in the heap, live or stale
+        self.queued = {BIDS: set(), ASKS: set()}
+        self.live = {BIDS: 0, ASKS: 0}
+
+
+class ConsolidatedBook:
+    """
+    One fee-adjusted, price-sorted book per symbol across any number of venues.
+
+    Every level keeps its venue and an effective price: what selling into a
+    bid actually returns (price x (1 - fee)) or buying from an ask actually
+    costs (price x (1 + fee)). Each side of a symbol is one heap over all
+    venues, ordered by effective price, with lazy deletion: a level update
+    is a dict write plus at most one O(log n) push, and removed levels stay
+    in the heap until they surface at the top, where they are popped. The
+    heap is rebuilt from the live levels once stale entries outnumber them,
+    so it never grows without bound.
+
+    The book is crossed when the best effective bid on one venue is above
+    the best effective ask on another: buying there and selling here is
+    profitable after both fees.
+
+    Methods
+    -------
+    update_level(symbol, venue, side, price, quantity):
+        Applies one level diff; a quantity of 0 removes the level.
+    set_book(symbol, venue, bids, asks):
+        Replaces a venue's [[price, qty], ...] levels, applying only the differences.
+    remove_venue(symbol, venue):
+        Drops every level of a venue (e.g. when its book is unavailable).
+    best(symbol, side):
+        The best BookLevel on 'bids' or 'asks', or None.
+    depth(symbol, side, n):
+        The n best BookLevels of a side across venues, best first.
+    venues(symbol):
+        Venues with levels on both sides of a symbol.
+    crossing(symbol):
+        A Route from the best ask to the best bid when the book is crossed
+        across venues after fees, or None.
+    """
+    def __init__(self, venues, fee_rates=None, default_fee_rate=0.001):
+        fee_rates = fee_rates or {}
+        self._fees = {venue: fee_rates.get(venue, default_fee_rate) for venue in venues}
+        self._default_fee_rate = default_fee_rate
+        self._symbols = {}
+
+    def _book(self, symbol):
+        book = self._symbols.get(symbol)
+        if book is None:
+            book = self._symbols[symbol] = _SymbolBook()
+        return book
+
+    def _entry(self, side, venue, price):
+        fee = self._fees.get(venue, self._default_fee_rate)
+        if side == BIDS:
+            return (-price * (1 - fee), price, venue)
+        return (price * (1 + fee), price, venue)
+
+    def update_level(self, symbol, venue, side, price, quantity):
+        book = self._book(symbol)
+        levels = book.levels[side].get(venue)
+        if levels is None:
+            levels = book.levels[side][venue] = {}
+
+        if quantity > 0:
+            if price not in levels:
+                book.live[side] += 1
+            levels[price] = quantity
+            key = (venue, price)
+            if key not in book.queued[side]:
+                book.queued[side].add(key)
+                heapq.heappush(book.heaps[side], self._entry(side, venue, price))
+        elif levels.pop(price, None) is not None:
+            # The heap entry goes stale and is dropped when it reaches the top
+            book.live[side] -= 1
+            if len(book.heaps[side]) > 2 * book.live[side] + 64:
+                self._compact(book, side)
+
+    def _compact(self, book, side):
+        levels = book.levels[side]
+        heap = [entry for entry in book.heaps[side] if entry[1] in levels.get(entry[2], ())]
+        heapq.heapify(heap)
+        book.heaps[side] = heap
+        book.queued[side] = {(venue, price) for _, price, venue in heap}
+
+    def set_book(self, symbol, venue, bids, asks):
+        book = self._book(symbol)
+        for side, new_levels in ((BIDS, bids), (ASKS, asks)):
+            new = {float(price): float(quantity) for price, quantity in new_levels}
+            old = book.levels[side].get(venue, {})
+            for price in [price for price in old if price not in new]:
+                self.update_level(symbol, venue, side, price, 0)
+            for price, quantity in new.items():
+                if old.get(price) != quantity:
+                    self.update_level(symbol, venue, side, price, quantity)
+
+    def remove_venue(self, symbol, venue):
+        if symbol in self._symbols:
+            self.set_book(symbol, venue, [], [])
+
+    def _top(self, book, side):
+        heap, levels = book.heaps[side], book.levels[side]
+        while heap:
+            _, price, venue = heap[0]
+            if price in levels.get(venue, ()):
+                return heap[0]
+            heapq.heappop(heap)
+            book.queued[side].discard((venue, price))
+        return None
+
+    def _level(self, book, side, entry):
+        key, price, venue = entry
+        return BookLevel(venue, price, book.levels[side][venue][price], -key if side == BIDS else key)
+
+    def best(self, symbol, side):
+        book = self._symbols.get(symbol)
+        entry = self._top(book, side) if book is not None else None
+        return self._level(book, side, entry) if entry is not None else None
+
+    def depth(self, symbol, side, n):
+        book = self._symbols.get(symbol)
+        if book is None:
+            return []
+        levels = book.levels[side]
+        live = (entry for entry in book.heaps[side] if entry[1] in levels.get(entry[2], ()))
+        return [self._level(book, side, entry) for entry in heapq.nsmallest(n, live)]
+
+    def venues(self, symbol):
+        book = self._symbols.get(symbol)
+        if book is None:
+            return []
+        return [venue for venue, levels in book.levels[BIDS].items()
+                if levels and book.levels[ASKS].get(venue)]
+
+    def crossing(self, symbol):
+        book = self._symbols.get(symbol)
+        if book is None:
+            return None
+        bid, ask = self._top(book, BIDS), self._top(book, ASKS)
+        # One venue holding both tops means every other venue is worse on both sides
+        if bid is None or ask is None or bid[2] == ask[2]:
+            return None
+        proceeds, cost = -bid[0], ask[0]
+        if proceeds <= cost:
+            return None
+        return Route(symbol=symbol, buy_venue=ask[2], sell_venue=bid[2], buy_price=ask[1], sell_price=bid[1],
+                     profit_per_unit=proceeds - cost, net_edge=(proceeds - cost) / cost)
@@ -0,0 +1,246 @@
+from collections import namedtuple
+import math
+import time
+
+Transfer = namedtuple('Transfer', [
+    'asset', 'from_venue', 'to_venue', 'amount', 'fee', 'send_at', 'arrives_at', 'reason'
+])
+
+
+class InventoryTracker:
+    """
+    Tracks per-venue balances from fills instead of polling the exchanges.
+
+    Balances are seeded once with sync() and then moved by apply_fill() and
+    apply_transfer(). Every balance change also feeds an exponentially
+    decayed flow estimate, so the tracker can project when a venue/asset
+    will run dry at the current one-way flow.
+
+    Methods
+    -------
+    sync(venues, assets):
+        Seeds balances from the exchange handlers (one call per venue/asset).
+    free(venue, asset):
+        Returns the tracked free balance.
+    apply_fill(venue, symbol, side, quantity, price, fee=0.0, timestamp=None):
+        Moves base/quote balances for an executed order; fee is in quote units.
+    apply_transfer(asset, from_venue, to_venue, amount, fee=0.0, timestamp=None):
+        Debits the source (amount + fee) and credits the destination.
+    adjust(venue, asset, delta, timestamp=None):
+        Moves one balance by delta, e.g. either end of a transfer in flight.
+    flow_rate(venue, asset, now=None):
+        Recent net flow in units per second (negative when draining).
+    time_to_depletion(venue, asset, now=None):
+        Seconds until the balance reaches zero at the current flow, or None.
+    balances():
+        Returns {(venue, asset): balance}.
+    snapshot():
+        Returns {venue: {asset: balance}}.
+    """
+    def __init__(self, flow_time_constant=3600, clock=time.time):
+        self.flow_time_constant = flow_time_constant
+        self.clock = clock
+        self.last_sync = None
+        self._balances = {}
+        # Decayed sum of balance changes and the time it was last decayed to
+        self._flow = {}
+        self._flow_time = {}
+
+    def sync(self, venues, assets=('BTC', 'USDT')):
+        for venue, handler in venues.items():
+            for asset in assets:
+                self._balances[(venue, asset)] = float(handler.check_asset_balance(asset))
+        self.last_sync = self.clock()
+
+    def set_balance(self, venue, asset, amount):
+        self._balances[(venue, asset)] = float(amount)
+
+    def free(self, venue, asset):
+        return self._balances.get((venue, asset), 0.0)
+
+    def _decayed_flow(self, key, now):
+        flow = self._flow.get(key, 0.0)
+        if flow:
+            elapsed = now - self._flow_time[key]
+            flow *= math.exp(-max(elapsed, 0.0) / self.flow_time_constant)
+        return flow
+
+    def _move(self, venue, asset, delta, now):
+        key = (venue, asset)
+        self._balances[key] = self._balances.get(key, 0.0) + delta
+        self._flow[key] = self._decayed_flow(key, now) + delta
+        self._flow_time[key] = now
+
+    def adjust(self, venue, asset, delta, timestamp=None):
+        self._move(venue, asset, delta, self.clock() if timestamp is None else timestamp)
+
+    def apply_fill(self, venue, symbol, side, quantity, price, fee=0.0, timestamp=None):
+        now = self.clock() if timestamp is None else timestamp
+        base, quote = symbol.split('/', 1)
+        notional = quantity * price
+        if side == 'buy':
+            self._move(venue, base, quantity, now)
+            self._move(venue, quote, -(notional + fee), now)
+        else:
+            self._move(venue, base, -quantity, now)
+            self._move(venue, quote, notional - fee, now)
+
+    def apply_transfer(self, asset, from_venue, to_venue, amount, fee=0.0, timestamp=None):
+        now = self.clock() if timestamp is None else timestamp
+        self._move(from_venue, asset, -(amount + fee), now)
+        self._move(to_venue, asset, amount, now)
+
+    def flow_rate(self, venue, asset, now=None):
+        now = self.clock() if now is None else now
+        return self._decayed_flow((venue, asset), now) / self.flow_time_constant
+
+    def time_to_depletion(self, venue, asset, now=None):
+        rate = self.flow_rate(venue, asset, now)
+        if rate >= 0:
+            return None
+        return max(self.free(venue, asset), 0.0) / -rate
+
+    def venues(self, asset):
+        return [venue for venue, held in self._balances if held == asset]
+
+    def balances(self):
+        """Returns {(venue, asset): balance}"""
+        return dict(self._balances)
+
+    def snapshot(self):
+        snapshot = {}
+        for (venue, asset), amount in self._balances.items():
+            snapshot.setdefault(venue, {})[asset] = amount
+        return snapshot
+
+
+class RebalancePlanner:
+    """
+    Produces transfer plans that keep each asset spread across venues.
+
+    A venue needs topping up when its balance drops below trigger_ratio of
+    its target share, or when its projected time to depletion is shorter
+    than twice the transfer lead time (transfer time x safety factor); the
+    transfer is then timed to land one lead time before depletion. Transfers
+    come from the venue with the largest surplus, are sized to bring the
+    receiver back to target net of the withdrawal fee, and are skipped when
+    the fee would eat more than max_fee_ratio of the amount moved.
+
+    Methods
+    -------
+    plan(assets, now=None):
+        Returns the list of Transfers that should be scheduled.
+    simulate(fills, start_balances, assets, horizon=None):
+        Replays timestamped fills against a fresh tracker, executes the plan
+        as it would be executed live and reports the outcome.
+    """
+    def __init__(self, inventory, withdrawal_fees, transfer_times, target_weights=None,
+                 trigger_ratio=0.25, safety_factor=2.0, max_fee_ratio=0.05):
+        self.inventory = inventory
+        self.withdrawal_fees = withdrawal_fees
+        self.transfer_times = transfer_times
+        self.target_weights = target_weights or {}
+        self.trigger_ratio = trigger_ratio
+        self.safety_factor = safety_factor
+        self.max_fee_ratio = max_fee_ratio
+
+    def _targets(self, asset, venues, total):
+        weights = {venue: self.target_weights.get(venue, 1.0) for venue in venues}
+        weight_sum = sum(weights.values()) or 1.0
+        return {venue: total * weight / weight_sum for venue, weight in weights.items()}
+
+    def plan(self, assets, now=None):
+        inventory = self.inventory
+        now = inventory.clock() if now is None else now
+        transfers = []
+
+        for asset in assets:
+            venues = inventory.venues(asset)
+            if len(venues) < 2:
+                continue
+            balances = {venue: inventory.free(venue, asset) for venue in venues}
+            targets = self._targets(asset, venues, sum(balances.values()))
+            lead_time = self.transfer_times.get(asset, 0) * self.safety_factor
+
+            for venue in sorted(venues, key=lambda v: balances[v] - targets[v]):
+                deficit = targets[venue] - balances[venue]
+                if deficit <= 0:
+                    break
+                depletion = inventory.time_to_depletion(venue, asset, now)
+                low = balances[venue] < targets[venue] * self.trigger_ratio
+                draining = depletion is not None and depletion < 2 * lead_time
+                if not (low or draining):
+                    continue
+
+                donor = max(venues, key=lambda v: balances[v] - targets[v])
+                fee = self.withdrawal_fees.get(donor, {}).get(asset, 0.0)
+                surplus = balances[donor] - targets[donor]
+                amount = min(deficit, surplus - fee)
+                if donor == venue or amount <= 0 or fee > amount * self.max_fee_ratio:
+                    continue
+
+                # Send now when already low; otherwise just early enough to land in time
+                send_at = now if low or depletion is None else max(now, now + depletion - lead_time)
+                transfer_time = self.transfer_times.get(asset, 0)
+                transfers.append(Transfer(
+                    asset=asset, from_venue=donor, to_venue=venue, amount=amount, fee=fee,
+                    send_at=send_at, arrives_at=send_at + transfer_time,
+                    reason='below trigger' if low else f'depletes in {depletion:.0f}s'))
+                balances[donor] -= amount + fee
+                balances[venue] += amount
+
+        return transfers
+
+    def simulate(self, fills, start_balances, assets, horizon=None):
+        """
+        fills: iterable of (timestamp, venue, symbol, side, quantity, price, fee)
+        start_balances: {venue: {asset: amount}}
+        """
+        inventory = InventoryTracker(self.inventory.flow_time_constant, clock=lambda: 0.0)
+        for venue, held in start_balances.items():
+            for asset, amount in held.items():
+                inventory.set_balance(venue, asset, amount)
+        planner = RebalancePlanner(
+            inventory, self.withdrawal_fees, self.transfer_times, self.target_weights,
+            self.trigger_ratio, self.safety_factor, self.max_fee_ratio)
+
+        pending, executed, blocked = [], [], 0
+        in_flight = set()
+        minimum = inventory.balances()
+        now = 0.0
+
+        def settle(until):
+            for transfer in [t for t in pending if t.arrives_at <= until]:
+                pending.remove(transfer)
+                inventory.adjust(transfer.to_venue, transfer.asset, transfer.amount, transfer.arrives_at)
+                in_flight.discard((transfer.asset, transfer.to_venue))
+
+        for now, venue, symbol, side, quantity, price, fee in fills:
+            settle(now)
+            base, quote = symbol.split('/', 1)
+            needed = (quote, quantity * price + fee) if side == 'buy' else (base, quantity)
+            if inventory.free(venue, needed[0]) < needed[1]:
+                blocked += 1
+                continue
+            inventory.apply_fill(venue, symbol, side, quantity, price, fee, timestamp=now)
+
+            for transfer in planner.plan(assets, now):
+                if (transfer.asset, transfer.to_venue) in in_flight or transfer.send_at > now:
+                    continue
+                # Funds leave the donor immediately and land after the transfer time
+                inventory.adjust(transfer.from_venue, transfer.asset, -(transfer.amount + transfer.fee), now)
+                pending.append(transfer)
+                in_flight.add((transfer.asset, transfer.to_venue))
+                executed.append(transfer)
+
+            for key, amount in inventory.balances().items():
+                minimum[key] = min(minimum.get(key, amount), amount)
+
+        settle(float('inf') if horizon is None else now + horizon)
+        return {
+            'transfers': executed,
+            'blocked_fills': blocked,
+            'fees_paid': sum(t.fee for t in executed),
+            'final_balances': inventory.snapshot(),
+            'min_balances': minimum,
+        }
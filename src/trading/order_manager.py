@@ -0,0 +1,184 @@
+from collections import OrderedDict, namedtuple
+import math
+import time
+from utils.event_bus import event_bus
+from utils.logger import logger
+
+Reconciliation = namedtuple('Reconciliation', ['quantity', 'buy_price', 'sell_price', 'fees', 'profit',
+                                               'estimated_profit', 'buy_slippage', 'sell_slippage'])
+
+
+class _TrackedOrder:
+    __slots__ = ('order', 'expected_price', 'fee_rate')
+
+    def __init__(self, order, expected_price, fee_rate):
+        self.order = order
+        self.expected_price = expected_price
+        self.fee_rate = fee_rate
+
+
+class SlippageStats:
+    """
+    Running realized-versus-expected slippage per (venue, side).
+
+    Slippage is in basis points and signed so that positive is always
+    worse than expected: paying more on a buy, receiving less on a sell.
+    Mean and variance use Welford's update, O(1) per fill.
+    """
+    def __init__(self):
+        self._stats = {}
+
+    def add(self, venue, side, expected_price, fill_price):
+        slippage = (fill_price - expected_price) / expected_price * 10000
+        if side == 'sell':
+            slippage = -slippage
+        count, mean, m2, worst = self._stats.get((venue, side), (0, 0.0, 0.0, -math.inf))
+        count += 1
+        delta = slippage - mean
+        mean += delta / count
+        m2 += delta * (slippage - mean)
+        self._stats[(venue, side)] = (count, mean, m2, max(worst, slippage))
+        return slippage
+
+    def snapshot(self):
+        return {f'{venue}:{side}': {'count': count, 'mean_bps': mean,
+                                    'std_bps': math.sqrt(m2 / (count - 1)) if count > 1 else 0.0,
+                                    'worst_bps': worst}
+                for (venue, side), (count, mean, m2, worst) in self._stats.items()}
+
+
+class OrderManager:
+    """
+    Tracks placed orders until they are final and reconciles their fills.
+
+    Orders are updated by batched polling: one open-orders request per
+    venue that has tracked orders, however many there are, plus a single
+    status fetch for each order the moment it leaves the open list to read
+    its final fills. Orders that come back final from placement (Binance
+    market orders with a FULL response) never need polling. update() is
+    the single entry point for order state, so a user-data stream can feed
+    it too.
+
+    Methods
+    -------
+    track(order, expected_price, fee_rate=0.0):
+        Starts tracking an order placed at an expected price.
+    update(order):
+        Applies a newer state of a tracked order.
+    poll():
+        Refreshes every tracked open order with one request per venue.
+    wait(orders, timeout):
+        Polls until all given orders are final or the timeout passes.
+    fee_in_quote(order, symbol):
+        Fee actually paid, converted to the quote currency.
+    reconcile(buy_order, sell_order, estimated_profit, symbol='BTC/USDT'):
+        Realized quantity, prices, fees and profit of a filled buy/sell pair.
+    """
+    def __init__(self, venues, events=event_bus, poll_interval=0.5, max_history=1000,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.venues = venues
+        self.events = events
+        self.poll_interval = poll_interval
+        self.max_history = max_history
+        self.slippage = SlippageStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._open = {}
+        self._tracked = OrderedDict()
+
+    def track(self, order, expected_price, fee_rate=0.0):
+        key = (order.venue, order.order_id)
+        self._tracked[key] = _TrackedOrder(order, expected_price, fee_rate)
+        while len(self._tracked) > self.max_history:
+            oldest = next(iter(self._tracked))
+            if oldest in self._open:
+                break
+            del self._tracked[oldest]
+        if order.is_final:
+            self._finalize(key)
+        else:
+            self._open[key] = self._tracked[key]
+        return order
+
+    def update(self, order):
+        key = (order.venue, order.order_id)
+        tracked = self._tracked.get(key)
+        if tracked is None:
+            return
+        # Status responses can omit what the placement already told us
+        for field in ('symbol', 'side', 'quantity'):
+            if not getattr(order, field):
+                setattr(order, field, getattr(tracked.order, field))
+        tracked.order = order
+        if order.is_final and key in self._open:
+            del self._open[key]
+            self._finalize(key)
+
+    def _finalize(self, key):
+        tracked = self._tracked[key]
+        order = tracked.order
+        logger.info(f"📬 {order.venue} order {order.order_id} {order.status}: "
+                    f"{order.filled:.8f}/{order.quantity:.8f} @ {order.average_price}")
+        if order.filled and order.average_price:
+            slippage = self.slippage.add(order.venue, order.side, tracked.expected_price, order.average_price)
+            logger.info(f"   Slippage: {slippage:+.2f} bps vs expected {tracked.expected_price}")
+            self.events.publish('slippage', self.slippage.snapshot())
+
+    def poll(self):
+        venues = {venue for venue, _ in self._open}
+        for venue in venues:
+            handler = self.venues[venue]
+            open_orders = handler.get_open_orders()
+            if open_orders is None:
+                continue
+            still_open = {order.order_id: order for order in open_orders}
+            for key in [key for key in self._open if key[0] == venue]:
+                if key[1] in still_open:
+                    self.update(still_open[key[1]])
+                    continue
+                # Left the open list: read its final state once
+                tracked = self._open[key]
+                final = handler.fetch_order(tracked.order.symbol, key[1])
+                if final is not None:
+                    self.update(final)
+
+    def wait(self, orders, timeout=10.0):
+        keys = [(order.venue, order.order_id) for order in orders]
+        deadline = self._clock() + timeout
+        while any(key in self._open for key in keys) and self._clock() < deadline:
+            self._sleep(self.poll_interval)
+            self.poll()
+        pending = [key for key in keys if key in self._open]
+        if pending:
+            logger.warning(f"⚠️ Orders still open after {timeout}s: {pending}")
+        return [self._tracked[key].order for key in keys]
+
+    def fee_in_quote(self, order, symbol):
+        """Fee of a tracked order in the symbol's quote currency"""
+        base_asset, quote_asset = symbol.split('/', 1)
+        tracked = self._tracked[(order.venue, order.order_id)]
+        order = tracked.order
+        notional = order.filled * (order.average_price or tracked.expected_price)
+        if order.fee is None:
+            return notional * tracked.fee_rate
+        if order.fee_asset == quote_asset:
+            return order.fee
+        if order.fee_asset == base_asset:
+            return order.fee * (order.average_price or tracked.expected_price)
+        # Paid in a third asset (e.g. BNB); count it at the configured rate
+        return notional * tracked.fee_rate
+
+    def reconcile(self, buy_order, sell_order, estimated_profit, symbol='BTC/USDT'):
+        buy = self._tracked[(buy_order.venue, buy_order.order_id)]
+        sell = self._tracked[(sell_order.venue, sell_order.order_id)]
+        buy_price = buy.order.average_price or buy.expected_price
+        sell_price = sell.order.average_price or sell.expected_price
+
+        fees = self.fee_in_quote(buy_order, symbol) + self.fee_in_quote(sell_order, symbol)
+        quantity = min(buy.order.filled, sell.order.filled)
+        # Any unmatched remainder stays in inventory and is not counted as profit
+        profit = quantity * (sell_price - buy_price) - fees
+        buy_slippage = (buy_price - buy.expected_price) / buy.expected_price * 10000
+        sell_slippage = (sell.expected_price - sell_price) / sell.expected_price * 10000
+        return Reconciliation(quantity, buy_price, sell_price, fees, profit, estimated_profit,
+                              buy_slippage, sell_slippage)
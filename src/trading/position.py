@@ -1,15 +1,17 @@
-from config.settings import TRADING_CAPITAL, ALLOCATION_PERCENTAGE, STOP_LOSS_THRESHOLD
+from config.runtime import runtime_settings
 
 
 class PositionManager:
     """
     PositionManager class provides methods to manage trading positions, calculate position size, fees, profit, and check stop loss.
     Methods:
-        calculate_position_size(capital=TRADING_CAPITAL, allocation_percentage=ALLOCATION_PERCENTAGE):
+        calculate_position_size(capital=None, allocation_percentage=None, symbol=None):
             Calculates the position size based on the given capital and allocation percentage.
             Args:
-                capital (float): The total trading capital.
-                allocation_percentage (float): The percentage of capital to allocate.
+                capital (float): The total trading capital (current TRADING_CAPITAL by default).
+                allocation_percentage (float): The percentage of capital to allocate
+                    (current ALLOCATION_PERCENTAGE by default).
+                symbol (str): Symbol whose overrides apply, if any.
             Returns:
                 float: The calculated position size.
             Raises:
@@ -29,17 +31,21 @@ class PositionManager:
                 quantity (float): The quantity of the asset being traded.
             Returns:
                 float: The calculated profit.
-        check_stop_loss(current_profit_loss, threshold=STOP_LOSS_THRESHOLD):
+        check_stop_loss(current_profit_loss, threshold=None, symbol=None):
             Checks if the current profit/loss has reached the stop loss threshold.
             Args:
                 current_profit_loss (float): The current profit or loss.
-                threshold (float): The stop loss threshold.
+                threshold (float): The stop loss threshold (current STOP_LOSS_THRESHOLD by default).
+                symbol (str): Symbol whose overrides apply, if any.
             Returns:
                 bool: True if the current profit/loss is less than or equal to the threshold, False otherwise.
     """
     @staticmethod
-    def calculate_position_size(capital=TRADING_CAPITAL, 
-                              allocation_percentage=ALLOCATION_PERCENTAGE):
+    def calculate_position_size(capital=None, allocation_percentage=None, symbol=None):
+        if capital is None:
+            capital = runtime_settings.get('TRADING_CAPITAL', symbol)
+        if allocation_percentage is None:
+            allocation_percentage = runtime_settings.get('ALLOCATION_PERCENTAGE', symbol)
         if allocation_percentage < 0 or allocation_percentage > 100:
             raise ValueError("Allocation percentage should be between 0 and 100.")
         return capital * (allocation_percentage / 100)
@@ -77,5 +83,7 @@ class PositionManager:
         return profit
 
     @staticmethod
-    def check_stop_loss(current_profit_loss, threshold=STOP_LOSS_THRESHOLD):
+    def check_stop_loss(current_profit_loss, threshold=None, symbol=None):
+        if threshold is None:
+            threshold = runtime_settings.get('STOP_LOSS_THRESHOLD', symbol)
         return current_profit_loss <= threshold
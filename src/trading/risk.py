@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+import threading
+from config.settings import (RISK_DAILY_LOSS_LIMIT, RISK_MAX_OPEN_NOTIONAL, RISK_MAX_ORDERS_PER_MINUTE,
+                             RISK_MAX_CONSECUTIVE_FAILURES, RISK_MAX_QUOTE_AGE)
+from utils.event_bus import event_bus
+from utils.logger import logger
+from utils.time_sync import timeline
+
+
+def _next_midnight(now):
+    day = datetime.fromtimestamp(now).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class RiskEngine:
+    """
+    Pre-trade limits and a kill switch, checked in constant time per trade.
+
+    Everything a check needs is a running counter kept up to date as trades
+    happen: today's realized P&L (reset at local midnight), open notional
+    per venue, a token bucket refilled at the allowed order rate, and the
+    number of consecutive failed executions. check() compares those
+    counters with the limits, so gating an order is a handful of
+    comparisons with no I/O.
+
+    The kill switch halts all trading until resume(): it trips on its own
+    when the daily loss limit or the consecutive failure limit is reached,
+    and can be pulled by hand with halt(). A daily-loss halt clears itself
+    at midnight. Too many orders, too much open notional or stale quotes
+    only reject the trade at hand. Every change of state is logged and
+    published on the event bus as 'risk'.
+
+    Methods
+    -------
+    check(exposures, orders=None, quote_time=None):
+        Approves a trade placing `orders` orders with the given
+        (venue, notional) exposures, or returns why not. Approval reserves
+        the notional and the order-rate tokens.
+    release(exposures):
+        Returns notional reserved by check() once the orders are final.
+    record_trade(profit):
+        Adds a completed trade's realized profit and clears the failure streak.
+    record_failure(reason):
+        Counts a failed execution.
+    halt(reason) / resume():
+        Pulls or resets the kill switch.
+    configure(daily_loss_limit, max_open_notional, max_orders_per_minute, max_consecutive_failures,
+              max_quote_age):
+        Replaces the limits; counters and the halt state are kept.
+    snapshot():
+        Limits, counters and halt state as a dict.
+    """
+    def __init__(self, daily_loss_limit=RISK_DAILY_LOSS_LIMIT, max_open_notional=RISK_MAX_OPEN_NOTIONAL,
+                 max_orders_per_minute=RISK_MAX_ORDERS_PER_MINUTE,
+                 max_consecutive_failures=RISK_MAX_CONSECUTIVE_FAILURES, max_quote_age=RISK_MAX_QUOTE_AGE,
+                 events=event_bus, clock=timeline.now):
+        self.daily_loss_limit = daily_loss_limit
+        self.max_open_notional = max_open_notional
+        self.max_orders_per_minute = max_orders_per_minute
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_quote_age = max_quote_age
+        self.events = events
+        self.clock = clock
+        now = clock()
+        self.daily_pnl = 0.0
+        self._day_end = _next_midnight(now)
+        self.open_notional = {venue: 0.0 for venue in max_open_notional}
+        self._tokens = float(max_orders_per_minute)
+        self._refill_rate = max_orders_per_minute / 60.0
+        self._refilled_at = now
+        self.consecutive_failures = 0
+        self.halt_reason = None
+        self._halted_by_loss = False
+        self.rejected = 0
+        self._lock = threading.Lock()
+        events.publish('risk', self.snapshot())
+
+    def configure(self, daily_loss_limit, max_open_notional, max_orders_per_minute, max_consecutive_failures,
+                  max_quote_age):
+        with self._lock:
+            self.daily_loss_limit = daily_loss_limit
+            self.max_open_notional = max_open_notional
+            self.max_orders_per_minute = max_orders_per_minute
+            self._refill_rate = max_orders_per_minute / 60.0
+            self._tokens = min(self._tokens, float(max_orders_per_minute))
+            self.max_consecutive_failures = max_consecutive_failures
+            self.max_quote_age = max_quote_age
+            self.events.publish('risk', self.snapshot())
+
+    @property
+    def halted(self):
+        return self.halt_reason is not None
+
+    def _roll_day(self, now):
+        if now < self._day_end:
+            return
+        self.daily_pnl = 0.0
+        self._day_end = _next_midnight(now)
+        if self._halted_by_loss:
+            logger.info("🟢 New trading day; daily loss halt cleared")
+            self._set_halt(None)
+
+    def _set_halt(self, reason, by_loss=False):
+        self.halt_reason = reason
+        self._halted_by_loss = by_loss
+        self.events.publish('risk', self.snapshot())
+
+    def _reject(self, reason):
+        self.rejected += 1
+        logger.warning(f"🛡️ Risk check rejected trade: {reason}")
+        return reason
+
+    def check(self, exposures, orders=None, quote_time=None):
+        now = self.clock()
+        with self._lock:
+            self._roll_day(now)
+            if self.halt_reason is not None:
+                return self._reject(f"trading halted ({self.halt_reason})")
+            if quote_time is not None and now - quote_time > self.max_quote_age:
+                return self._reject(f"quotes are {now - quote_time:.2f}s old (max {self.max_quote_age}s)")
+            for venue, notional in exposures:
+                open_notional = self.open_notional.get(venue, 0.0) + notional
+                if open_notional > self.max_open_notional.get(venue, float('inf')):
+                    return self._reject(f"{venue} open notional {open_notional:.2f} would exceed "
+                                        f"{self.max_open_notional[venue]}")
+            orders = len(exposures) if orders is None else orders
+            self._tokens = min(self.max_orders_per_minute,
+                               self._tokens + (now - self._refilled_at) * self._refill_rate)
+            self._refilled_at = now
+            if self._tokens < orders:
+                return self._reject(f"order rate above {self.max_orders_per_minute} per minute")
+
+            self._tokens -= orders
+            for venue, notional in exposures:
+                self.open_notional[venue] = self.open_notional.get(venue, 0.0) + notional
+        return None
+
+    def release(self, exposures):
+        with self._lock:
+            for venue, notional in exposures:
+                self.open_notional[venue] = max(self.open_notional.get(venue, 0.0) - notional, 0.0)
+
+    def record_trade(self, profit):
+        with self._lock:
+            self._roll_day(self.clock())
+            self.consecutive_failures = 0
+            self.daily_pnl += profit
+            if -self.daily_pnl >= self.daily_loss_limit and self.halt_reason is None:
+                logger.error(f"🛑 KILL SWITCH: daily loss ${-self.daily_pnl:.2f} reached the "
+                             f"${self.daily_loss_limit} limit; trading halted until tomorrow")
+                self._set_halt(f"daily loss limit ${self.daily_loss_limit}", by_loss=True)
+            else:
+                self.events.publish('risk', self.snapshot())
+
+    def record_failure(self, reason):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.max_consecutive_failures and self.halt_reason is None:
+                logger.error(f"🛑 KILL SWITCH: {self.consecutive_failures} consecutive failed executions "
+                             f"(last: {reason}); trading halted")
+                self._set_halt(f"{self.consecutive_failures} consecutive failures")
+
+    def halt(self, reason='manual halt'):
+        with self._lock:
+            logger.error(f"🛑 KILL SWITCH: {reason}; trading halted")
+            self._set_halt(reason)
+
+    def resume(self):
+        with self._lock:
+            if self.halt_reason is not None:
+                logger.info(f"🟢 Trading resumed (was halted: {self.halt_reason})")
+            self.consecutive_failures = 0
+            self._set_halt(None)
+
+    def snapshot(self):
+        return {'halted': self.halted, 'halt_reason': self.halt_reason, 'daily_pnl': self.daily_pnl,
+                'daily_loss_limit': self.daily_loss_limit, 'open_notional': dict(self.open_notional),
+                'max_open_notional': dict(self.max_open_notional),
+                'order_tokens': round(self._tokens, 2), 'max_orders_per_minute': self.max_orders_per_minute,
+                'consecutive_failures': self.consecutive_failures,
+                'max_consecutive_failures': self.max_consecutive_failures, 'rejected': self.rejected}
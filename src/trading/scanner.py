@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import time
+from trading.spread_matrix import Route, SpreadMatrix
+from utils.shm_ring import SharedRing
+from utils.logger import logger
+
+# time, symbol index, buy venue index, sell venue index, buy price, sell price,
+# profit per unit, net edge
+CANDIDATE_FORMAT = '<dIHHdddd'
+
+
+def create_venue_handlers(venue_names):
+    """Build fresh exchange handlers; each scanner process owns its own connections"""
+    from exchanges.binance_client import BinanceHandler
+    from exchanges.kucoin_client import KuCoinHandler
+    factories = {'binance': BinanceHandler, 'kucoin': KuCoinHandler}
+    return {name: factories[name]() for name in venue_names}
+
+
+def _scan_shard(shard_id, symbols, symbol_index, venue_names, fee_rates, min_edge,
+                interval, ring_name, ring_capacity, stop_event):
+    """Worker process: poll quotes for one shard of symbols and push candidate routes"""
+    ring = SharedRing.attach(ring_name, CANDIDATE_FORMAT, ring_capacity)
+    handlers = create_venue_handlers(venue_names)
+    matrix = SpreadMatrix(venue_names, fee_rates)
+    venue_index = {name: i for i, name in enumerate(venue_names)}
+    logger.info(f"🧩 Scanner shard {shard_id} (pid {os.getpid()}) watching {len(symbols)} symbols")
+
+    try:
+        while not stop_event.is_set():
+            started = time.time()
+            for symbol in symbols:
+                for venue, handler in handlers.items():
+                    quote = handler.get_best_bid_ask(symbol)
+                    if quote is None:
+                        matrix.remove_quote(symbol, venue)
+                    else:
+                        matrix.update_quote(symbol, venue, quote.bid, quote.ask)
+
+                route = matrix.best_route(symbol)
+                if route is not None and route.net_edge > min_edge:
+                    ring.push(time.time(), symbol_index[symbol], venue_index[route.buy_venue],
+                              venue_index[route.sell_venue], route.buy_price, route.sell_price,
+                              route.profit_per_unit, route.net_edge)
+            stop_event.wait(max(interval - (time.time() - started), 0))
+    finally:
+        ring.close()
+
+
+class ShardedScanner:
+    """
+    Splits symbol scanning across worker processes, one shard per process.
+
+    Each worker owns its own exchange handlers and SpreadMatrix, so quote
+    parsing and spread math run outside the execution process's GIL. Workers
+    push candidate routes as fixed-size records into a per-worker shared
+    memory ring (SharedRing); the execution process drains all rings and is
+    the only place that holds balance and order state.
+
+    Methods
+    -------
+    start():
+        Creates the rings and spawns the worker processes.
+    candidates(max_age=None):
+        Drains every ring and returns fresh Routes, best net edge first.
+    stop():
+        Signals the workers, joins them and frees the shared memory.
+    """
+    def __init__(self, symbols, venue_names, workers=None, fee_rates=None, min_edge=0.0,
+                 interval=1.0, ring_capacity=4096):
+        self.symbols = list(symbols)
+        self.venue_names = list(venue_names)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(self.symbols)))
+        self.fee_rates = fee_rates or {}
+        self.min_edge = min_edge
+        self.interval = interval
+        self.ring_capacity = ring_capacity
+        self._context = multiprocessing.get_context('spawn')
+        self._stop_event = None
+        self._processes = []
+        self._rings = []
+
+    def shards(self):
+        # Round-robin keeps shards balanced when symbols are sorted by activity
+        return [self.symbols[i::self.workers] for i in range(self.workers)]
+
+    def start(self):
+        self._stop_event = self._context.Event()
+        symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        for shard_id, shard in enumerate(self.shards()):
+            ring = SharedRing.create(CANDIDATE_FORMAT, self.ring_capacity)
+            process = self._context.Process(
+                target=_scan_shard, name=f'scanner-{shard_id}', daemon=True,
+                args=(shard_id, shard, symbol_index, self.venue_names, self.fee_rates,
+                      self.min_edge, self.interval, ring.name, self.ring_capacity,
+                      self._stop_event))
+            process.start()
+            self._rings.append(ring)
+            self._processes.append(process)
+        logger.info(f"🧩 Started {self.workers} scanner processes for {len(self.symbols)} symbols")
+        return self
+
+    def candidates(self, max_age=None):
+        now = time.time()
+        routes = []
+        for ring in self._rings:
+            for (stamp, symbol, buy, sell, buy_price, sell_price,
+                 profit_per_unit, net_edge) in ring.drain():
+                if max_age is not None and now - stamp > max_age:
+                    continue
+                routes.append(Route(self.symbols[symbol], self.venue_names[buy], self.venue_names[sell],
+                                    buy_price, sell_price, profit_per_unit, net_edge))
+        routes.sort(key=lambda route: route.net_edge, reverse=True)
+        return routes
+
+    def stop(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for ring in self._rings:
+            ring.close()
+            ring.unlink()
+        self._processes, self._rings = [], []
@@ -0,0 +1,88 @@
+from collections import namedtuple
+from decimal import Decimal
+import numpy as np
+
+SizingResult = namedtuple('SizingResult', [
+    'quantity', 'buy_notional', 'sell_notional', 'buy_cost', 'sell_proceeds', 'profit', 'limited_by'
+])
+
+
+class SizingEngine:
+    """
+    Sizes a cross-venue trade from order book depth instead of a fixed amount.
+
+    Walking the buy venue's asks and the sell venue's bids together, the
+    marginal profit of one more unit is bid * (1 - sell_fee) - ask * (1 + buy_fee).
+    It can only fall as size grows, so the profitable size ends at the first
+    depth segment where it turns non-positive. The search runs on the union
+    of both books' cumulative depths with NumPy, and every cap (free quote
+    balance, free base balance, max notional) is applied by interpolating
+    on the piecewise-linear cumulative cost curves.
+
+    Methods
+    -------
+    size(asks, bids, buy_fee_rate, sell_fee_rate, quote_balance, base_balance,
+         min_notional=0.0, max_notional=None, step_size=None):
+        Returns a SizingResult; quantity is 0.0 when no profitable size
+        clears the minimum notional.
+    """
+    @staticmethod
+    def _empty(reason):
+        return SizingResult(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, reason)
+
+    def size(self, asks, bids, buy_fee_rate, sell_fee_rate, quote_balance, base_balance,
+             min_notional=0.0, max_notional=None, step_size=None):
+        asks = np.asarray(asks, dtype=float).reshape(-1, 2)
+        bids = np.asarray(bids, dtype=float).reshape(-1, 2)
+        if not len(asks) or not len(bids):
+            return self._empty('empty book')
+
+        cum_ask = np.cumsum(asks[:, 1])
+        cum_bid = np.cumsum(bids[:, 1])
+        depth = min(cum_ask[-1], cum_bid[-1])
+        breaks = np.union1d(cum_ask, cum_bid)
+        breaks = breaks[breaks <= depth]
+        starts = np.concatenate(([0.0], breaks[:-1]))
+        segment = breaks - starts
+
+        # Price level in force at the start of each segment on either side
+        ask_price = asks[np.searchsorted(cum_ask, starts, side='right'), 0]
+        bid_price = bids[np.searchsorted(cum_bid, starts, side='right'), 0]
+        unit_cost = ask_price * (1 + buy_fee_rate)
+        unit_proceeds = bid_price * (1 - sell_fee_rate)
+
+        profitable = (unit_proceeds - unit_cost) > 0
+        count = len(profitable) if profitable.all() else int(np.argmin(profitable))
+        if count == 0:
+            return self._empty('no profitable depth')
+
+        grid = np.concatenate(([0.0], breaks))
+        cum_cost = np.concatenate(([0.0], np.cumsum(segment * unit_cost)))
+        cum_proceeds = np.concatenate(([0.0], np.cumsum(segment * unit_proceeds)))
+        cum_buy_notional = np.concatenate(([0.0], np.cumsum(segment * ask_price)))
+        cum_sell_notional = np.concatenate(([0.0], np.cumsum(segment * bid_price)))
+
+        caps = {
+            'profitable depth': breaks[count - 1],
+            'base balance': base_balance,
+            'quote balance': float(np.interp(quote_balance, cum_cost, grid)),
+        }
+        if max_notional is not None:
+            caps['max notional'] = float(min(np.interp(max_notional, cum_buy_notional, grid),
+                                             np.interp(max_notional, cum_sell_notional, grid)))
+        limited_by = min(caps, key=caps.get)
+        quantity = max(float(caps[limited_by]), 0.0)
+        if step_size:
+            # In decimal so the order quantity is an exact multiple of the step (0.3, not 0.30000000000000004)
+            step = Decimal(str(step_size))
+            quantity = float(Decimal(repr(quantity)) // step * step)
+
+        buy_notional = float(np.interp(quantity, grid, cum_buy_notional))
+        sell_notional = float(np.interp(quantity, grid, cum_sell_notional))
+        if quantity <= 0 or min(buy_notional, sell_notional) < min_notional:
+            return self._empty('below min notional')
+
+        buy_cost = float(np.interp(quantity, grid, cum_cost))
+        sell_proceeds = float(np.interp(quantity, grid, cum_proceeds))
+        return SizingResult(float(quantity), buy_notional, sell_notional, buy_cost,
+                            sell_proceeds, sell_proceeds - buy_cost, limited_by)
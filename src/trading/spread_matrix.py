@@ -0,0 +1,153 @@
+from collections import namedtuple
+import heapq
+
+Route = namedtuple('Route', [
+    'symbol', 'buy_venue', 'sell_venue', 'buy_price', 'sell_price',
+    'profit_per_unit', 'net_edge'
+])
+
+
+class _SymbolSpreads:
+    """Per-symbol quote vectors and the N x N matrix of net edges."""
+    __slots__ = ('costs', 'proceeds', 'asks', 'bids', 'edges', 'best')
+
+    def __init__(self, size):
+        self.asks = [None] * size
+        self.bids = [None] * size
+        # Fee-adjusted cost of buying one unit / proceeds of selling one unit
+        self.costs = [None] * size
+        self.proceeds = [None] * size
+        self.edges = [[None] * size for _ in range(size)]
+        # (edge, buy_index, sell_index) of the most profitable cell, or None
+        self.best = None
+
+
+class SpreadMatrix:
+    """
+    Keeps, for every symbol, an N x N matrix of net edges between N venues.
+
+    Cell (i, j) holds the relative return of buying at the best ask on venue i
+    and selling at the best bid on venue j, after both venues' taker fees.
+    A quote update on venue i only touches row i and column i, so the cost of
+    a tick is O(N) regardless of how many symbols are tracked.
+
+    Methods
+    -------
+    update_quote(symbol, venue, bid, ask):
+        Stores a new top-of-book quote and refreshes the affected row and column.
+    remove_quote(symbol, venue):
+        Drops a venue's quote for a symbol (e.g. when it goes stale).
+    best_route(symbol):
+        Returns the most profitable Route for a symbol, or None.
+    top_routes(k, min_edge=0.0, symbols=None):
+        Returns up to k most profitable Routes across symbols, best first.
+    """
+    def __init__(self, venues, fee_rates=None, default_fee_rate=0.001):
+        self.venues = list(venues)
+        self._index = {venue: i for i, venue in enumerate(self.venues)}
+        fee_rates = fee_rates or {}
+        self._fees = [fee_rates.get(venue, default_fee_rate) for venue in self.venues]
+        self._symbols = {}
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    def update_quote(self, symbol, venue, bid, ask):
+        i = self._index[venue]
+        spreads = self._symbols.get(symbol)
+        if spreads is None:
+            spreads = self._symbols[symbol] = _SymbolSpreads(len(self.venues))
+
+        fee = self._fees[i]
+        spreads.bids[i] = bid
+        spreads.asks[i] = ask
+        spreads.costs[i] = ask * (1 + fee) if ask else None
+        spreads.proceeds[i] = bid * (1 - fee) if bid else None
+        self._refresh(spreads, i)
+
+    def remove_quote(self, symbol, venue):
+        spreads = self._symbols.get(symbol)
+        if spreads is None:
+            return
+        i = self._index[venue]
+        spreads.bids[i] = spreads.asks[i] = None
+        spreads.costs[i] = spreads.proceeds[i] = None
+        self._refresh(spreads, i)
+
+    def _refresh(self, spreads, i):
+        costs, proceeds, edges = spreads.costs, spreads.proceeds, spreads.edges
+        cost_i, proceeds_i = costs[i], proceeds[i]
+        row, best = edges[i], None
+
+        for j in range(len(costs)):
+            if j == i:
+                continue
+            # Row i: buy on venue i, sell on venue j
+            edge = None
+            if cost_i is not None and proceeds[j] is not None:
+                edge = (proceeds[j] - cost_i) / cost_i
+                if best is None or edge > best[0]:
+                    best = (edge, i, j)
+            row[j] = edge
+
+            # Column i: buy on venue j, sell on venue i
+            edge = None
+            if costs[j] is not None and proceeds_i is not None:
+                edge = (proceeds_i - costs[j]) / costs[j]
+                if best is None or edge > best[0]:
+                    best = (edge, j, i)
+            edges[j][i] = edge
+
+        previous = spreads.best
+        if previous is not None and i not in (previous[1], previous[2]):
+            # The previous best lives outside the touched row/column and is still valid
+            if best is None or previous[0] >= best[0]:
+                best = previous
+        elif previous is not None and (best is None or best[0] < previous[0]):
+            # The previous best was in the touched row/column and got worse,
+            # so another cell elsewhere might now be the maximum
+            best = self._scan_best(edges)
+        spreads.best = best
+
+    @staticmethod
+    def _scan_best(edges):
+        best = None
+        for i, row in enumerate(edges):
+            for j, edge in enumerate(row):
+                if edge is not None and (best is None or edge > best[0]):
+                    best = (edge, i, j)
+        return best
+
+    def _route(self, symbol, spreads, edge, i, j):
+        return Route(
+            symbol=symbol,
+            buy_venue=self.venues[i],
+            sell_venue=self.venues[j],
+            buy_price=spreads.asks[i],
+            sell_price=spreads.bids[j],
+            profit_per_unit=spreads.proceeds[j] - spreads.costs[i],
+            net_edge=edge,
+        )
+
+    def best_route(self, symbol):
+        spreads = self._symbols.get(symbol)
+        if spreads is None or spreads.best is None:
+            return None
+        return self._route(symbol, spreads, *spreads.best)
+
+    def top_routes(self, k, min_edge=0.0, symbols=None):
+        candidates = []
+        for symbol in (symbols if symbols is not None else self._symbols):
+            spreads = self._symbols.get(symbol)
+            # Symbols whose best cell is below the cut cannot contribute any route
+            if spreads is None or spreads.best is None or spreads.best[0] <= min_edge:
+                continue
+            for i, row in enumerate(spreads.edges):
+                for j, edge in enumerate(row):
+                    if edge is not None and edge > min_edge:
+                        candidates.append((edge, symbol, i, j))
+
+        top = heapq.nlargest(k, candidates, key=lambda cell: cell[0])
+        return [self._route(symbol, self._symbols[symbol], edge, i, j)
+                for edge, symbol, i, j in top]
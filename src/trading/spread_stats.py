@@ -0,0 +1,122 @@
+from collections import namedtuple
+import math
+from utils.quantiles import RollingQuantile
+
+# spread and threshold are relative to the buy price (0.001 = 0.1%)
+SpreadSignal = namedtuple('SpreadSignal', ['symbol', 'buy_venue', 'sell_venue', 'spread', 'mean', 'std',
+                                           'zscore', 'quantile', 'threshold', 'ready'])
+
+
+class EwmaStats:
+    """Exponentially weighted mean and variance, O(1) per update."""
+    __slots__ = ('alpha', 'mean', 'var', 'count')
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def update(self, value):
+        if self.count == 0:
+            self.mean = value
+        else:
+            delta = value - self.mean
+            self.mean += self.alpha * delta
+            self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+        self.count += 1
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class _DirectionStats:
+    __slots__ = ('ewma', 'quantiles')
+
+    def __init__(self, alpha, window):
+        self.ewma = EwmaStats(alpha)
+        self.quantiles = RollingQuantile(window)
+
+
+class SpreadStats:
+    """
+    Rolling statistics of the inter-venue spread and an adaptive entry threshold.
+
+    For every (symbol, buy venue, sell venue) direction the relative spread
+    (sell - buy) / buy is tracked with an EWMA mean/variance and a rolling
+    quantile window. A direction only signals when the current spread clears
+
+        max(round-trip fees + min_edge, mean + z_entry * std, rolling quantile)
+
+    so a persistent basis between two venues raises the bar instead of
+    triggering trades, and volatile periods need a larger dislocation.
+    Each observation is scored against the statistics *before* it is added,
+    so a spike cannot dilute its own z-score.
+
+    Methods
+    -------
+    update(symbol, buy_venue, sell_venue, buy_price, sell_price):
+        Scores and records one observation; returns a SpreadSignal.
+    update_pair(symbol, venue_a, price_a, venue_b, price_b):
+        Updates both directions of a venue pair; returns the signal for
+        buying on the cheaper venue.
+    is_dislocated(signal):
+        True when a ready signal's spread clears its threshold.
+    configure(z_entry, quantile, min_edge, symbol_params=None):
+        Replaces the entry parameters; symbol_params maps a symbol to its
+        own (z_entry, quantile, min_edge).
+    """
+    def __init__(self, fee_rates, alpha=0.05, window=500, z_entry=2.0, quantile=0.95,
+                 min_edge=0.0, min_samples=30):
+        self.fee_rates = fee_rates
+        self.alpha = alpha
+        self.window = window
+        self.z_entry = z_entry
+        self.quantile = quantile
+        self.min_edge = min_edge
+        self.min_samples = min_samples
+        self.symbol_params = {}
+        self._stats = {}
+
+    def configure(self, z_entry, quantile, min_edge, symbol_params=None):
+        self.z_entry = z_entry
+        self.quantile = quantile
+        self.min_edge = min_edge
+        self.symbol_params = symbol_params or {}
+
+    def _direction(self, key):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _DirectionStats(self.alpha, self.window)
+        return stats
+
+    def update(self, symbol, buy_venue, sell_venue, buy_price, sell_price):
+        stats = self._direction((symbol, buy_venue, sell_venue))
+        spread = (sell_price - buy_price) / buy_price
+        ewma = stats.ewma
+        std = ewma.std
+        ready = ewma.count >= self.min_samples
+        z_entry, quantile, min_edge = self.symbol_params.get(symbol) or (self.z_entry, self.quantile, self.min_edge)
+
+        fee_floor = self.fee_rates.get(buy_venue, 0.0) + self.fee_rates.get(sell_venue, 0.0) + min_edge
+        quantile = stats.quantiles.quantile(quantile)
+        threshold = fee_floor
+        if ready:
+            threshold = max(fee_floor, ewma.mean + z_entry * std, quantile)
+        zscore = (spread - ewma.mean) / std if ready and std > 0 else 0.0
+
+        signal = SpreadSignal(symbol, buy_venue, sell_venue, spread, ewma.mean, std, zscore,
+                              quantile, threshold, ready)
+        ewma.update(spread)
+        stats.quantiles.update(spread)
+        return signal
+
+    def update_pair(self, symbol, venue_a, price_a, venue_b, price_b):
+        a_to_b = self.update(symbol, venue_a, venue_b, price_a, price_b)
+        b_to_a = self.update(symbol, venue_b, venue_a, price_b, price_a)
+        return a_to_b if price_a <= price_b else b_to_a
+
+    @staticmethod
+    def is_dislocated(signal):
+        return signal.ready and signal.spread >= signal.threshold
@@ -0,0 +1,164 @@
+from collections import defaultdict, namedtuple
+import math
+
+# One conversion step: trade `symbol` on `side` to turn `source` into `target`
+Leg = namedtuple('Leg', ['source', 'target', 'symbol', 'side', 'price', 'rate'])
+Cycle = namedtuple('Cycle', ['path', 'legs', 'gross_return', 'net_edge'])
+
+
+class TriangularArbitrage:
+    """
+    Finds profitable currency cycles on a single venue from its bulk tickers.
+
+    Every market 'BASE/QUOTE' becomes two directed edges in a currency graph:
+    BASE -> QUOTE at the fee-adjusted bid, and QUOTE -> BASE at the inverse of
+    the fee-adjusted ask. A cycle is profitable when the product of its rates
+    exceeds 1, i.e. when the sum of the -log(rate) weights is negative.
+
+    All triangles and any longer cycles found by the Bellman-Ford search are
+    indexed by edge, so a ticker update only re-evaluates the cycles that
+    contain an edge whose rate actually changed.
+
+    Methods
+    -------
+    update_tickers(tickers):
+        Applies {symbol: (bid, ask)} quotes and returns the edges that changed.
+    evaluate(changed_edges=None):
+        Re-prices the watched cycles touching the changed edges (all cycles if
+        None) and returns the profitable ones, best first.
+    find_negative_cycles():
+        Runs a full Bellman-Ford search over -log(rate) weights, registers any
+        negative cycle it finds and returns them as Cycles.
+    rotate(cycle, start):
+        Returns the same cycle re-ordered to start and end at `start`.
+    """
+    def __init__(self, fee_rate=0.001, min_edge=0.0, currencies=None):
+        self.fee_rate = fee_rate
+        self.min_edge = min_edge
+        self.currencies = set(currencies) if currencies else None
+        # edges[source][target] = Leg
+        self.edges = defaultdict(dict)
+        self._cycles = set()
+        self._cycles_by_edge = defaultdict(set)
+
+    def _set_edge(self, source, target, symbol, side, price, rate):
+        previous = self.edges[source].get(target)
+        if previous is not None and previous.rate == rate:
+            return False
+        self.edges[source][target] = Leg(source, target, symbol, side, price, rate)
+        if previous is None:
+            self._index_triangles(source, target)
+        return True
+
+    def update_tickers(self, tickers):
+        changed = set()
+        keep = 1 - self.fee_rate
+        for symbol, (bid, ask) in tickers.items():
+            if '/' not in symbol or not bid or not ask:
+                continue
+            base, quote = symbol.split('/', 1)
+            if self.currencies is not None and (base not in self.currencies or quote not in self.currencies):
+                continue
+            if self._set_edge(base, quote, symbol, 'sell', bid, bid * keep):
+                changed.add((base, quote))
+            if self._set_edge(quote, base, symbol, 'buy', ask, keep / ask):
+                changed.add((quote, base))
+        return changed
+
+    @staticmethod
+    def _canonical(path):
+        """Rotate a closed path so the smallest currency comes first"""
+        nodes = path[:-1]
+        start = nodes.index(min(nodes))
+        nodes = nodes[start:] + nodes[:start]
+        return tuple(nodes) + (nodes[0],)
+
+    def _watch(self, path):
+        path = self._canonical(path)
+        if path in self._cycles:
+            return path
+        self._cycles.add(path)
+        for source, target in zip(path, path[1:]):
+            self._cycles_by_edge[(source, target)].add(path)
+        return path
+
+    def _index_triangles(self, a, b):
+        # A new edge a -> b closes every triangle a -> b -> c -> a already in the graph
+        for c in self.edges.get(b, {}):
+            if c != a and a in self.edges.get(c, {}):
+                self._watch((a, b, c, a))
+
+    def _price(self, path):
+        legs = [self.edges[source][target] for source, target in zip(path, path[1:])]
+        gross = 1.0
+        for leg in legs:
+            gross *= leg.rate
+        return Cycle(path, legs, gross, gross - 1)
+
+    def evaluate(self, changed_edges=None):
+        if changed_edges is None:
+            candidates = self._cycles
+        else:
+            candidates = set()
+            for edge in changed_edges:
+                candidates |= self._cycles_by_edge.get(edge, set())
+
+        profitable = []
+        for path in candidates:
+            cycle = self._price(path)
+            if cycle.net_edge > self.min_edge:
+                profitable.append(cycle)
+        profitable.sort(key=lambda cycle: cycle.net_edge, reverse=True)
+        return profitable
+
+    def find_negative_cycles(self):
+        nodes = list(self.edges)
+        weighted = [(source, target, -math.log(leg.rate))
+                    for source, targets in self.edges.items()
+                    for target, leg in targets.items()]
+        # Starting every node at 0 is equivalent to a virtual source linked to all nodes
+        distance = dict.fromkeys(nodes, 0.0)
+        predecessor = {}
+
+        for _ in range(len(nodes) - 1):
+            relaxed = False
+            for source, target, weight in weighted:
+                if distance[source] + weight < distance.get(target, 0.0) - 1e-12:
+                    distance[target] = distance[source] + weight
+                    predecessor[target] = source
+                    relaxed = True
+            if not relaxed:
+                break
+
+        found = []
+        seen = set()
+        for source, target, weight in weighted:
+            if distance[source] + weight >= distance.get(target, 0.0) - 1e-12:
+                continue
+            # Walk back far enough to be certain we are inside the cycle
+            node = target
+            for _ in range(len(nodes)):
+                node = predecessor.get(node, node)
+            path = [node]
+            current = predecessor.get(node)
+            while current is not None and current != node and len(path) <= len(nodes):
+                path.append(current)
+                current = predecessor.get(current)
+            if current != node:
+                continue
+            path.append(node)
+            path.reverse()
+            path = self._watch(tuple(path))
+            if path not in seen:
+                seen.add(path)
+                found.append(self._price(path))
+
+        found.sort(key=lambda cycle: cycle.net_edge, reverse=True)
+        return found
+
+    def rotate(self, cycle, start):
+        nodes = cycle.path[:-1]
+        if start not in nodes:
+            return None
+        index = nodes.index(start)
+        return self._price(tuple(nodes[index:] + nodes[:index]) + (start,))
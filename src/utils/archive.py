@@ -0,0 +1,187 @@
+import os
+import sqlite3
+from datetime import datetime
+from config.settings import PARQUET_COMPRESSION, PARQUET_ROW_GROUP_SIZE
+from utils.logger import logger
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:  # optional: archival is skipped without pyarrow
+    pa = None
+
+ARCHIVE_NUMERIC_COLUMNS = ('binance_price', 'kucoin_price', 'difference', 'profit', 'quantity', 'fees',
+                           'estimated_profit')
+ARCHIVE_TEXT_COLUMNS = ('result', 'recommendation', 'route')
+
+if pa is not None:
+    TRADE_SCHEMA = pa.schema(
+        [('time', pa.timestamp('us'))]
+        + [(column, pa.float64()) for column in ARCHIVE_NUMERIC_COLUMNS]
+        + [(column, pa.string()) for column in ARCHIVE_TEXT_COLUMNS]
+        + [('id', pa.int64()), ('year', pa.int16()), ('month', pa.int8()), ('symbol', pa.string())])
+    QUOTE_SCHEMA = pa.schema([('time', pa.timestamp('us')), ('venue', pa.string()), ('bid', pa.float64()),
+                              ('ask', pa.float64()), ('year', pa.int16()), ('month', pa.int8()),
+                              ('symbol', pa.string())])
+    # year=2024/month=3/symbol=BTC%2FUSDT/...; the same object is used to write and to read back
+    PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16()), ('month', pa.int8()),
+                                              ('symbol', pa.string())]), flavor='hive')
+
+
+def route_symbol(route):
+    """Symbol a stored trade was on: pair routes are 'SYMBOL: buy→sell', cycles 'A→B→C→A'"""
+    if not route:
+        # Rows from the original two-venue trade never set a route
+        return 'BTC/USDT'
+    if ':' in route:
+        return route.split(':', 1)[0]
+    return 'triangular'
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class TradeArchive:
+    """
+    Columnar Parquet archive of closed trade years and quote history.
+
+    Trades and quotes are written as zstd-compressed Parquet datasets under
+    `root`, hive-partitioned by year, month and symbol and sorted by time
+    within each file, so every row group carries tight time statistics.
+    Queries only open the partitions their filters can match, skip row
+    groups whose statistics rule them out, and decode only the requested
+    columns; a multi-year P&L is one dataset scan rather than a query per
+    yearly SQLite file.
+
+    Methods
+    -------
+    export_year(db_path, year):
+        Writes one yearly SQLite database to the trades dataset, replacing
+        any earlier export of that year.
+    has_year(year):
+        True when a year has already been exported.
+    archive_quotes(history):
+        Appends the quotes recorded since the previous call as a new segment.
+    read_trades(columns=None, start=None, end=None, symbols=None):
+        Reads archived trades as a pyarrow Table.
+    read_quotes(columns=None, start=None, end=None, symbols=None):
+        Reads archived quotes as a pyarrow Table.
+    pnl(start=None, end=None, by=('year', 'month')):
+        Trade count, profit and fees grouped by the given columns.
+    """
+    def __init__(self, root, compression=PARQUET_COMPRESSION, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet archival")
+        self.root = root
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self._quotes_until = None
+
+    def _path(self, kind):
+        return os.path.join(self.root, kind)
+
+    def _write(self, table, kind, basename, existing_data_behavior):
+        ds.write_dataset(
+            table.sort_by('time'), self._path(kind), format='parquet', partitioning=PARTITIONING,
+            basename_template=basename, existing_data_behavior=existing_data_behavior,
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+            max_rows_per_group=self.row_group_size, min_rows_per_group=min(self.row_group_size, len(table)))
+
+    def has_year(self, year):
+        return os.path.isdir(os.path.join(self._path('trades'), f'year={year}'))
+
+    def export_year(self, db_path, year):
+        with sqlite3.connect(db_path) as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM trades')
+            names = [column[0] for column in c.description]
+            rows = c.fetchall()
+        if not rows:
+            return 0
+
+        # Older yearly databases may predate some columns
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(names)}
+        times = [_parse_time(value) for value in columns['time']]
+        data = {'time': times}
+        for column in ARCHIVE_NUMERIC_COLUMNS + ARCHIVE_TEXT_COLUMNS + ('id',):
+            data[column] = columns.get(column, [None] * len(rows))
+        data['year'] = [time.year for time in times]
+        data['month'] = [time.month for time in times]
+        data['symbol'] = [route_symbol(route) for route in data['route']]
+
+        table = pa.Table.from_pydict(data, schema=TRADE_SCHEMA)
+        # Re-exporting a year replaces its partitions instead of duplicating rows
+        self._write(table, 'trades', f'trades-{year}-{{i}}.parquet', 'delete_matching')
+        logger.info(f"🗄️ Archived {len(rows)} trades from {year} to Parquet")
+        return len(rows)
+
+    def archive_quotes(self, history):
+        timestamps, bids, asks, venue_ids, symbol_ids = (np.frombuffer(column, dtype=column.typecode)
+                                                         for column in history.columns())
+        if self._quotes_until is not None:
+            keep = timestamps > self._quotes_until
+            timestamps, bids, asks = timestamps[keep], bids[keep], asks[keep]
+            venue_ids, symbol_ids = venue_ids[keep], symbol_ids[keep]
+        if not len(timestamps):
+            return 0
+
+        times = pa.array((timestamps * 1e6).astype('int64'), type=pa.timestamp('us'))
+        table = pa.table({
+            'time': times,
+            'venue': pa.array(history.venue_names, pa.string()).take(pa.array(venue_ids)),
+            'bid': pa.array(bids),
+            'ask': pa.array(asks),
+            'year': pc.cast(pc.year(times), pa.int16()),
+            'month': pc.cast(pc.month(times), pa.int8()),
+            'symbol': pa.array(history.symbol_names, pa.string()).take(pa.array(symbol_ids)),
+        }, schema=QUOTE_SCHEMA)
+        # Each segment gets its own files; earlier segments in the same partitions are kept
+        self._write(table, 'quotes', f'quotes-{int(timestamps[0] * 1e6)}-{{i}}.parquet', 'overwrite_or_ignore')
+        self._quotes_until = float(timestamps.max())
+        logger.info(f"🗄️ Archived {len(timestamps)} quotes to Parquet")
+        return len(timestamps)
+
+    def _read(self, kind, columns, start, end, symbols):
+        if not os.path.isdir(self._path(kind)):
+            schema = TRADE_SCHEMA if kind == 'trades' else QUOTE_SCHEMA
+            return schema.empty_table().select(columns) if columns else schema.empty_table()
+
+        dataset = ds.dataset(self._path(kind), format='parquet', partitioning=PARTITIONING)
+        conditions = []
+        # Year bounds prune whole directories; time bounds prune row groups by their statistics
+        if start is not None:
+            conditions += [ds.field('year') >= start.year, ds.field('time') >= pa.scalar(start, pa.timestamp('us'))]
+        if end is not None:
+            conditions += [ds.field('year') <= end.year, ds.field('time') < pa.scalar(end, pa.timestamp('us'))]
+        if symbols:
+            conditions.append(ds.field('symbol').isin(list(symbols)))
+        condition = None
+        for clause in conditions:
+            condition = clause if condition is None else condition & clause
+        return dataset.to_table(columns=columns, filter=condition)
+
+    def read_trades(self, columns=None, start=None, end=None, symbols=None):
+        return self._read('trades', columns, start, end, symbols)
+
+    def read_quotes(self, columns=None, start=None, end=None, symbols=None):
+        return self._read('quotes', columns, start, end, symbols)
+
+    def pnl(self, start=None, end=None, by=('year', 'month')):
+        table = self.read_trades(columns=list(by) + ['profit', 'fees'], start=start, end=end)
+        # Count every row: trades without a recorded profit are still trades
+        summary = table.group_by(list(by)).aggregate(
+            [('profit', 'count', pc.CountOptions(mode='all')), ('profit', 'sum'), ('fees', 'sum')])
+        names = {'profit_count': 'trade_count', 'profit_sum': 'total_profit', 'fees_sum': 'total_fees'}
+        summary = summary.rename_columns([names.get(name, name) for name in summary.column_names])
+        return summary.sort_by([(column, 'ascending') for column in by]).to_pylist()
+
+
+def create_archive(root):
+    """Returns a TradeArchive, or None when pyarrow is not installed"""
+    if pa is None:
+        logger.warning("⚠️ pyarrow is not installed; Parquet archival is disabled")
+        return None
+    return TradeArchive(root)
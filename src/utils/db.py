@@ -2,6 +2,9 @@ import sqlite3
 from datetime import datetime, timedelta
 import os
 import shutil
+from config.settings import ARCHIVE_KEEP_YEARS
+from utils.records import TRADE_FIELDS, TradeRecord
+from utils.logger import logger
 
 # Use appropriate database directory for Docker vs local development
 if os.path.exists('/app'):  # Docker environment
@@ -12,6 +15,25 @@ else:  # Local development
 if not os.path.exists(DB_DIR):
     os.makedirs(DB_DIR)
 
+PARQUET_DIR = os.path.join(DB_DIR, 'parquet')
+HISTORY_DIR = os.path.join(DB_DIR, 'history')
+JOURNAL_FILE = os.path.join(DB_DIR, 'trade_journal.log')
+
+# trade_id is the trade journal's id (utils/journal.py), so recovery can tell a row was already stored
+ADDED_COLUMNS = (('route', 'TEXT'), ('quantity', 'REAL'), ('fees', 'REAL'), ('estimated_profit', 'REAL'),
+                 ('trade_id', 'TEXT'))
+
+# Column order matches TradeRecord's constructor
+TRADE_COLUMNS = ', '.join(TRADE_FIELDS + ('id',))
+
+def _trade_row(cursor, row):
+    return TradeRecord(*row)
+
+def _trade_row_by_name(cursor, row):
+    # Older yearly databases may predate some columns; trade_id is not part of the record
+    return TradeRecord(**{column[0]: value for column, value in zip(cursor.description, row)
+                          if column[0] != 'trade_id'})
+
 def get_current_db_path():
     current_year = datetime.now().year
     return os.path.join(DB_DIR, f'trades_{current_year}.sqlite3')
@@ -36,22 +58,53 @@ class TradeDB:
                     difference REAL,
                     profit REAL,
                     result TEXT,
-                    recommendation TEXT
+                    recommendation TEXT,
+                    route TEXT,
+                    quantity REAL,
+                    fees REAL,
+                    estimated_profit REAL,
+                    trade_id TEXT
                 )
             ''')
+            # Databases created by older versions lack the columns added since
+            columns = [row[1] for row in c.execute('PRAGMA table_info(trades)')]
+            for column, column_type in ADDED_COLUMNS:
+                if column not in columns:
+                    c.execute(f'ALTER TABLE trades ADD COLUMN {column} {column_type}')
+            c.execute('CREATE INDEX IF NOT EXISTS trades_trade_id ON trades (trade_id)')
             conn.commit()
 
-    def insert_trade(self, time, binance_price, kucoin_price, difference, profit, result, recommendation):
+    def insert_trade(self, time, binance_price, kucoin_price, difference, profit, result, recommendation, route=None,
+                     quantity=None, fees=None, estimated_profit=None, trade_id=None):
         # Check if we need to rotate to a new year's database
         self._check_and_rotate_db()
         
         with sqlite3.connect(self.db_path) as conn:
             c = conn.cursor()
             c.execute('''
-                INSERT INTO trades (time, binance_price, kucoin_price, difference, profit, result, recommendation)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (time, binance_price, kucoin_price, difference, profit, result, recommendation))
+                INSERT INTO trades (time, binance_price, kucoin_price, difference, profit, result, recommendation, route,
+                                    quantity, fees, estimated_profit, trade_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (time, binance_price, kucoin_price, difference, profit, result, recommendation, route,
+                  quantity, fees, estimated_profit, trade_id))
             conn.commit()
+            return c.lastrowid
+
+    def find_trade(self, trade_id):
+        """The TradeRecord stored for a journal trade id, or None; looks in this year's and last year's database"""
+        self._check_and_rotate_db()
+        last_year = os.path.join(DB_DIR, f'trades_{datetime.now().year - 1}.sqlite3')
+        for db_path in (self.db_path, last_year):
+            if not os.path.exists(db_path):
+                continue
+            with sqlite3.connect(db_path) as conn:
+                if 'trade_id' not in {row[1] for row in conn.execute('PRAGMA table_info(trades)')}:
+                    continue
+                conn.row_factory = _trade_row
+                row = conn.execute(f'SELECT {TRADE_COLUMNS} FROM trades WHERE trade_id = ?', (trade_id,)).fetchone()
+                if row is not None:
+                    return row
+        return None
 
     def _check_and_rotate_db(self):
         """Check if we need to rotate to a new year's database"""
@@ -62,17 +115,18 @@ class TradeDB:
             self._init_db()
 
     def get_trades(self, since_days=None, include_old_dbs=True):
-        """Get trades from current database and optionally from previous years"""
+        """Get trades (as TradeRecords) from current database and optionally from previous years"""
         trades = []
         
         # Get from current database
         with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = _trade_row
             c = conn.cursor()
             if since_days:
                 since = (datetime.now() - timedelta(days=since_days)).strftime('%Y-%m-%d %H:%M:%S')
-                c.execute('SELECT * FROM trades WHERE time >= ? ORDER BY time DESC', (since,))
+                c.execute(f'SELECT {TRADE_COLUMNS} FROM trades WHERE time >= ? ORDER BY time DESC', (since,))
             else:
-                c.execute('SELECT * FROM trades ORDER BY time DESC')
+                c.execute(f'SELECT {TRADE_COLUMNS} FROM trades ORDER BY time DESC')
             trades.extend(c.fetchall())
         
         # Optionally include trades from previous year databases
@@ -85,6 +139,7 @@ class TradeDB:
                 if os.path.exists(old_db_path):
                     try:
                         with sqlite3.connect(old_db_path) as conn:
+                            conn.row_factory = _trade_row_by_name
                             c = conn.cursor()
                             c.execute('SELECT * FROM trades WHERE time >= ? ORDER BY time DESC', (since,))
                             old_trades = c.fetchall()
@@ -106,15 +161,14 @@ class TradeDB:
             c = conn.cursor()
             if since_days:
                 since = (datetime.now() - timedelta(days=since_days)).strftime('%Y-%m-%d %H:%M:%S')
-                c.execute('SELECT COUNT(*), SUM(profit) FROM trades WHERE time >= ?', (since,))
+                c.execute('SELECT COUNT(*), SUM(profit), COUNT(profit) FROM trades WHERE time >= ?', (since,))
             else:
-                c.execute('SELECT COUNT(*), SUM(profit) FROM trades')
-            count, profit = c.fetchone()
-            if count:
-                total_count += count
-                if profit:
-                    total_profit += profit
-                    profit_count += count
+                c.execute('SELECT COUNT(*), SUM(profit), COUNT(profit) FROM trades')
+            count, profit, priced = c.fetchone()
+            total_count += count
+            total_profit += profit or 0.0
+            # Rows without a profit are not part of the average
+            profit_count += priced
         
         # Optionally include from previous year databases
         if since_days:
@@ -127,13 +181,12 @@ class TradeDB:
                     try:
                         with sqlite3.connect(old_db_path) as conn:
                             c = conn.cursor()
-                            c.execute('SELECT COUNT(*), SUM(profit) FROM trades WHERE time >= ?', (since,))
-                            count, profit = c.fetchone()
-                            if count:
-                                total_count += count
-                                if profit:
-                                    total_profit += profit
-                                    profit_count += count
+                            c.execute('SELECT COUNT(*), SUM(profit), COUNT(profit) FROM trades WHERE time >= ?',
+                                      (since,))
+                            count, profit, priced = c.fetchone()
+                            total_count += count
+                            total_profit += profit or 0.0
+                            profit_count += priced
                     except sqlite3.Error:
                         continue
         
@@ -144,6 +197,27 @@ class TradeDB:
             'avg_profit': avg_profit
         }
 
+    def iter_trades(self):
+        """Yield every trade in db/ as a TradeRecord, oldest year and row first, without loading them all"""
+        self._check_and_rotate_db()
+        for year in self.get_available_years():
+            db_path = os.path.join(DB_DIR, f'trades_{year}.sqlite3')
+            try:
+                with sqlite3.connect(db_path) as conn:
+                    columns = {row[1] for row in conn.execute('PRAGMA table_info(trades)')}
+                    # Positional rows are much cheaper; older yearly databases may predate some columns
+                    if columns.issuperset(TRADE_FIELDS):
+                        conn.row_factory = _trade_row
+                        query = f'SELECT {TRADE_COLUMNS} FROM trades ORDER BY id'
+                    else:
+                        conn.row_factory = _trade_row_by_name
+                        query = 'SELECT * FROM trades ORDER BY id'
+                    # Rows are inserted as they happen, so id order is time order without a sort
+                    yield from conn.execute(query)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading trades from {db_path}: {e}")
+                continue
+
     def clear_old_trades(self, months=6):
         """Clear old trades from current database only"""
         cutoff = (datetime.now() - timedelta(days=30*months)).strftime('%Y-%m-%d %H:%M:%S')
@@ -168,15 +242,27 @@ class TradeDB:
                     continue
         return sorted(years)
 
-    def archive_old_dbs(self, keep_years=5):
-        """Archive databases older than keep_years to a backup directory"""
+    def archive_old_dbs(self, keep_years=ARCHIVE_KEEP_YEARS, export_parquet=True):
+        """Export closed years to Parquet and archive databases older than keep_years to a backup directory"""
         backup_dir = os.path.join(DB_DIR, 'archive')
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
-        
+
+        # Imported here: utils.archive needs pyarrow, which plain trade logging does not
+        from utils.archive import create_archive
+        archive = create_archive(PARQUET_DIR) if export_parquet else None
+
         current_year = datetime.now().year
-        for year in range(current_year - keep_years, current_year - 100, -1):
+        for year in range(current_year - 1, current_year - 100, -1):
             old_db_path = os.path.join(DB_DIR, f'trades_{year}.sqlite3')
-            if os.path.exists(old_db_path):
-                backup_path = os.path.join(backup_dir, f'trades_{year}.sqlite3')
+            backup_path = os.path.join(backup_dir, f'trades_{year}.sqlite3')
+            if archive is not None and not archive.has_year(year):
+                for path in (old_db_path, backup_path):
+                    if os.path.exists(path):
+                        try:
+                            archive.export_year(path, year)
+                        except Exception as e:
+                            logger.error(f"Error exporting {path} to Parquet: {e}")
+                        break
+            if year <= current_year - keep_years and os.path.exists(old_db_path):
                 shutil.move(old_db_path, backup_path) 
\ No newline at end of file
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+
+# Topics whose events are not kept for latest(): replaying them would repeat them
+TRANSIENT_TOPICS = ('trade', 'job')
+
+
+class Subscription:
+    """A subscriber's bounded queue of (topic, data, timestamp) events."""
+    def __init__(self, bus, topics, max_queue):
+        self._bus = bus
+        self.topics = set(topics) if topics else None
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def deliver(self, event):
+        if self.topics is not None and event[0] not in self.topics:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A slow reader loses its oldest event rather than blocking the publisher
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            self.queue.put_nowait(event)
+
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe bus for live dashboard updates.
+
+    The trading loop publishes small deltas (quotes, spreads, trades,
+    metrics, balances) and never blocks: each subscriber has its own bounded
+    queue and drops its oldest event when it falls behind. The latest event
+    per topic is kept so a new subscriber can render current state without
+    touching the exchanges or the database. Transient topics (a new trade,
+    a job update) are occurrences rather than state: they are only
+    delivered live, so a reconnecting client never receives one twice.
+
+    Methods
+    -------
+    publish(topic, data):
+        Records data as the latest value for topic and fans it out.
+    subscribe(topics=None, max_queue=None):
+        Returns a Subscription receiving events for the given topics (all if None).
+    unsubscribe(subscription):
+        Stops delivering events to a subscription.
+    latest(topic=None):
+        Returns the last published data for a topic, or {topic: data} for all.
+    """
+    def __init__(self, max_queue=256, transient=TRANSIENT_TOPICS):
+        self.max_queue = max_queue
+        self.transient = frozenset(transient)
+        self._lock = threading.Lock()
+        self._subscribers = ()
+        self._latest = {}
+
+    def publish(self, topic, data):
+        event = (topic, data, time.time())
+        if topic not in self.transient:
+            self._latest[topic] = data
+        # Copy-on-write tuple: publishing never holds the lock
+        for subscription in self._subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self, topics=None, max_queue=None):
+        subscription = Subscription(self, topics, max_queue or self.max_queue)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def latest(self, topic=None):
+        if topic is not None:
+            return self._latest.get(topic)
+        return dict(self._latest)
+
+
+event_bus = EventBus()
@@ -0,0 +1,185 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import os
+import time
+import numpy as np
+from config.settings import HISTORY_WORKERS, HISTORY_KLINE_CHUNK, HISTORY_TRADE_CHUNK
+from utils.db import HISTORY_DIR
+from utils.logger import logger
+
+KLINE_DTYPE = np.dtype([('time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+                        ('volume', 'f8')])
+TRADE_DTYPE = np.dtype([('time', 'i8'), ('price', 'f8'), ('quantity', 'f8'), ('buyer_is_maker', '?')])
+
+INTERVAL_UNITS = {'m': 60000, 'h': 3600000, 'd': 86400000, 'w': 604800000}
+
+
+def interval_ms(interval):
+    """Length of a kline interval such as '1m', '4h' or '1d' in milliseconds"""
+    try:
+        return int(interval[:-1]) * INTERVAL_UNITS[interval[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported kline interval: {interval!r}")
+
+
+def to_ms(value):
+    """
+    Epoch milliseconds from epoch seconds, a datetime or an ISO date string.
+    Naive datetimes and strings are taken as UTC, like the exchanges' data.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value * 1000)
+
+
+class HistoryLoader:
+    """
+    Historical klines and aggregate trades from the venues, cached on disk.
+
+    A requested range is split into fixed chunks aligned to the epoch
+    (HISTORY_KLINE_CHUNK candles, or HISTORY_TRADE_CHUNK seconds of
+    trades), so overlapping requests share chunks. Each chunk is one .npy
+    file under cache_dir/venue/SYMBOL/interval/, written atomically as soon
+    as it is downloaded: a repeat request reads it from disk, and an
+    interrupted download resumes at the first missing chunk. Chunks still
+    open at the current time are returned but not cached. Missing chunks
+    are downloaded HISTORY_WORKERS at a time through the handlers'
+    get_klines() / get_agg_trades(), which apply the usual deadlines and
+    circuit breakers.
+
+    Results are NumPy structured arrays (KLINE_DTYPE, TRADE_DTYPE) sorted
+    by time in epoch milliseconds, ready for vectorised studies; aligned()
+    puts several venues on one time grid. Handlers can be replaced by any
+    object with the same methods, such as one replaying recorded responses.
+
+    Methods
+    -------
+    klines(venue, symbol, interval, start, end):
+        Candles opening in [start, end).
+    trades(venue, symbol, start, end):
+        Aggregate trades in [start, end); None for venues without history.
+    aligned(symbol, interval, start, end, field='close', venues=None):
+        (times, {venue: values}) on a shared grid, NaN where a venue has no candle.
+    prefetch(symbols, interval, start, end, venues=None):
+        Downloads every missing kline chunk; returns how many failed.
+    """
+    def __init__(self, venues, cache_dir=HISTORY_DIR, workers=HISTORY_WORKERS, kline_chunk=HISTORY_KLINE_CHUNK,
+                 trade_chunk=HISTORY_TRADE_CHUNK, clock=time.time):
+        self.venues = venues
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.kline_chunk = kline_chunk
+        self.trade_chunk_ms = trade_chunk * 1000
+        self.clock = clock
+
+    def _path(self, venue, symbol, kind, chunk_start):
+        return os.path.join(self.cache_dir, venue, symbol.replace('/', '-'), kind, f'{chunk_start}.npy')
+
+    @staticmethod
+    def _chunks(start, end, span):
+        first = start // span * span
+        return [(chunk_start, chunk_start + span) for chunk_start in range(first, end, span)]
+
+    def _download(self, fetch, dtype, path, chunk_start, chunk_end, settled):
+        rows = fetch(chunk_start, chunk_end)
+        if rows is None:
+            return None
+        array = np.array(rows, dtype=dtype)
+        if settled:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = f'{path}.{os.getpid()}.part'
+            with open(partial, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(partial, path)
+        return array
+
+    def _load(self, venue, symbol, kind, span, fetch, dtype, start, end, settle_ms):
+        now = to_ms(self.clock())
+        chunks = self._chunks(start, end, span)
+        arrays = [None] * len(chunks)
+        missing = []
+        for i, (chunk_start, chunk_end) in enumerate(chunks):
+            path = self._path(venue, symbol, kind, chunk_start)
+            if os.path.exists(path):
+                arrays[i] = np.load(path, allow_pickle=False)
+            else:
+                missing.append((i, path, chunk_start, chunk_end, chunk_end + settle_ms <= now))
+
+        if missing:
+            logger.info(f"📥 Downloading {len(missing)} {venue} {symbol} {kind} chunks "
+                        f"({len(chunks) - len(missing)} cached)")
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='history') as pool:
+                futures = [(i, pool.submit(self._download, fetch, dtype, path, chunk_start, chunk_end, settled))
+                           for i, path, chunk_start, chunk_end, settled in missing]
+                for i, future in futures:
+                    arrays[i] = future.result()
+            failed = sum(arrays[i] is None for i, *_ in missing)
+            if failed:
+                logger.warning(f"⚠️ {failed} {venue} {symbol} {kind} chunks failed to download; "
+                               f"repeat the request to resume")
+
+        data = [array for array in arrays if array is not None and len(array)]
+        if not data:
+            return np.empty(0, dtype=dtype)
+        data = np.concatenate(data) if len(data) > 1 else data[0]
+        times = data['time']
+        return data[np.searchsorted(times, start):np.searchsorted(times, end)]
+
+    def _klines(self, venue, symbol, interval, start, end):
+        step = interval_ms(interval)
+        handler = self.venues[venue]
+
+        def fetch(chunk_start, chunk_end):
+            return handler.get_klines(symbol, interval, chunk_start, chunk_end)
+        return self._load(venue, symbol, interval, step * self.kline_chunk, fetch, KLINE_DTYPE, start, end,
+                          settle_ms=step)
+
+    def klines(self, venue, symbol, interval, start, end):
+        return self._klines(venue, symbol, interval, to_ms(start), to_ms(end))
+
+    def trades(self, venue, symbol, start, end):
+        handler = self.venues[venue]
+        if not hasattr(handler, 'get_agg_trades'):
+            logger.warning(f"⚠️ {venue} has no historical trade data")
+            return None
+        def fetch(chunk_start, chunk_end):
+            return handler.get_agg_trades(symbol, chunk_start, chunk_end)
+        return self._load(venue, symbol, 'trades', self.trade_chunk_ms, fetch, TRADE_DTYPE, to_ms(start), to_ms(end),
+                          settle_ms=1000)
+
+    def aligned(self, symbol, interval, start, end, field='close', venues=None):
+        step = interval_ms(interval)
+        start, end = to_ms(start), to_ms(end)
+        first = -(-start // step) * step
+        times = np.arange(first, end, step, dtype='i8')
+        values = {}
+        for venue in venues or self.venues:
+            klines = self._klines(venue, symbol, interval, start, end)
+            offsets = klines['time'] - first
+            # Candles off the epoch-aligned grid (e.g. weeks starting on Monday) have no slot
+            on_grid = (offsets >= 0) & (offsets % step == 0)
+            column = np.full(len(times), np.nan)
+            column[offsets[on_grid] // step] = klines[field][on_grid]
+            values[venue] = column
+        return times, values
+
+    def prefetch(self, symbols, interval, start, end, venues=None):
+        step = interval_ms(interval)
+        start, end = to_ms(start), to_ms(end)
+        failed = 0
+        for venue in venues or self.venues:
+            for symbol in symbols:
+                candles = len(self._klines(venue, symbol, interval, start, end))
+                # Settled chunks are cached once downloaded, so any still missing failed
+                now = to_ms(self.clock())
+                missing = sum(1 for chunk_start, chunk_end in self._chunks(start, end, step * self.kline_chunk)
+                              if chunk_end + step <= now
+                              and not os.path.exists(self._path(venue, symbol, interval, chunk_start)))
+                logger.info(f"✅ {venue} {symbol} {interval}: {candles} candles"
+                            + (f", {missing} chunks missing" if missing else ''))
+                failed += missing
+        return failed
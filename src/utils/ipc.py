@@ -0,0 +1,317 @@
+from collections import OrderedDict
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from utils.jobs import Job
+from utils.logger import logger
+
+
+def _encode(message):
+    return (json.dumps(message, default=str) + '\n').encode('utf-8')
+
+
+class StatePublisher:
+    """
+    Engine-side Unix socket server that mirrors the event bus to other processes.
+
+    Every connected client first receives the latest value of each topic and
+    the state of every job still in the JobQueue's history, then every
+    event published on the engine's bus, as newline-delimited JSON. Clients may send {"type": "command", ...} lines back: 'submit_job'
+    queues a registered job on the engine's JobQueue so web workers can
+    trigger manual trades without owning exchange connections, and
+    'halt_trading' / 'resume_trading' work the engine's RiskEngine kill
+    switch directly, without waiting behind queued jobs,
+    'update_settings' / 'reload_settings' / 'reset_settings' change its
+    RuntimeSettings, and 'profile' runs a RuntimeProfiler action in the
+    engine, publishing the profiler's status as a 'profile' event.
+
+    Methods
+    -------
+    start():
+        Binds the socket (replacing a stale one) and starts accepting clients.
+    stop():
+        Closes the listening socket and removes the socket file.
+    """
+    def __init__(self, bus, path, jobs=None, risk=None, settings=None, profiler=None):
+        self.bus = bus
+        self.path = path
+        self.jobs = jobs
+        self.risk = risk
+        self.settings = settings
+        self.profiler = profiler
+        self._server = None
+        self._running = False
+
+    def start(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen(16)
+        self._running = True
+        threading.Thread(target=self._accept, name='ipc-accept', daemon=True).start()
+        logger.info(f"📡 Publishing engine state on {self.path}")
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._server is not None:
+            self._server.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client,), name='ipc-client', daemon=True).start()
+
+    def _serve(self, client):
+        # Subscribe before taking the snapshot so nothing published in between is lost
+        subscription = self.bus.subscribe()
+        threading.Thread(target=self._read_commands, args=(client,), name='ipc-commands', daemon=True).start()
+        try:
+            for topic, data in self.bus.latest().items():
+                client.sendall(_encode({'type': 'event', 'topic': topic, 'data': data}))
+            # 'job' events are not kept as latest values; a worker that just connected still has to
+            # answer for jobs submitted before it did
+            for job in (self.jobs.recent() if self.jobs is not None else ()):
+                client.sendall(_encode({'type': 'event', 'topic': 'job', 'data': job.to_dict()}))
+            while self._running:
+                event = subscription.get(timeout=5)
+                if event is None:
+                    client.sendall(_encode({'type': 'ping'}))
+                    continue
+                topic, data, timestamp = event
+                client.sendall(_encode({'type': 'event', 'topic': topic, 'data': data, 'ts': timestamp}))
+        except OSError:
+            pass
+        finally:
+            subscription.close()
+            client.close()
+
+    def _read_commands(self, client):
+        try:
+            for line in client.makefile('r', encoding='utf-8'):
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if message.get('type') == 'command':
+                    self._handle_command(message)
+        except (OSError, ValueError):
+            pass
+
+    def _handle_command(self, message):
+        command = message.get('command')
+        if command == 'submit_job' and self.jobs is not None:
+            try:
+                self.jobs.submit_named(message['kind'], job_id=message.get('job_id'))
+            except KeyError as e:
+                logger.error(f"❌ Rejected remote job: {e}")
+        elif command == 'halt_trading' and self.risk is not None:
+            self.risk.halt(message.get('reason') or 'manual halt')
+        elif command == 'resume_trading' and self.risk is not None:
+            self.risk.resume()
+        elif command in ('update_settings', 'reload_settings', 'reset_settings') and self.settings is not None:
+            try:
+                if command == 'update_settings':
+                    self.settings.update(message.get('changes') or {}, message.get('symbol'),
+                                         source=message.get('source') or 'remote override')
+                elif command == 'reload_settings':
+                    self.settings.reload()
+                else:
+                    self.settings.reset()
+            except ValueError:
+                pass  # already logged; the previous settings stay in force
+        elif command == 'profile' and self.profiler is not None:
+            output, error = self.profiler.run(message.get('action'), message.get('seconds'))
+            if error:
+                logger.warning(f"⚠️ Remote profiling '{message.get('action')}' failed: {error}")
+            self.bus.publish('profile', dict(self.profiler.status(), action=message.get('action'),
+                                             output=output, error=error))
+        else:
+            logger.warning(f"⚠️ Unknown IPC command: {message.get('command')}")
+
+
+class StateSubscriber:
+    """
+    Web-side client that replays the engine's events into a local event bus.
+
+    Runs a background thread that connects to the engine socket, reconnects
+    with backoff when the engine restarts, and publishes every received
+    event on the local bus, so /stream and the dashboard work exactly as
+    they do in-process. Connection state is published on the 'engine' topic.
+
+    Methods
+    -------
+    start():
+        Starts the background reader thread.
+    send(message):
+        Sends a command to the engine; returns False if it is not connected.
+    """
+    def __init__(self, path, bus, max_backoff=10):
+        self.path = path
+        self.bus = bus
+        self.max_backoff = max_backoff
+        self._sock = None
+        self._send_lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def start(self):
+        threading.Thread(target=self._run, name='ipc-subscriber', daemon=True).start()
+        return self
+
+    def send(self, message):
+        sock = self._sock
+        if sock is None:
+            return False
+        try:
+            with self._send_lock:
+                sock.sendall(_encode(message))
+            return True
+        except OSError:
+            return False
+
+    def _run(self):
+        backoff = 0.5
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = 0.5
+            self._sock = sock
+            self.bus.publish('engine', {'connected': True})
+            try:
+                for line in sock.makefile('r', encoding='utf-8'):
+                    message = json.loads(line)
+                    if message.get('type') == 'event':
+                        self.bus.publish(message['topic'], message['data'])
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._sock = None
+                sock.close()
+                self.bus.publish('engine', {'connected': False})
+
+
+class RemoteJobQueue:
+    """
+    JobQueue stand-in for web workers: jobs run in the engine process.
+
+    submit_named() forwards the request over the subscriber's socket and
+    returns a local mirror Job. Every job seen in the engine's 'job' events
+    gets a mirror, whichever worker submitted it, so any worker can answer
+    the /jobs endpoints; the last max_history are kept.
+    """
+    def __init__(self, subscriber, bus, max_history=100):
+        self.subscriber = subscriber
+        self.max_history = max_history
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._subscription = bus.subscribe(['job'])
+        threading.Thread(target=self._follow, name='remote-jobs', daemon=True).start()
+
+    def _mirror(self, job_id, kind):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = Job(kind, None, (), {}, job_id=job_id)
+                while len(self._jobs) > self.max_history:
+                    self._jobs.popitem(last=False)
+            return job
+
+    def submit_named(self, kind, job_id=None, **kwargs):
+        job = self._mirror(job_id or uuid.uuid4().hex, kind)
+        if not self.subscriber.send({'type': 'command', 'command': 'submit_job',
+                                     'kind': kind, 'job_id': job.id}):
+            job.error = 'Trading engine is not connected'
+            job._set_status('failed')
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _follow(self):
+        while True:
+            event = self._subscription.get()
+            if event is None:
+                continue
+            update = event[1]
+            if update.get('id') is None:
+                continue
+            self._mirror(update['id'], update.get('kind', 'job')).apply_update(update)
+
+
+class RemoteRiskControl:
+    """
+    Kill switch for web workers: halt() and resume() are sent to the
+    engine's RiskEngine over the subscriber's socket. Both return False
+    when the engine is not connected.
+    """
+    def __init__(self, subscriber):
+        self.subscriber = subscriber
+
+    def halt(self, reason='manual halt'):
+        return self.subscriber.send({'type': 'command', 'command': 'halt_trading', 'reason': reason})
+
+    def resume(self):
+        return self.subscriber.send({'type': 'command', 'command': 'resume_trading'})
+
+
+class RemoteSettings:
+    """
+    Runtime settings for web workers: update(), reload() and reset() are
+    sent to the engine's RuntimeSettings over the subscriber's socket and
+    the result comes back as a 'settings' event. Each returns False when
+    the engine is not connected.
+    """
+    def __init__(self, subscriber):
+        self.subscriber = subscriber
+
+    def update(self, changes, symbol=None, source='remote override'):
+        return self.subscriber.send({'type': 'command', 'command': 'update_settings', 'changes': changes,
+                                     'symbol': symbol, 'source': source})
+
+    def reload(self):
+        return self.subscriber.send({'type': 'command', 'command': 'reload_settings'})
+
+    def reset(self):
+        return self.subscriber.send({'type': 'command', 'command': 'reset_settings'})
+
+
+class RemoteProfiler:
+    """
+    Profiling for web workers: each action is sent to the engine's
+    RuntimeProfiler over the subscriber's socket, so the process that runs
+    the trades is the one profiled, without a restart. The engine's status
+    comes back as a 'profile' event. run() returns False when the engine
+    is not connected.
+    """
+    def __init__(self, subscriber, bus):
+        self.subscriber = subscriber
+        self.bus = bus
+
+    def run(self, action, seconds=None):
+        return self.subscriber.send({'type': 'command', 'command': 'profile', 'action': action,
+                                     'seconds': seconds})
+
+    def status(self):
+        return self.bus.latest('profile') or {}
@@ -0,0 +1,212 @@
+from collections import OrderedDict
+import contextvars
+import logging
+import queue
+import threading
+import time
+import uuid
+from config.settings import LOG_FORMAT
+
+# The job whose code is running in the current context, if any
+current_job = contextvars.ContextVar('current_job', default=None)
+
+
+class Job:
+    """A unit of background work with its own captured log."""
+    def __init__(self, kind, func, args, kwargs, max_log_lines=5000, job_id=None, on_change=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.max_log_lines = max_log_lines
+        self.log_lines = []
+        self._func, self._args, self._kwargs = func, args, kwargs
+        self._changed = threading.Condition()
+        # Called with {'id', 'line'} or {'id', 'status', ...} after every change
+        self.on_change = on_change
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def append_log(self, line):
+        with self._changed:
+            offset = len(self.log_lines)
+            if offset < self.max_log_lines:
+                self.log_lines.append(line)
+            self._changed.notify_all()
+        if self.on_change is not None:
+            self.on_change({'id': self.id, 'line': line, 'offset': offset})
+
+    def _set_status(self, status):
+        with self._changed:
+            self.status = status
+            self._changed.notify_all()
+        if self.on_change is not None:
+            self.on_change({'id': self.id, 'kind': self.kind, 'status': status, 'result': self.result,
+                            'error': self.error, 'submitted_at': self.submitted_at,
+                            'started_at': self.started_at, 'finished_at': self.finished_at})
+
+    def apply_update(self, update):
+        """Applies a 'job' event (or a to_dict() state) published by the process running this job"""
+        if 'line' in update:
+            # A line already included in a state snapshot comes back with a lower offset
+            if update.get('offset', len(self.log_lines)) >= len(self.log_lines):
+                self.append_log(update['line'])
+            return
+        with self._changed:
+            if len(update.get('log') or ()) > len(self.log_lines):
+                self.log_lines = list(update['log'][:self.max_log_lines])
+            for name in ('kind', 'result', 'error', 'submitted_at', 'started_at', 'finished_at'):
+                if name in update:
+                    setattr(self, name, update[name])
+        self._set_status(update['status'])
+
+    def wait_for_lines(self, since, timeout=None):
+        """Block until there are lines after `since` or the job finishes; returns (lines, finished)"""
+        with self._changed:
+            if len(self.log_lines) <= since and not self.finished:
+                self._changed.wait(timeout)
+            return self.log_lines[since:], self.finished
+
+    def run(self):
+        token = current_job.set(self)
+        self.started_at = time.time()
+        self._set_status('running')
+        try:
+            self.result = self._func(*self._args, **self._kwargs)
+            self.finished_at = time.time()
+            self._set_status('succeeded')
+        except Exception as e:
+            self.error = str(e)
+            self.finished_at = time.time()
+            self._set_status('failed')
+        finally:
+            current_job.reset(token)
+
+    def to_dict(self, since=0):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+            'log': self.log_lines[since:],
+            'log_offset': len(self.log_lines),
+        }
+
+
+class JobLogHandler(logging.Handler):
+    """
+    Root-logger handler that routes records to the job in the current context.
+
+    Installed once; records emitted from threads that are not running a job
+    (the scheduler, other requests) see current_job unset and are ignored,
+    so a job's log only ever contains its own output.
+    """
+    def emit(self, record):
+        job = current_job.get()
+        if job is None:
+            return
+        try:
+            job.append_log(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class JobQueue:
+    """
+    Runs submitted work on a single background thread and keeps recent jobs.
+
+    Jobs run one at a time so manual trades never overlap each other; the
+    submitting request returns immediately with the job id. When an event
+    bus is given, every log line and status change is also published on
+    the 'job' topic so other processes can follow the job.
+
+    Methods
+    -------
+    submit(func, *args, kind='job', job_id=None, **kwargs):
+        Queues func(*args, **kwargs) and returns the Job.
+    register(kind, func):
+        Names a callable so it can be submitted by kind (e.g. from another process).
+    submit_named(kind, job_id=None, **kwargs):
+        Queues the callable registered for kind and returns the Job.
+    get(job_id):
+        Returns a Job by id, or None once it has been evicted from history.
+    recent():
+        Returns the jobs still in history, oldest first.
+    """
+    _log_handler = None
+
+    def __init__(self, max_history=100, level=logging.INFO, events=None):
+        self.max_history = max_history
+        self.events = events
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._registry = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._install_log_handler(level)
+
+    @classmethod
+    def _install_log_handler(cls, level):
+        if cls._log_handler is None:
+            handler = JobLogHandler(level)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            logging.getLogger().addHandler(handler)
+            cls._log_handler = handler
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='job-queue', daemon=True)
+            self._worker.start()
+
+    def _publish(self, update):
+        self.events.publish('job', update)
+
+    def register(self, kind, func):
+        self._registry[kind] = func
+
+    def submit_named(self, kind, job_id=None, **kwargs):
+        if kind not in self._registry:
+            raise KeyError(f"No job registered as '{kind}'")
+        return self.submit(self._registry[kind], kind=kind, job_id=job_id, **kwargs)
+
+    def submit(self, func, *args, kind='job', job_id=None, **kwargs):
+        job = Job(kind, func, args, kwargs, job_id=job_id,
+                  on_change=self._publish if self.events is not None else None)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if not oldest.finished:
+                    break
+                del self._jobs[oldest_id]
+            self._ensure_worker()
+        # Announced before it runs, so other processes know the id as soon as it is returned
+        job._set_status('queued')
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def recent(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            # Each job runs in a fresh context so its current_job binding cannot leak
+            contextvars.copy_context().run(job.run)
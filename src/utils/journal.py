@@ -0,0 +1,170 @@
+import itertools
+import json
+import os
+import threading
+import time
+from config.settings import JOURNAL_FSYNC_INTERVAL
+from utils.db import JOURNAL_FILE
+from utils.logger import logger
+
+try:
+    import orjson
+except ImportError:  # optional: the json module is a few microseconds slower per record
+    orjson = None
+
+# Steps of a trade, in order; a trade is resolved once it reaches the last two
+OPENED, SUBMITTED, FILLED, LOGGED, ABORTED = 'opened', 'submitted', 'filled', 'logged', 'aborted'
+# An error cut execution short with orders possibly live; the trade stays unresolved
+INTERRUPTED = 'interrupted'
+RESOLVED_STEPS = (LOGGED, ABORTED)
+
+
+def _dumps(record):
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, separators=(',', ':')).encode()
+
+
+class TradeJournal:
+    """
+    Append-only write-ahead journal of in-flight cross-venue trades.
+
+    Each step of a trade is one JSON line: 'opened' with the planned legs
+    and the client order id each will be sent with, before any order is
+    sent, 'submitted' with each acknowledged order, 'filled' with its final
+    state, then 'logged' once the trade row is stored or 'aborted'
+    ('interrupted' marks an error mid-trade and leaves it unresolved). A record goes to the OS with a single write() on
+    an O_APPEND descriptor, a few microseconds, so it survives the process
+    dying right after; a background thread fsyncs every
+    JOURNAL_FSYNC_INTERVAL seconds when there is something new, so a
+    machine crash loses at most that window. With path=None the journal
+    records nothing (paper trading).
+
+    unresolved() replays the file into the trades that never reached a
+    final step, for ArbitrageTrader.recover_trades(); compact() then
+    rewrites the file with just those.
+
+    Methods
+    -------
+    new_id():
+        A trade id unique across restarts.
+    append(trade_id, step, **fields):
+        Writes one step.
+    order(trade_id, step, order):
+        Writes a 'submitted' or 'filled' step for an Order.
+    unresolved():
+        {trade_id: {'opened': fields, 'legs': {side: fields}, 'step': last step}}
+        for trades not logged or aborted.
+    compact():
+        Rewrites the file keeping only unresolved trades.
+    close():
+        Fsyncs and closes the file.
+    """
+    def __init__(self, path=JOURNAL_FILE, fsync_interval=JOURNAL_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._prefix = f'{int(time.time() * 1000):x}'
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._fd = None
+        self._stop = threading.Event()
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._open()
+            threading.Thread(target=self._sync_loop, name='journal-fsync', daemon=True).start()
+
+    def _open(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+        # A line torn by a crash would swallow the next record; end it first
+        size = os.fstat(self._fd).st_size
+        if size and os.pread(self._fd, 1, size - 1) != b'\n':
+            os.write(self._fd, b'\n')
+
+    def new_id(self):
+        return f'{self._prefix}-{next(self._ids)}'
+
+    def append(self, trade_id, step, **fields):
+        if self._fd is None:
+            return
+        fields['id'] = trade_id
+        fields['step'] = step
+        fields['time'] = time.time()
+        line = _dumps(fields) + b'\n'
+        with self._lock:
+            os.write(self._fd, line)
+            self._dirty = True
+
+    def order(self, trade_id, step, order):
+        self.append(trade_id, step, venue=order.venue, symbol=order.symbol, side=order.side,
+                    quantity=order.quantity, order_id=order.order_id, status=order.status, filled=order.filled,
+                    average_price=order.average_price, fee=order.fee, fee_asset=order.fee_asset)
+
+    def _sync(self):
+        with self._lock:
+            if not self._dirty or self._fd is None:
+                return
+            self._dirty = False
+            # A duplicate stays valid if compact() swaps the file meanwhile, so appends
+            # never wait on the disk
+            fd = os.dup(self._fd)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self._sync()
+            except OSError as e:
+                logger.error(f"Error syncing trade journal: {e}")
+
+    def _replay(self):
+        trades = {}
+        if not self.path or not os.path.exists(self.path):
+            return trades
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write; everything before it is intact
+                    continue
+                trade = trades.setdefault(record['id'], {'opened': None, 'legs': {}, 'step': None, 'records': []})
+                trade['records'].append(line)
+                trade['step'] = record['step']
+                if record['step'] == OPENED:
+                    trade['opened'] = record
+                elif record['step'] in (SUBMITTED, FILLED):
+                    trade['legs'][record['side']] = record
+        return trades
+
+    def unresolved(self):
+        return {trade_id: trade for trade_id, trade in self._replay().items()
+                if trade['step'] not in RESOLVED_STEPS}
+
+    def compact(self):
+        if self._fd is None:
+            return
+        pending = self.unresolved()
+        partial = f'{self.path}.compact'
+        with open(partial, 'wb') as f:
+            for trade in pending.values():
+                f.writelines(trade['records'])
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            os.replace(partial, self.path)
+            os.close(self._fd)
+            self._open()
+            self._dirty = False
+        logger.info(f"📒 Trade journal compacted ({len(pending)} unresolved trades kept)")
+
+    def close(self):
+        self._stop.set()
+        self._sync()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,240 @@
+from collections import Counter
+from datetime import datetime
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from config.settings import PROFILE_DIR, PROFILE_INTERVAL, PROFILE_MAX_SECONDS
+from utils.logger import logger
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for every thread of this process.
+
+    A daemon thread reads sys._current_frames() every `interval` seconds and
+    counts each distinct stack, keyed by code objects so a sample costs a
+    frame walk and a dict update; labels are only formatted when the
+    profile is written. The output is the collapsed-stack format read by
+    flamegraph.pl and speedscope: one 'thread;outer;...;inner count' line
+    per stack. Nothing runs while the profiler is stopped.
+    """
+    def __init__(self, interval=0.005, output_dir='logs'):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.started_at = None
+        self.samples = 0
+        self.last_output = None
+        self._counts = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=None):
+        with self._lock:
+            if self.running:
+                return False
+            self._counts = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(seconds,), name='sampling-profiler',
+                                            daemon=True)
+            self._thread.start()
+        logger.info(f"🔬 CPU profiling started ({f'{seconds}s' if seconds else 'until stopped'}, "
+                    f"every {self.interval * 1000:.1f} ms)")
+        return True
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return None
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return self.last_output
+
+    def _run(self, seconds):
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds if seconds else None
+        names = {}
+        counts = self._counts
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if len(names) < len(frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                counts[(ident, tuple(stack))] += 1
+            self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.last_output = self._write(names)
+        self._thread = None
+
+    def _write(self, names):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'cpu-{datetime.now():%Y%m%d-%H%M%S}.folded')
+        labels = {}
+        with open(path, 'w') as f:
+            for (ident, stack), count in self._counts.most_common():
+                frames = [labels.get(code) or labels.setdefault(code, _frame_label(code)) for code in reversed(stack)]
+                thread = names.get(ident, str(ident)).replace(';', ':')
+                f.write(f"{thread};{';'.join(frames)} {count}\n")
+        logger.info(f"🔬 CPU profile: {self.samples} samples, {len(self._counts)} stacks -> {path}")
+        return path
+
+
+class MemoryProfiler:
+    """
+    tracemalloc snapshots and diffs written as text reports.
+
+    Tracing only costs anything between start() and stop(); snapshot()
+    writes the largest allocation sites and keeps the snapshot as the
+    baseline for the next diff(), which reports what grew since.
+    """
+    def __init__(self, output_dir='logs', frames=25, top=50):
+        self.output_dir = output_dir
+        self.frames = frames
+        self.top = top
+        self.last_output = None
+        self._baseline = None
+
+    @property
+    def running(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info(f"🧠 Memory tracing started ({self.frames} frames per allocation)")
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("🧠 Memory tracing stopped")
+        self._baseline = None
+
+    def _take(self):
+        self.start()
+        # Our own bookkeeping would otherwise top every report
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+    def _write(self, kind, lines):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'memory-{kind}-{datetime.now():%Y%m%d-%H%M%S}.txt')
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path, 'w') as f:
+            f.write(f'traced: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB\n')
+            f.writelines(f'{line}\n' for line in lines)
+        self.last_output = path
+        logger.info(f"🧠 Memory {kind} -> {path}")
+        return path
+
+    def snapshot(self):
+        snapshot = self._take()
+        self._baseline = snapshot
+        return self._write('snapshot', snapshot.statistics('lineno')[:self.top])
+
+    def diff(self):
+        snapshot = self._take()
+        if self._baseline is None:
+            self._baseline = snapshot
+            return self._write('snapshot', snapshot.statistics('lineno')[:self.top])
+        stats = snapshot.compare_to(self._baseline, 'lineno')[:self.top]
+        self._baseline = snapshot
+        return self._write('diff', stats)
+
+
+# What /admin/profile accepts as action=
+PROFILE_ACTIONS = ('start', 'stop', 'memory-start', 'memory-stop', 'snapshot', 'diff')
+
+
+class RuntimeProfiler:
+    """
+    CPU and memory profiling that can be switched on in a running process.
+
+    Methods
+    -------
+    start_cpu(seconds):
+        Samples all threads for `seconds` (more than 0, capped at
+        PROFILE_MAX_SECONDS), then writes a .folded flamegraph profile.
+    stop_cpu():
+        Stops CPU sampling early and writes the profile.
+    start_memory() / stop_memory():
+        Starts or stops tracemalloc.
+    memory_snapshot() / memory_diff():
+        Writes the top allocation sites, or their growth since the last one.
+    run(action, seconds=None):
+        One of PROFILE_ACTIONS by name; returns (file written, error).
+    status():
+        What is running and the last files written.
+    """
+    def __init__(self, output_dir=PROFILE_DIR, interval=PROFILE_INTERVAL, max_seconds=PROFILE_MAX_SECONDS):
+        self.max_seconds = max_seconds
+        self.cpu = SamplingProfiler(interval, output_dir)
+        self.memory = MemoryProfiler(output_dir)
+
+    def start_cpu(self, seconds):
+        # The sampler treats a falsy duration as "until stopped"; never hand it one
+        if not seconds > 0:
+            logger.warning(f"⚠️ Refusing CPU profile of {seconds}s; the duration must be greater than 0")
+            return False
+        return self.cpu.start(min(seconds, self.max_seconds))
+
+    def stop_cpu(self):
+        return self.cpu.stop()
+
+    def start_memory(self):
+        self.memory.start()
+
+    def stop_memory(self):
+        self.memory.stop()
+
+    def memory_snapshot(self):
+        return self.memory.snapshot()
+
+    def memory_diff(self):
+        return self.memory.diff()
+
+    def run(self, action, seconds=None):
+        if action == 'start':
+            return None, None if self.start_cpu(seconds) else 'CPU profiling is already running'
+        if action == 'stop':
+            return self.stop_cpu(), None
+        if action == 'memory-start':
+            self.start_memory()
+        elif action == 'memory-stop':
+            self.stop_memory()
+        elif action == 'snapshot':
+            return self.memory_snapshot(), None
+        elif action == 'diff':
+            return self.memory_diff(), None
+        else:
+            return None, f'Unknown action: {action}'
+        return None, None
+
+    def status(self):
+        return {'cpu': {'running': self.cpu.running, 'samples': self.cpu.samples,
+                        'last_output': self.cpu.last_output},
+                'memory': {'tracing': self.memory.running, 'last_output': self.memory.last_output}}
+
+
+profiler = RuntimeProfiler()
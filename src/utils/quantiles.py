@@ -0,0 +1,37 @@
+from bisect import bisect_left, insort
+
+
+class RollingQuantile:
+    """
+    Quantiles over the last `window` values.
+
+    A ring buffer remembers arrival order and a sorted copy answers
+    quantile queries with a single index; each update is one bisect to
+    remove the evicted value and one insort (O(log n) search plus a small
+    memmove for windows of a few thousand).
+    """
+    __slots__ = ('window', '_ring', '_sorted', '_next')
+
+    def __init__(self, window):
+        self.window = window
+        self._ring = []
+        self._sorted = []
+        self._next = 0
+
+    def __len__(self):
+        return len(self._ring)
+
+    def update(self, value):
+        if len(self._ring) < self.window:
+            self._ring.append(value)
+        else:
+            evicted = self._ring[self._next]
+            del self._sorted[bisect_left(self._sorted, evicted)]
+            self._ring[self._next] = value
+            self._next = (self._next + 1) % self.window
+        insort(self._sorted, value)
+
+    def quantile(self, q):
+        if not self._sorted:
+            return None
+        return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
@@ -0,0 +1,213 @@
+from array import array
+from utils.time_sync import timeline
+
+TRADE_FIELDS = ("time", "binance_price", "kucoin_price", "difference",
+                "profit", "result", "recommendation", "route",
+                "quantity", "fees", "estimated_profit")
+
+
+class Record:
+    """
+    Base for the compact record types passed from the handlers to the DB.
+
+    Subclasses declare their fields in __slots__, so instances carry no
+    per-object __dict__ (roughly a third of the memory of the equivalent
+    dict) and attribute access is a fixed-offset lookup. Records that are
+    updated in place (orders, stored trades) compare and hash by identity.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        fields = ', '.join(f'{field}={getattr(self, field)!r}' for field in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class FrozenRecord(Record):
+    """
+    A Record whose fields are set once, in __init__; it compares and
+    hashes by value, so it can be a set member or dict key.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f'{type(self).__name__}.{name} cannot be changed')
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        return (type(self) is type(other)
+                and all(getattr(self, field) == getattr(other, field) for field in self.__slots__))
+
+    def __hash__(self):
+        return hash((type(self),) + tuple(getattr(self, field) for field in self.__slots__))
+
+
+class Quote(FrozenRecord):
+    """Best bid and ask for one symbol on one venue; timestamp is on the shared timeline."""
+    __slots__ = ('venue', 'symbol', 'bid', 'ask', 'timestamp')
+
+    def __init__(self, venue, symbol, bid, ask, timestamp=None):
+        self.venue = venue
+        self.symbol = symbol
+        self.bid = bid
+        self.ask = ask
+        self.timestamp = timeline.now() if timestamp is None else timestamp
+
+    @property
+    def mid(self):
+        return (self.bid + self.ask) / 2
+
+    @property
+    def age(self):
+        return timeline.now() - self.timestamp
+
+
+class Opportunity(FrozenRecord):
+    """A detected price gap: buy on one venue, sell on another."""
+    __slots__ = ('symbol', 'buy_venue', 'sell_venue', 'buy_price', 'sell_price', 'threshold')
+
+    def __init__(self, symbol, buy_venue, sell_venue, buy_price, sell_price, threshold):
+        self.symbol = symbol
+        self.buy_venue = buy_venue
+        self.sell_venue = sell_venue
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.threshold = threshold
+
+    @property
+    def difference(self):
+        return self.sell_price - self.buy_price
+
+
+# Normalized order statuses (ccxt's vocabulary); everything but 'open' is final
+ORDER_FINAL_STATUSES = ('closed', 'canceled', 'rejected', 'expired')
+
+
+class Order(Record):
+    """An order as reported by an exchange, reduced to the fields we use."""
+    __slots__ = ('venue', 'symbol', 'side', 'quantity', 'order_id', 'status', 'filled',
+                 'average_price', 'fee', 'fee_asset', 'timestamp')
+
+    def __init__(self, venue, symbol, side, quantity, order_id=None, status=None, filled=0.0,
+                 average_price=None, fee=None, fee_asset=None, timestamp=None):
+        self.venue = venue
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.order_id = order_id
+        self.status = status
+        self.filled = filled
+        self.average_price = average_price
+        self.fee = fee
+        self.fee_asset = fee_asset
+        self.timestamp = timeline.now() if timestamp is None else timestamp
+
+    @property
+    def is_final(self):
+        return self.status in ORDER_FINAL_STATUSES
+
+
+class TradeRecord(Record):
+    """
+    One row of the trades table; id is None until the row is stored.
+
+    profit is realized from the reconciled fills when orders were placed;
+    estimated_profit is what sizing expected before placing them.
+    """
+    __slots__ = TRADE_FIELDS + ('id',)
+
+    def __init__(self, time, binance_price, kucoin_price, difference, profit, result,
+                 recommendation, route=None, quantity=None, fees=None, estimated_profit=None, id=None):
+        self.time = time
+        self.binance_price = binance_price
+        self.kucoin_price = kucoin_price
+        self.difference = difference
+        self.profit = profit
+        self.result = result
+        self.recommendation = recommendation
+        self.route = route
+        self.quantity = quantity
+        self.fees = fees
+        self.estimated_profit = estimated_profit
+        self.id = id
+
+    def values(self):
+        """Column values in TRADE_FIELDS order, as stored by TradeDB"""
+        return tuple(getattr(self, field) for field in TRADE_FIELDS)
+
+
+class QuoteHistory:
+    """
+    Fixed-capacity quote history stored as parallel typed arrays.
+
+    Holds the last `capacity` quotes in five preallocated columns (three
+    float64, two uint16 indexes into the venue and symbol tables), about 28
+    bytes per quote versus ~150 for a list of Quote objects, and appends
+    without allocating. Older quotes are overwritten.
+
+    Methods
+    -------
+    append(quote):
+        Stores a Quote, overwriting the oldest once full.
+    __getitem__(i):
+        Returns the i-th oldest stored quote as a Quote.
+    columns():
+        Returns (timestamps, bids, asks, venues, symbols) in age order as arrays.
+    """
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.bids = array('d', bytes(8 * capacity))
+        self.asks = array('d', bytes(8 * capacity))
+        self.venue_ids = array('H', bytes(2 * capacity))
+        self.symbol_ids = array('H', bytes(2 * capacity))
+        self.venue_names = []
+        self.symbol_names = []
+        self._venue_index = {}
+        self._symbol_index = {}
+        self._next = 0
+        self._count = 0
+
+    def _intern(self, value, names, index):
+        key = index.get(value)
+        if key is None:
+            key = index[value] = len(names)
+            names.append(value)
+        return key
+
+    def append(self, quote):
+        i = self._next
+        self.timestamps[i] = quote.timestamp
+        self.bids[i] = quote.bid
+        self.asks[i] = quote.ask
+        self.venue_ids[i] = self._intern(quote.venue, self.venue_names, self._venue_index)
+        self.symbol_ids[i] = self._intern(quote.symbol, self.symbol_names, self._symbol_index)
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('quote history index out of range')
+        return (self._next - self._count + i) % self.capacity
+
+    def __getitem__(self, i):
+        slot = self._slot(i)
+        return Quote(self.venue_names[self.venue_ids[slot]], self.symbol_names[self.symbol_ids[slot]],
+                     self.bids[slot], self.asks[slot], self.timestamps[slot])
+
+    def columns(self):
+        start = (self._next - self._count) % self.capacity
+        def ordered(column):
+            if start + self._count <= self.capacity:
+                return column[start:start + self._count]
+            return column[start:] + column[:self._next]
+        return tuple(ordered(column) for column in
+                     (self.timestamps, self.bids, self.asks, self.venue_ids, self.symbol_ids))
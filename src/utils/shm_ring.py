@@ -0,0 +1,100 @@
+from multiprocessing import shared_memory
+import struct
+
+_HEADER = struct.Struct('<QQQ')  # head, tail, dropped
+
+
+class SharedRing:
+    """
+    Fixed-record single-producer/single-consumer ring in shared memory.
+
+    One process pushes packed records and one process pops them, without
+    pickling, pipes or locks: the producer only ever writes `head` and the
+    consumer only ever writes `tail`, and a slot is published by advancing
+    `head` after the record bytes are in place. When the ring is full the
+    newest record is dropped and counted, so a slow consumer never stalls
+    a scanner.
+
+    Methods
+    -------
+    create(record_format, capacity):
+        Allocates a new ring; pass ring.name to the other process.
+    attach(name, record_format, capacity):
+        Opens an existing ring by name.
+    push(*values):
+        Packs and appends one record; returns False if the ring was full.
+    pop():
+        Returns the oldest record as a tuple, or None when empty.
+    drain(limit=None):
+        Pops every available record (up to limit).
+    close() / unlink():
+        Detaches from / destroys the shared memory block.
+    """
+    def __init__(self, memory, record_format, capacity, owner=False):
+        self._memory = memory
+        self._buffer = memory.buf
+        self._record = struct.Struct(record_format)
+        self.capacity = capacity
+        self._owner = owner
+
+    @classmethod
+    def _size(cls, record_format, capacity):
+        return _HEADER.size + struct.calcsize(record_format) * capacity
+
+    @classmethod
+    def create(cls, record_format, capacity):
+        memory = shared_memory.SharedMemory(create=True, size=cls._size(record_format, capacity))
+        _HEADER.pack_into(memory.buf, 0, 0, 0, 0)
+        return cls(memory, record_format, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name, record_format, capacity):
+        return cls(shared_memory.SharedMemory(name=name), record_format, capacity)
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    @property
+    def dropped(self):
+        return _HEADER.unpack_from(self._buffer, 0)[2]
+
+    def __len__(self):
+        head, tail, _ = _HEADER.unpack_from(self._buffer, 0)
+        return head - tail
+
+    def push(self, *values):
+        head, tail, dropped = _HEADER.unpack_from(self._buffer, 0)
+        if head - tail >= self.capacity:
+            struct.pack_into('<Q', self._buffer, 16, dropped + 1)
+            return False
+        offset = _HEADER.size + (head % self.capacity) * self._record.size
+        self._record.pack_into(self._buffer, offset, *values)
+        struct.pack_into('<Q', self._buffer, 0, head + 1)
+        return True
+
+    def pop(self):
+        head, tail, _ = _HEADER.unpack_from(self._buffer, 0)
+        if tail == head:
+            return None
+        offset = _HEADER.size + (tail % self.capacity) * self._record.size
+        record = self._record.unpack_from(self._buffer, offset)
+        struct.pack_into('<Q', self._buffer, 8, tail + 1)
+        return record
+
+    def drain(self, limit=None):
+        records = []
+        while limit is None or len(records) < limit:
+            record = self.pop()
+            if record is None:
+                break
+            records.append(record)
+        return records
+
+    def close(self):
+        self._buffer = None
+        self._memory.close()
+
+    def unlink(self):
+        if self._owner:
+            self._memory.unlink()
@@ -0,0 +1,151 @@
+from collections import deque, namedtuple
+import threading
+import time
+from config.settings import TIME_SYNC_INTERVAL, TIME_SYNC_BURST
+from utils.logger import logger
+
+# offset = exchange clock - local clock, in seconds; rtt in seconds
+ClockSample = namedtuple('ClockSample', ['offset', 'rtt', 'taken_at'])
+
+
+class Timeline:
+    """
+    One monotonic timeline for every quote, order and trade.
+
+    Wall-clock time is read once at startup and advanced with
+    time.monotonic(), so timestamps never jump backwards or skip when the
+    host's clock is stepped. Exchange timestamps are mapped onto it by
+    subtracting that exchange's measured clock offset.
+    """
+    def __init__(self, wall=time.time, monotonic=time.monotonic):
+        self._monotonic = monotonic
+        self._anchor_wall = wall()
+        self._anchor_mono = monotonic()
+
+    def now(self):
+        return self._anchor_wall + (self._monotonic() - self._anchor_mono)
+
+
+class VenueClock:
+    """
+    Offset and round-trip time of one exchange's clock, NTP-style.
+
+    Each sample brackets a server-time request with two local readings and
+    assumes the server stamped it halfway through. The estimate comes from
+    the lowest-RTT sample in the recent window, because queueing delay is
+    what makes that midpoint assumption wrong and the fastest exchange had
+    the least of it.
+    """
+    def __init__(self, window=8):
+        self.samples = deque(maxlen=window)
+
+    def add(self, sent, server_time, received):
+        rtt = received - sent
+        self.samples.append(ClockSample(server_time - (sent + received) / 2, rtt, received))
+
+    @property
+    def best(self):
+        return min(self.samples, key=lambda sample: sample.rtt) if self.samples else None
+
+    @property
+    def offset(self):
+        best = self.best
+        return best.offset if best else 0.0
+
+    @property
+    def rtt(self):
+        best = self.best
+        return best.rtt if best else None
+
+
+class TimeSync:
+    """
+    Periodically measures each exchange's clock and applies the offset.
+
+    Handlers are registered with add_venue(); each must provide
+    get_server_time() (milliseconds, or None on failure) and
+    apply_clock_offset(seconds), which makes signed requests use the
+    exchange's clock (the offset it receives is relative to time.time()).
+    Sync runs `burst` samples per venue every `interval` seconds on a
+    daemon thread.
+
+    Methods
+    -------
+    add_venue(name, handler):
+        Registers an exchange handler.
+    sync(venue=None):
+        Samples one or all venues now and applies the new offsets.
+    start():
+        Syncs immediately, then keeps syncing in the background.
+    offset(venue) / rtt(venue):
+        Current offset and round-trip estimates in seconds.
+    to_local(venue, exchange_ms):
+        Maps an exchange timestamp (ms) onto the local timeline.
+    skew(venue_a, venue_b):
+        How far venue_a's clock runs ahead of venue_b's, in seconds.
+    """
+    def __init__(self, timeline, interval=300, burst=4, window=8):
+        self.timeline = timeline
+        self.interval = interval
+        self.burst = burst
+        self.window = window
+        self._venues = {}
+        self._clocks = {}
+        self._thread = None
+
+    def add_venue(self, name, handler):
+        self._venues[name] = handler
+        self._clocks.setdefault(name, VenueClock(self.window))
+
+    def sync(self, venue=None):
+        for name in ([venue] if venue else list(self._venues)):
+            handler, clock = self._venues[name], self._clocks[name]
+            for _ in range(self.burst):
+                sent = self.timeline.now()
+                server_ms = handler.get_server_time()
+                received = self.timeline.now()
+                if server_ms is not None:
+                    clock.add(sent, server_ms / 1000, received)
+            if clock.best is None:
+                logger.warning(f"⚠️ Could not read {name} server time")
+                continue
+            # The SDKs sign with time.time() + offset, so express it against the wall clock
+            handler.apply_clock_offset(clock.offset + self.timeline.now() - time.time())
+            logger.info(f"🕒 {name} clock offset {clock.offset * 1000:+.1f} ms (rtt {clock.rtt * 1000:.1f} ms)")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='time-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"❌ Clock sync failed: {e}")
+            time.sleep(self.interval)
+
+    def offset(self, venue):
+        clock = self._clocks.get(venue)
+        return clock.offset if clock else 0.0
+
+    def rtt(self, venue):
+        clock = self._clocks.get(venue)
+        return clock.rtt if clock else None
+
+    def to_local(self, venue, exchange_ms):
+        return exchange_ms / 1000 - self.offset(venue)
+
+    def skew(self, venue_a, venue_b):
+        return self.offset(venue_a) - self.offset(venue_b)
+
+    def snapshot(self):
+        return {name: {'offset_ms': clock.offset * 1000,
+                       'rtt_ms': clock.rtt * 1000 if clock.rtt is not None else None}
+                for name, clock in self._clocks.items()}
+
+
+timeline = Timeline()
+time_sync = TimeSync(timeline, interval=TIME_SYNC_INTERVAL, burst=TIME_SYNC_BURST)
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The bot imports its packages relative to src/, the way src/main.py is run
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# config.settings insists on credentials; nothing here talks to a real exchange
+for name in ('BINANCE_API_KEY', 'BINANCE_API_SECRET', 'KUCOIN_API_KEY', 'KUCOIN_API_SECRET',
+             'KUCOIN_API_PASSPHRASE'):
+    os.environ.setdefault(name, 'test')
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.mkdtemp(prefix='arbitrage-tests-'), 'bot.log'))
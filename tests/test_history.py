@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from utils.history import HistoryLoader, interval_ms, to_ms
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+START = to_ms('2024-01-01T00:00:00')
+MINUTE = 60000
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+class ReplayingHandler:
+    """Answers get_klines/get_agg_trades from recorded Binance responses, parsed as BinanceHandler does"""
+    def __init__(self, fail=()):
+        self.klines = load_fixture('binance_btcusdt_1m_klines.json')
+        self.trades = load_fixture('binance_btcusdt_agg_trades.json')
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _called(self, kind, start, end):
+        with self._lock:
+            self.calls.append((kind, start, end))
+            if start in self.fail:
+                self.fail.discard(start)
+                return False
+        return True
+
+    def get_klines(self, symbol, interval, start, end):
+        if not self._called('klines', start, end):
+            return None
+        return [(row[0], float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+                for row in self.klines if start <= row[0] < end]
+
+    def get_agg_trades(self, symbol, start, end):
+        if not self._called('trades', start, end):
+            return None
+        return [(row['T'], float(row['p']), float(row['q']), row['m']) for row in self.trades if start <= row['T'] < end]
+
+
+def make_loader(tmp_path, handler, now=START + 3600000):
+    # Ten-candle kline chunks and five-minute trade chunks
+    return HistoryLoader({'binance': handler}, cache_dir=str(tmp_path), workers=2, kline_chunk=10,
+                         trade_chunk=300, clock=lambda: now / 1000)
+
+
+def cached_chunks(tmp_path, kind):
+    directory = tmp_path / 'binance' / 'BTC-USDT' / kind
+    return sorted(int(name[:-len('.npy')]) for name in os.listdir(directory)) if directory.exists() else []
+
+
+def test_kline_chunks_align_to_the_epoch(tmp_path):
+    handler = ReplayingHandler()
+    loader = make_loader(tmp_path, handler)
+
+    klines = loader.klines('binance', 'BTC/USDT', '1m', (START + 3 * MINUTE) / 1000, (START + 27 * MINUTE) / 1000)
+
+    assert sorted(handler.calls) == [('klines', START + i * 10 * MINUTE, START + (i + 1) * 10 * MINUTE)
+                                     for i in range(3)]
+    assert cached_chunks(tmp_path, '1m') == [START, START + 10 * MINUTE, START + 20 * MINUTE]
+    assert len(klines) == 24
+    assert klines['time'][0] == START + 3 * MINUTE and klines['time'][-1] == START + 26 * MINUTE
+    assert np.all(np.diff(klines['time']) == interval_ms('1m'))
+    assert klines['close'][0] == float(handler.klines[3][4])
+
+
+def test_repeat_request_is_served_from_disk(tmp_path):
+    first = make_loader(tmp_path, ReplayingHandler()).klines('binance', 'BTC/USDT', '1m', START / 1000,
+                                                               (START + 30 * MINUTE) / 1000)
+    handler = ReplayingHandler()
+
+    again = make_loader(tmp_path, handler).klines('binance', 'BTC/USDT', '1m', START / 1000,
+                                                  (START + 30 * MINUTE) / 1000)
+
+    assert handler.calls == []
+    assert np.array_equal(first, again)
+
+
+def test_failed_chunk_is_resumed_on_the_next_request(tmp_path):
+    handler = ReplayingHandler(fail={START + 10 * MINUTE})
+    loader = make_loader(tmp_path, handler)
+    end = (START + 30 * MINUTE) / 1000
+
+    partial = loader.klines('binance', 'BTC/USDT', '1m', START / 1000, end)
+    assert len(partial) == 20
+    assert cached_chunks(tmp_path, '1m') == [START, START + 20 * MINUTE]
+    assert loader.prefetch(['BTC/USDT'], '1m', START / 1000, end) == 0
+
+    # prefetch above already resumed the missing chunk; nothing else was downloaded twice
+    assert sorted(call[1] for call in handler.calls) == [START, START + 10 * MINUTE, START + 10 * MINUTE,
+                                                        START + 20 * MINUTE]
+    assert len(loader.klines('binance', 'BTC/USDT', '1m', START / 1000, end)) == 30
+
+
+def test_chunks_still_open_are_returned_but_not_cached(tmp_path):
+    handler = ReplayingHandler()
+    # The last candle of the third chunk has not closed yet
+    loader = make_loader(tmp_path, handler, now=START + 25 * MINUTE)
+
+    klines = loader.klines('binance', 'BTC/USDT', '1m', START / 1000, (START + 30 * MINUTE) / 1000)
+    loader.klines('binance', 'BTC/USDT', '1m', START / 1000, (START + 30 * MINUTE) / 1000)
+
+    assert len(klines) == 30
+    assert cached_chunks(tmp_path, '1m') == [START, START + 10 * MINUTE]
+    assert [call[1] for call in handler.calls].count(START + 20 * MINUTE) == 2
+
+
+def test_agg_trades_are_chunked_and_cached(tmp_path):
+    handler = ReplayingHandler()
+    loader = make_loader(tmp_path, handler)
+    start, end = START + 4 * MINUTE, START + 16 * MINUTE
+
+    trades = loader.trades('binance', 'BTC/USDT', start / 1000, end / 1000)
+
+    expected = [row for row in handler.trades if start <= row['T'] < end]
+    assert cached_chunks(tmp_path, 'trades') == [START, START + 5 * MINUTE, START + 10 * MINUTE,
+                                                 START + 15 * MINUTE]
+    assert trades['time'].tolist() == [row['T'] for row in expected]
+    assert trades['buyer_is_maker'].tolist() == [row['m'] for row in expected]
+    assert trades['price'][0] == pytest.approx(float(expected[0]['p']))
+    assert loader.trades('binance', 'BTC/USDT', start / 1000, end / 1000).tolist() == trades.tolist()
+    assert len(handler.calls) == 4
+
+
+def test_venues_without_trade_history_return_none(tmp_path):
+    class KlinesOnly:
+        get_klines = ReplayingHandler.get_klines
+
+    loader = HistoryLoader({'kucoin': KlinesOnly()}, cache_dir=str(tmp_path))
+
+    assert loader.trades('kucoin', 'BTC/USDT', START / 1000, (START + MINUTE) / 1000) is None
@@ -0,0 +1,77 @@
+import pytest
+
+from trading.inventory import InventoryTracker, RebalancePlanner
+
+FEES = {'binance': {'BTC': 0.0005}, 'kucoin': {'BTC': 0.0005}}
+TRANSFER_TIMES = {'BTC': 600}
+
+
+def make_planner(balances, fees=FEES, **kwargs):
+    inventory = InventoryTracker(clock=lambda: 0.0)
+    for (venue, asset), amount in balances.items():
+        inventory.set_balance(venue, asset, amount)
+    return RebalancePlanner(inventory, fees, TRANSFER_TIMES, **kwargs)
+
+
+def test_adjust_moves_balance_and_flow():
+    inventory = InventoryTracker(flow_time_constant=100, clock=lambda: 0.0)
+    inventory.set_balance('kucoin', 'BTC', 1.0)
+    inventory.adjust('kucoin', 'BTC', -0.5, timestamp=0.0)
+
+    assert inventory.free('kucoin', 'BTC') == 0.5
+    assert inventory.balances() == {('kucoin', 'BTC'): 0.5}
+    assert inventory.flow_rate('kucoin', 'BTC', now=0.0) == pytest.approx(-0.005)
+    assert inventory.time_to_depletion('kucoin', 'BTC', now=0.0) == pytest.approx(100.0)
+
+
+def test_plan_sizes_transfer_net_of_withdrawal_fee():
+    planner = make_planner({('binance', 'BTC'): 1.9, ('kucoin', 'BTC'): 0.1})
+
+    transfer, = planner.plan(['BTC'], now=0.0)
+
+    assert (transfer.from_venue, transfer.to_venue) == ('binance', 'kucoin')
+    assert transfer.reason == 'below trigger'
+    assert transfer.fee == 0.0005
+    # The donor keeps its target share; the fee comes out of what it sends
+    assert transfer.amount == pytest.approx(0.9 - 0.0005)
+    assert transfer.arrives_at == 600
+
+
+def test_plan_skips_transfer_when_fee_is_too_large():
+    planner = make_planner({('binance', 'BTC'): 1.9, ('kucoin', 'BTC'): 0.1},
+                           fees={'binance': {'BTC': 0.1}}, max_fee_ratio=0.05)
+
+    assert planner.plan(['BTC'], now=0.0) == []
+
+
+def test_simulate_rebalances_before_depletion():
+    planner = make_planner({})
+    start = {'binance': {'BTC': 1.0, 'USDT': 1e6}, 'kucoin': {'BTC': 1.0, 'USDT': 1e6}}
+    # KuCoin sells 0.01 BTC a minute, so it would run dry after 100 fills (t=5940)
+    fills = []
+    for i in range(150):
+        fills.append((i * 60.0, 'binance', 'BTC/USDT', 'buy', 0.01, 100.0, 0.0))
+        fills.append((i * 60.0, 'kucoin', 'BTC/USDT', 'sell', 0.01, 100.0, 0.0))
+
+    result = planner.simulate(fills, start, ['BTC'])
+
+    assert result['blocked_fills'] == 0
+    assert result['transfers']
+    first = result['transfers'][0]
+    assert (first.from_venue, first.to_venue) == ('binance', 'kucoin')
+    assert first.arrives_at < 5940
+    assert result['min_balances'][('kucoin', 'BTC')] > 0
+    # Withdrawal fees are the only BTC that leaves the system
+    final = result['final_balances']
+    assert final['binance']['BTC'] + final['kucoin']['BTC'] == pytest.approx(2.0 - result['fees_paid'])
+
+
+def test_simulate_blocks_fills_without_balance():
+    planner = make_planner({})
+    start = {'kucoin': {'BTC': 0.015, 'USDT': 0.0}}
+    fills = [(t, 'kucoin', 'BTC/USDT', 'sell', 0.01, 100.0, 0.0) for t in (0.0, 60.0)]
+
+    result = planner.simulate(fills, start, ['BTC'])
+
+    assert result['blocked_fills'] == 1
+    assert result['final_balances']['kucoin']['BTC'] == pytest.approx(0.005)
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from exchanges.paper import PaperExchange, RecordedBooks
+
+BIDS = [(99.0, 1.0), (98.0, 2.0)]
+ASKS = [(100.0, 1.0), (101.0, 2.0)]
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_exchange(snapshots=None, balances=None, clock=None, **kwargs):
+    books = RecordedBooks(snapshots or [(0.0, 'BTC/USDT', BIDS, ASKS)])
+    return PaperExchange('binance', books, balances or {'BTC': 10.0, 'USDT': 10000.0},
+                         clock=clock or Clock(), **kwargs)
+
+
+def test_recorded_books_return_latest_snapshot_at_or_before_time():
+    books = RecordedBooks([(10.0, 'BTC/USDT', [(2.0, 1.0)], [(3.0, 1.0)]),
+                           (0.0, 'BTC/USDT', BIDS, ASKS)])
+
+    assert books.book('BTC/USDT', 1, -1.0) is None
+    assert books.book('BTC/USDT', 1, 5.0) == (BIDS[:1], ASKS[:1])
+    assert books.book('BTC/USDT', 5, 10.0) == ([(2.0, 1.0)], [(3.0, 1.0)])
+    assert books.tickers(10.0) == {'BTC/USDT': (2.0, 3.0)}
+
+
+def test_buy_walks_depth_and_charges_fee_in_quote():
+    exchange = make_exchange(fee_rate=0.001)
+
+    order = exchange.place_buy_order('BTC/USDT', 2.0)
+
+    assert order.status == 'closed'
+    assert order.filled == pytest.approx(2.0)
+    assert order.average_price == pytest.approx(100.5)
+    assert order.fee == pytest.approx(0.201)
+    assert order.fee_asset == 'USDT'
+    assert exchange.check_asset_balance('BTC') == pytest.approx(12.0)
+    assert exchange.check_asset_balance('USDT') == pytest.approx(10000.0 - 201.0 - 0.201)
+
+
+def test_order_larger_than_book_fills_partially_and_expires():
+    exchange = make_exchange(fee_rate=0.0)
+
+    order = exchange.place_sell_order('BTC/USDT', 5.0)
+
+    assert order.status == 'expired'
+    assert order.filled == pytest.approx(3.0)
+    assert order.average_price == pytest.approx((99.0 + 2 * 98.0) / 3)
+    assert exchange.check_asset_balance('BTC') == pytest.approx(7.0)
+    assert exchange.check_asset_balance('USDT') == pytest.approx(10000.0 + 295.0)
+
+
+def test_participation_limits_share_of_each_level():
+    exchange = make_exchange(fee_rate=0.0, participation=0.5)
+
+    order = exchange.place_buy_order('BTC/USDT', 2.0)
+
+    assert order.status == 'expired'
+    assert order.filled == pytest.approx(1.5)
+    assert order.average_price == pytest.approx((0.5 * 100.0 + 1.0 * 101.0) / 1.5)
+
+
+def test_latency_matches_against_book_when_order_arrives():
+    clock = Clock()
+    snapshots = [(0.0, 'BTC/USDT', BIDS, ASKS),
+                 (0.5, 'BTC/USDT', [(109.0, 5.0)], [(110.0, 5.0)])]
+    exchange = make_exchange(snapshots, clock=clock, fee_rate=0.0, latency=1.0)
+
+    order = exchange.place_buy_order('BTC/USDT', 1.0, client_order_id='abc')
+    assert order.status == 'open'
+    assert [o.order_id for o in exchange.get_open_orders()] == [order.order_id]
+    assert exchange.check_asset_balance('BTC') == 10.0
+
+    clock.now = 1.0
+    filled = exchange.fetch_order('BTC/USDT', order.order_id)
+    assert filled.status == 'closed'
+    assert filled.average_price == pytest.approx(110.0)
+    assert exchange.get_open_orders() == []
+    assert exchange.find_order('BTC/USDT', 'abc').order_id == order.order_id
+    assert exchange.check_asset_balance('USDT') == pytest.approx(10000.0 - 110.0)
+
+
+def test_orders_beyond_balance_are_rejected_up_front():
+    exchange = make_exchange(balances={'BTC': 0.5, 'USDT': 50.0})
+
+    assert exchange.place_buy_order('BTC/USDT', 1.0) is None
+    assert exchange.place_sell_order('BTC/USDT', 1.0) is None
+    assert exchange.balances == {'BTC': 0.5, 'USDT': 50.0}
+
+
+def test_simulates_thousands_of_orders_per_second():
+    exchange = make_exchange(snapshots=[(0.0, 'BTC/USDT', [(99.0, 1e9)], [(100.0, 1e9)])],
+                             balances={'BTC': 1e6, 'USDT': 1e9})
+
+    started = time.perf_counter()
+    for i in range(2000):
+        place = exchange.place_buy_order if i % 2 else exchange.place_sell_order
+        assert place('BTC/USDT', 0.01).status == 'closed'
+    elapsed = time.perf_counter() - started
+
+    assert 2000 / elapsed > 1000
+    assert exchange.check_asset_balance('BTC') == pytest.approx(1e6)
@@ -0,0 +1,33 @@
+import pytest
+
+from utils.records import Order, Quote, TradeRecord
+
+
+def test_quotes_hash_by_value_and_cannot_change():
+    quote = Quote('binance', 'BTC/USDT', 100.0, 101.0, timestamp=1.0)
+
+    assert quote == Quote('binance', 'BTC/USDT', 100.0, 101.0, timestamp=1.0)
+    assert len({quote, Quote('binance', 'BTC/USDT', 100.0, 101.0, timestamp=1.0)}) == 1
+    with pytest.raises(AttributeError):
+        quote.bid = 99.0
+
+
+def test_orders_stay_findable_while_updated():
+    order = Order('kucoin', 'BTC/USDT', 'buy', 0.01, order_id='1', status='open')
+    open_orders = {order}
+
+    order.status = 'closed'
+    order.filled = 0.01
+
+    assert order in open_orders
+    assert order != Order('kucoin', 'BTC/USDT', 'buy', 0.01, order_id='1', status='closed', filled=0.01,
+                          timestamp=order.timestamp)
+
+
+def test_trade_record_can_be_given_its_id():
+    trade = TradeRecord('2026-01-01 00:00:00', 1.0, 1.0, 0.0, 0.5, 'PROFIT', 'Buy on binance and sell on kucoin')
+    trades = {trade: 'pending'}
+
+    trade.id = 7
+
+    assert trades[trade] == 'pending'
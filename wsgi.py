@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 """
 WSGI entry point for production deployment with Gunicorn
+
+Web workers do not build an ArbitrageTrader or open exchange connections.
+They subscribe to the engine process (``python src/main.py --publish-state``)
+over a Unix socket for live state, and forward manual trades to it.
 """
 import os
 import sys
@@ -13,22 +17,29 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 load_dotenv()
 
 from src.main import create_flask_app
-from src.trading.arbitrage import ArbitrageTrader
-from src.utils.logger import logger
+from reporting.trade_logger import TradeLogger
+from config.settings import ENGINE_SOCKET_PATH
+from utils.event_bus import event_bus
+from utils.ipc import StateSubscriber, RemoteJobQueue, RemoteRiskControl, RemoteSettings, RemoteProfiler
+from utils.logger import logger
 
 def create_app():
     """Create Flask app for production"""
     try:
-        # Initialize trader (dry run mode for safety)
-        trader = ArbitrageTrader()
         logger.info("🚀 Creating Flask app for production deployment")
-        
-        # Create Flask app with dry run mode
-        app = create_flask_app(trader, dry_run=True)
-        
+        subscriber = StateSubscriber(ENGINE_SOCKET_PATH, event_bus).start()
+        jobs = RemoteJobQueue(subscriber, event_bus)
+        logger.info(f"📡 Following engine state on {ENGINE_SOCKET_PATH}")
+
+        # Dry run only matters for in-process trades; the engine applies its own mode
+        app = create_flask_app(None, dry_run=True, events=event_bus, jobs=jobs,
+                               trade_logger=TradeLogger(event_bus), risk=RemoteRiskControl(subscriber),
+                               settings=RemoteSettings(subscriber),
+                               profiler=RemoteProfiler(subscriber, event_bus))
+
         logger.info("✅ Flask app created successfully for production")
         return app
-        
+
     except Exception as e:
         logger.error(f"❌ Failed to create Flask app: {e}")
         raise
@@ -38,4 +49,4 @@ application = create_app()
 
 if __name__ == "__main__":
     # For local testing
-    application.run(host='0.0.0.0', port=5000) 
\ No newline at end of file
+    application.run(host='0.0.0.0', port=5000)